@@ -0,0 +1,105 @@
+# cellwindows.py
+#
+# TransformerClassifier 학습 데이터 (prepare_transformer → train_eval_transformer)
+#
+# 예전에는 (윈도우, 격자, 피처, K) 윈도우를 모두 만들어 transformer_data.npz 에 저장하고,
+# 학습 때 통째로 읽어 transpose / reshape / 6–10월 마스크 / StandardScaler 를 거치며
+# 단계마다 전체를 복사했다. 이제 동적 기본 텐서 (T, N, D) 하나만 압축 없이 .npy 로 저장하고
+# 학습 스크립트가 memmap 으로 연다. 샘플 (윈도우 w, 격자 c) 은
+#
+#   입력 base[w:w+K, c]  (K, D),   목표 base[w+K, c, 민원수] > 0
+#
+# 이고 필요할 때 잘라 만든다. 월 필터는 윈도우 번호 목록, 정규화는 학습 윈도우를 한 번
+# 훑어 구한 피처별 평균/분산 (RunningStats) 으로 한다.
+#
+#   base, static, meta = open_base()
+#   windows = windows_for_months(meta, range(window_count(base, meta['K'])), [6, 7, 8, 9, 10])
+#   stats = frame_stats(base, meta['K'], windows)
+
+import json
+
+import numpy as np
+
+BASE_FILE = 'transformer_base.npy'
+STATIC_FILE = 'transformer_static.npy'
+META_FILE = 'transformer_meta.json'
+
+
+def save_base(data, static, meta, path=BASE_FILE, static_path=STATIC_FILE, meta_path=META_FILE):
+    """data: (T, N, D) 동적, static: (N, S) 정적 float32. meta: K, months, dyn_feats, static_cols 등."""
+    np.save(path, np.ascontiguousarray(data, dtype=np.float32))
+    np.save(static_path, np.ascontiguousarray(static, dtype=np.float32))
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+
+def open_base(path=BASE_FILE, static_path=STATIC_FILE, meta_path=META_FILE):
+    """(base memmap, static, meta)."""
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return np.load(path, mmap_mode='r'), np.load(static_path), meta
+
+
+def window_count(base, K):
+    # 마지막 달은 목표로만 쓰인다
+    return base.shape[0] - K
+
+
+def windows_for_months(meta, windows, months):
+    """목표 달(윈도우 다음 달)의 월이 months 에 드는 윈도우 번호만."""
+    K = meta['K']
+    return np.array([w for w in windows if int(meta['months'][w + K][5:7]) in months], dtype=np.int64)
+
+
+def sample_batch(base, K, target, windows, cells):
+    """(윈도우, 격자) 쌍 배열 → 입력 (n, K, D), 목표 (n,) float32."""
+    steps = windows[:, None] + np.arange(K)
+    x = base[steps, cells[:, None]]
+    y = (base[windows + K, cells, target] > 0).astype(np.float32)
+    return x, y
+
+
+class RunningStats:
+    """피처별 평균/분산을 데이터를 한 번 훑으며 구한다.
+
+    블록 (n, F) 단위로 Welford 갱신을 병합한다 (Chan et al.). weight 를 주면 블록의 각 행을
+    weight 번 넣은 것과 같다 — 같은 달이 여러 윈도우에 겹쳐 들어가는 경우.
+    """
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, block, weight=1):
+        block = np.asarray(block, dtype=np.float64).reshape(-1, len(self.mean))
+        n = len(block) * weight
+        if n == 0:
+            return
+        block_mean = block.mean(axis=0)
+        block_m2 = ((block - block_mean) ** 2).sum(axis=0) * weight
+        delta = block_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += block_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def var(self):
+        return self.m2 / self.count
+
+    @property
+    def scale(self):
+        """표준편차. 분산이 0 인 피처는 1 (StandardScaler 와 같게)."""
+        std = np.sqrt(self.var)
+        return np.where(std > 0, std, 1.0)
+
+
+def frame_stats(base, K, windows):
+    """windows 의 모든 (격자, 시점) 입력 행에 대한 피처 통계. 달마다 한 번만 읽고
+    그 달이 든 윈도우 수만큼 가중치를 준다."""
+    weight = np.bincount((np.asarray(windows)[:, None] + np.arange(K)).ravel(), minlength=base.shape[0])
+    stats = RunningStats(base.shape[-1])
+    for t in np.flatnonzero(weight):
+        stats.update(base[t], int(weight[t]))
+    return stats
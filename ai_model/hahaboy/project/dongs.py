@@ -0,0 +1,68 @@
+# dongs.py
+#
+# 좌표 → 행정동 판정 (evaluate.dong_labels)
+#
+# backend/d3/dongs.py 의 _ring_contains / _bounds / DongLocator 를 그대로 옮긴 고정 사본이다.
+# 학습 스크립트가 Django 앱 디렉터리를 import 경로에 넣지 않도록 여기 따로 두고, 두 쪽이
+# 어긋나지 않는지는 test_dongs.py 가 백엔드 파일과 소스를 비교해 확인한다.
+# 백엔드 쪽을 고치면 이 파일도 같이 고친다.
+#
+#   locator = DongLocator.from_file(DONG_GEOJSON)
+#   i = locator.locate(127.38, 36.35)     # locator.names[i], 없으면 None
+
+import json
+
+
+def _ring_contains(ring, x, y):
+    """짝홀(ray casting) 규칙으로 점이 고리 안에 있는지 판정한다."""
+    inside = False
+    x1, y1 = ring[-1][0], ring[-1][1]
+    for point in ring:
+        x2, y2 = point[0], point[1]
+        if (y2 > y) != (y1 > y) and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _bounds(ring):
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class DongLocator:
+    """GeoJSON (Multi)Polygon 행정동 목록에서 점이 속한 행정동을 찾는다."""
+
+    def __init__(self, features):
+        self.codes = []
+        self.names = []
+        self._polygons = []  # (경계 상자, [외곽, 구멍...], 행정동 번호)
+        for i, feature in enumerate(features):
+            props = feature.get('properties') or {}
+            self.codes.append(str(props.get('code') or props.get('ADM_CD') or i))
+            self.names.append(props.get('name') or props.get('EMD_KOR_NM') or '')
+            geometry = feature['geometry']
+            polygons = geometry['coordinates']
+            if geometry['type'] == 'Polygon':
+                polygons = [polygons]
+            for rings in polygons:
+                self._polygons.append((_bounds(rings[0]), rings, i))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['features'])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def locate(self, longitude, latitude):
+        """(경도, 위도) 가 속한 행정동 번호. 어느 행정동에도 없으면 None."""
+        for (west, south, east, north), rings, i in self._polygons:
+            if not (west <= longitude <= east and south <= latitude <= north):
+                continue
+            if _ring_contains(rings[0], longitude, latitude) and \
+                    not any(_ring_contains(hole, longitude, latitude) for hole in rings[1:]):
+                return i
+        return None
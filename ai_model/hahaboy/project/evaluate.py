@@ -0,0 +1,110 @@
+# evaluate.py
+#
+# 학습 스크립트 공용 평가 (train_eval_transformer / train_eval_convLSTM / train_tft)
+#
+# - pr_curve / best_threshold: 점수를 한 번 정렬해 모든 임계값의 precision / recall / F1 을
+#   누적합으로 구한다 (임계값마다 f1_score 를 다시 돌리지 않음, O(n log n)). best_threshold 의
+#   후보는 예전 학습 스크립트와 같은 0.1–0.9 의 81 점이라 결과도 같다.
+# - grouped_metrics: 월·행정동 등 그룹별 회귀(MSE, MAE, R2)·분류(Acc, Prec, Rec, F1) 지표를
+#   groupby 합계 한 번으로 낸다 (그룹마다 sklearn 을 부르는 루프 없음).
+# - dong_labels: 격자 중심 좌표 → 행정동 이름. 판정은 백엔드 build_dong_stats 와 같은 구현
+#   (dongs.py — backend/d3/dongs.py DongLocator 의 고정 사본) 과 같은 파일 (frontend 의
+#   dong.geojson) 을 쓴다.
+#
+#   thr, f1 = best_threshold(y_true, score)
+#   table = grouped_metrics({'month': months, 'dong': dongs}, y_true=reg_t, y_pred=reg_p,
+#                           cls_true=cls_t, cls_pred=cls_p)
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from dongs import DongLocator
+
+DONG_GEOJSON = os.path.join('..', '..', '..', 'frontend', 'public', 'data', 'dong.geojson')
+# 예전 train_eval_transformer 의 임계값 후보
+THRESHOLD_GRID = np.linspace(0.1, 0.9, 81)
+
+
+def pr_curve(y_true, score):
+    """(thresholds, precision, recall, f1). thresholds 는 내림차순 고유 점수이고,
+    i 번째 값은 score >= thresholds[i] 를 양성으로 볼 때의 지표 (0 나누기는 0, sklearn 과 같게)."""
+    score = np.asarray(score, dtype=np.float64).ravel()
+    order = np.argsort(-score, kind='stable')
+    score = score[order]
+    positive = np.asarray(y_true).ravel()[order] > 0
+
+    # 같은 점수는 한 임계값 — 각 고유 점수의 마지막 위치에서 누적값을 읽는다
+    last = np.r_[np.flatnonzero(np.diff(score)), len(score) - 1] if len(score) else np.array([], int)
+    tp = np.cumsum(positive)[last]
+    predicted = last + 1
+    total = int(positive.sum())
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = tp / total if total else np.zeros(len(tp))
+        f1 = np.where(predicted + total > 0, 2 * tp / (predicted + total), 0.0)
+    return score[last], precision, recall, f1
+
+
+def best_threshold(y_true, score, thresholds=THRESHOLD_GRID):
+    """thresholds 후보 중 F1 이 가장 큰 임계값과 그 F1 (같으면 앞 후보, 모두 0 이면 (0.5, 0.0)).
+    pr_curve 를 한 번 만들고 후보마다 score >= t 에 해당하는 위치를 이진 탐색으로 읽는다."""
+    curve, _, _, f1 = pr_curve(y_true, score)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if not len(curve) or not len(thresholds):
+        return 0.5, 0.0
+    # curve 는 내림차순 — t 이상인 마지막 위치 (없으면 양성 예측이 없어 F1 0)
+    pos = np.searchsorted(-curve, -thresholds, side='right') - 1
+    values = np.where(pos >= 0, f1[np.maximum(pos, 0)], 0.0)
+    if values.max() <= 0:
+        return 0.5, 0.0
+    i = int(np.argmax(values))
+    return float(thresholds[i]), float(values[i])
+
+
+def grouped_metrics(keys, y_true=None, y_pred=None, cls_true=None, cls_pred=None):
+    """keys: {이름: (n,) 그룹 라벨} (빈 dict 면 전체 한 줄). 회귀(y_true, y_pred)·분류(cls_true, cls_pred 0/1)
+    중 주어진 것만 계산한다. 반환: 그룹별 한 줄 DataFrame (n, MSE, MAE, R2, Acc, Prec, Rec, F1)."""
+    parts = {}
+    if y_true is not None:
+        y = np.asarray(y_true, dtype=np.float64).ravel()
+        err = np.asarray(y_pred, dtype=np.float64).ravel() - y
+        parts.update(n=np.ones(len(y)), se=err * err, ae=np.abs(err), y=y, yy=y * y)
+    if cls_true is not None:
+        t = np.asarray(cls_true).ravel() > 0
+        p = np.asarray(cls_pred).ravel() > 0
+        parts.update(n=np.ones(len(t)), tp=t & p, fp=~t & p, fn=t & ~p)
+    frame = pd.DataFrame(parts)
+    for name, labels in keys.items():
+        frame[name] = np.asarray(labels).ravel()
+
+    sums = frame.groupby(list(keys), sort=True).sum() if keys else frame.sum().to_frame().T
+    n = sums['n']
+    out = pd.DataFrame({'n': n.astype(int)}, index=sums.index)
+    if y_true is not None:
+        sst = sums['yy'] - sums['y'] ** 2 / n
+        out['MSE'] = sums['se'] / n
+        out['MAE'] = sums['ae'] / n
+        # 실제값이 상수인 그룹: 완전히 맞으면 1, 아니면 0 (sklearn r2_score 와 같게)
+        out['R2'] = np.where(sst > 1e-12, 1 - sums['se'] / sst.where(sst > 1e-12, 1.0),
+                             np.where(sums['se'] == 0, 1.0, 0.0))
+    if cls_true is not None:
+        tp, fp, fn = sums['tp'], sums['fp'], sums['fn']
+        out['Acc'] = (n - fp - fn) / n
+        out['Prec'] = (tp / (tp + fp)).fillna(0.0)
+        out['Rec'] = (tp / (tp + fn)).fillna(0.0)
+        out['F1'] = (2 * tp / (2 * tp + fp + fn)).fillna(0.0)
+    return out.reset_index(drop=not keys)
+
+
+def dong_labels(longitude, latitude, path=DONG_GEOJSON):
+    """좌표 배열 → 행정동 이름 배열 (어느 행정동에도 없으면 '').
+    격자 수만큼만 부르므로 (월마다 np.tile) 백엔드 DongLocator 의 점 단위 판정을 그대로 쓴다."""
+    locator = DongLocator.from_file(path)
+    names = np.array(locator.names + [''], dtype=object)
+    missing = len(locator.names)
+    found = [locator.locate(x, y) for x, y in zip(np.asarray(longitude, dtype=np.float64).tolist(),
+                                                  np.asarray(latitude, dtype=np.float64).tolist())]
+    return names[np.array([missing if i is None else i for i in found], dtype=np.intp)]
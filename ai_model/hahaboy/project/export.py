@@ -0,0 +1,147 @@
+# export.py
+#
+# 예측 결과 내보내기 (train_eval_convLSTM / train_eval_transformer / train_tft → frontend / backend)
+#
+# 예전에는 convLSTM 학습 끝에 달마다 DataFrame 을 만들어 grid_meta.csv 를 merge 하고 concat 해
+# multitask_predictions_2020.csv 를 썼고, frontend 가 읽는 ssookssook_MM.csv 는 그걸 손으로
+# 옮겨 만들었다. 이제 세 모델 모두 (월, 격자) 예측 배열을 export_predictions 에 넘긴다.
+# 격자 메타는 grid_idx 정수 인덱스로 한 번에 붙이고 (merge 없음), 모든 달을 한 테이블로 만든다.
+#
+#   predictions/<모델>.parquet                 모든 달의 long 테이블 (월·격자100m category, 값 int16/float32)
+#   predictions/<모델>/<YYYY>/ssookssook_MM.csv frontend 형식 (격자순번, 격자100m, 위도, 경도,
+#                                               실제값, 예측값, 시계열예측값) — public/data 에 그대로 복사
+#
+#   paths = export_predictions('convlstm', months, grid, actual, predicted, score=score)
+#   load_into_backend(paths, model_version='convlstm')   # manage.py load_predictions 한 번 (bulk upsert)
+#
+# 이미 내보낸 Parquet 에서 달을 골라 CSV 를 다시 쓰고 DB 에 올리는 것도 명령 하나다:
+#
+#   python export.py predictions/convlstm.parquet --months 2020-06 2020-07 --load --model-version convlstm
+
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from layout import cell_ids
+
+PREDICTION_DIR = 'predictions'
+BACKEND_DIR = os.path.join('..', '..', '..', 'backend')
+CSV_COLUMNS = ['격자순번', '격자100m', '위도', '경도', 'actual', 'predicted', 'score']
+CSV_NAMES = {'actual': '실제값', 'predicted': '예측값', 'score': '시계열예측값'}
+
+
+def csv_path(directory, month):
+    """'2020-06' → <directory>/2020/ssookssook_06.csv (frontend 파일 이름은 월만 쓴다)."""
+    return os.path.join(directory, month[:4], f'ssookssook_{month[5:7]}.csv')
+
+
+def prediction_table(months, grid, actual, predicted, score=None, cells=None, extra=None):
+    """(M, n) 예측 배열들 → 모든 달의 long DataFrame (월 순서, 달 안에서는 cells 순서).
+    actual / predicted 는 민원 발생 여부 0/1, score 는 모델 점수 (없으면 NaN → CSV 빈 칸).
+
+    grid:  grid_meta.csv (grid_idx, 격자100m, 위도, 경도 ...). grid_idx 가 없으면 행 번호.
+    cells: 배열 열 j 의 grid_idx (기본 0..n-1). extra: {컬럼 이름: (M, n)} 추가 값 (float32).
+    """
+    actual = np.asarray(actual)
+    M, n = actual.shape
+    if len(months) != M:
+        raise ValueError(f"Got {len(months)} months for {M} rows of predictions")
+    cells = np.arange(n) if cells is None else np.asarray(cells, dtype=np.int64)
+    if len(cells) != n:
+        raise ValueError(f"Got {len(cells)} cells for {n} columns of predictions")
+
+    # grid_idx → grid 행 번호 (정수 인덱스 조인)
+    index = grid['grid_idx'].to_numpy(np.int64) if 'grid_idx' in grid else np.arange(len(grid))
+    lookup = np.full(max(index.max(), cells.max()) + 1, -1, np.int64)
+    lookup[index] = np.arange(len(grid))
+    rows = lookup[cells]
+    if (rows < 0).any():
+        raise ValueError(f"grid_meta has no rows for grid_idx {cells[rows < 0][:5].tolist()}")
+
+    keys = grid['격자100m'].to_numpy(str)[rows]
+    key_codes = pd.Categorical(keys)
+    table = pd.DataFrame({
+        'year_month': pd.Categorical.from_codes(np.repeat(np.arange(M), n), categories=list(months)),
+        'grid_idx':   np.tile(cells, M).astype(np.int32),
+        'cell_id':    np.tile(cell_ids(keys), M),
+        '격자순번':    np.tile(cells + 1, M).astype(np.int32),
+        '격자100m':    pd.Categorical.from_codes(np.tile(key_codes.codes, M), categories=key_codes.categories),
+        '위도':        np.tile(grid['위도'].to_numpy(np.float64)[rows], M),
+        '경도':        np.tile(grid['경도'].to_numpy(np.float64)[rows], M),
+        'actual':     actual.reshape(-1).astype(np.int16),
+        'predicted':  np.asarray(predicted).reshape(-1).astype(np.int16),
+        'score':      np.full(M * n, np.nan, np.float32) if score is None
+                      else np.asarray(score, dtype=np.float32).reshape(-1),
+    })
+    for name, values in (extra or {}).items():
+        table[name] = np.asarray(values, dtype=np.float32).reshape(-1)
+    return table
+
+
+def write_month_csvs(table, directory, months=None):
+    """table 의 달마다 frontend 형식 CSV 를 쓴다. 반환: {월: 경로}."""
+    paths = {}
+    wanted = table['year_month'].cat.categories if months is None else months
+    # 달 블록은 연속이므로 정렬 없이 코드 경계로 자른다
+    codes = table['year_month'].cat.codes.to_numpy()
+    starts = np.searchsorted(codes, np.arange(len(table['year_month'].cat.categories) + 1))
+    position = {month: i for i, month in enumerate(table['year_month'].cat.categories)}
+    for month in wanted:
+        if month not in position:
+            raise KeyError(f"Month {month} is not in the prediction table")
+        i = position[month]
+        block = table.iloc[starts[i]:starts[i + 1]][CSV_COLUMNS].rename(columns=CSV_NAMES)
+        path = csv_path(directory, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        block.to_csv(path, index=False, encoding='utf-8-sig')
+        paths[month] = path
+    return paths
+
+
+def export_predictions(name, months, grid, actual, predicted, score=None, cells=None, extra=None,
+                       out_dir=PREDICTION_DIR):
+    """모든 달을 <out_dir>/<name>.parquet 과 월별 CSV 로 쓴다. 반환: {월: CSV 경로}."""
+    table = prediction_table(months, grid, actual, predicted, score=score, cells=cells, extra=extra)
+    os.makedirs(out_dir, exist_ok=True)
+    artifact = os.path.join(out_dir, f'{name}.parquet')
+    table.to_parquet(artifact, index=False)
+    paths = write_month_csvs(table, os.path.join(out_dir, name))
+    print(f"Saved → {artifact} ({len(table)} rows), {len(paths)} CSVs in {os.path.join(out_dir, name)}")
+    return paths
+
+
+def load_into_backend(paths, model_version=None, backend_dir=BACKEND_DIR):
+    """{월: CSV 경로} 를 manage.py load_predictions 한 번으로 올린다 (한 트랜잭션, bulk upsert)."""
+    command = [sys.executable, 'manage.py', 'load_predictions']
+    for month, path in sorted(paths.items()):
+        command += ['--month', f'{month}={os.path.abspath(path)}']
+    if model_version:
+        command += ['--model-version', model_version]
+    subprocess.run(command, cwd=backend_dir, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='예측 Parquet → frontend CSV (+ 백엔드 DB 적재)')
+    parser.add_argument('artifact', help='export_predictions 가 쓴 <모델>.parquet')
+    parser.add_argument('--months', nargs='+', help='내보낼 달 YYYY-MM (기본: 전체)')
+    parser.add_argument('--out', help='CSV 디렉터리 (기본: Parquet 옆 <모델>/)')
+    parser.add_argument('--load', action='store_true', help='manage.py load_predictions 로 DB 에 올린다')
+    parser.add_argument('--model-version', help='load_predictions --model-version (기본: 백엔드 설정값)')
+    parser.add_argument('--backend', default=BACKEND_DIR, help='manage.py 가 있는 디렉터리')
+    args = parser.parse_args()
+
+    table = pd.read_parquet(args.artifact)
+    out = args.out or os.path.splitext(args.artifact)[0]
+    paths = write_month_csvs(table, out, args.months)
+    for month, path in paths.items():
+        print(f"{month} → {path}")
+    if args.load:
+        load_into_backend(paths, args.model_version, args.backend)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# ingest.py
+#
+# data1.xlsx / data2.xlsx 공용 읽기 (prepare_convLSTM / prepare_tft / prepare_transformer)
+#
+# 넓은 xlsx 를 openpyxl 로 파싱하는 시간이 전처리 대부분이므로 워크북마다 한 번만
+# Parquet 로 바꿔 .ingest_cache/ 에 둔다. 캐시 파일 이름에 워크북 내용 해시를 넣어
+# 엑셀이 바뀌면 자동으로 새로 만든다. 피처는 float32/int32, 식별자(격자100m, 위도, 경도)는
+# 원래 타입(문자열, float64)으로 저장해 두 워크북 사이의 조인 키가 그대로 유지된다.
+# 읽을 때는 필요한 컬럼만 읽는다 (Parquet 컬럼 프로젝션).
+#
+#   static_df = load_workbook('data1.xlsx', columns=static_cols)
+#   dyn_df    = load_workbook('data2.xlsx', where=lambda c: c.startswith(prefixes))
+#
+# 동적 피처 wide→long 은 dynamic_tensor 하나로 한다. '<피처>_YY_MM' 컬럼 이름을 한 번
+# 해석해 (월, 피처) 위치를 구하고, 값 블록을 (T, 격자, 피처) float32 배열에 정수 인덱스로
+# 바로 흩뿌린다 (melt / merge / pivot 없음, 시간·메모리 모두 입력 크기에 선형).
+
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+ID_COLS = ['격자100m', '위도', '경도']
+CACHE_DIR = '.ingest_cache'
+MONTH_COLUMN = re.compile(r'^(.+)_(\d{2})_(\d{2})$')
+
+
+def content_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def _narrow(df):
+    """피처 컬럼을 float32/int32 로. 정수 컬럼은 int32 범위를 넘으면 float32 로 둔다."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c in ID_COLS:
+            out[c] = s.astype(str) if c == '격자100m' else s.astype(np.float64)
+        elif pd.api.types.is_integer_dtype(s) and s.between(-2**31, 2**31 - 1).all():
+            out[c] = s.astype(np.int32)
+        else:
+            # 문자열/결측이 섞인 컬럼은 숫자로 바꾸고 안 되는 값은 NaN
+            out[c] = pd.to_numeric(s, errors='coerce').astype(np.float32)
+    return pd.DataFrame(out)
+
+
+def cache_path(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path) or '.', CACHE_DIR, f'{stem}-{content_hash(path)}.parquet')
+
+
+def ensure_cache(path):
+    """path 워크북의 Parquet 캐시 경로. 없으면 만든다 (같은 워크북의 이전 캐시는 지운다)."""
+    cached = cache_path(path)
+    if os.path.exists(cached):
+        return cached
+
+    directory = os.path.dirname(cached)
+    os.makedirs(directory, exist_ok=True)
+    df = _narrow(pd.read_excel(path))
+    for c in ID_COLS:
+        if c not in df.columns:
+            raise KeyError(f"Identifier column '{c}' not found in {path}")
+    tmp = f'{cached}.{os.getpid()}.tmp'
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, cached)
+
+    stem = os.path.basename(cached).rsplit('-', 1)[0]
+    for name in os.listdir(directory):
+        if name.startswith(f'{stem}-') and name.endswith('.parquet') and name != os.path.basename(cached):
+            os.remove(os.path.join(directory, name))
+    print(f"ingest: {path} → {cached}")
+    return cached
+
+
+def workbook_columns(path):
+    """캐시된 워크북의 컬럼 이름 (데이터는 읽지 않는다)."""
+    import pyarrow.parquet as pq
+    return pq.read_schema(ensure_cache(path)).names
+
+
+def load_workbook(path, columns=None, where=None):
+    """식별자 컬럼 + columns + where(컬럼 이름)이 참인 컬럼만 읽는다. 둘 다 없으면 전체."""
+    cached = ensure_cache(path)
+    if columns is None and where is None:
+        return pd.read_parquet(cached)
+
+    available = workbook_columns(path)
+    wanted = set(ID_COLS) | set(columns or ())
+    missing = wanted - set(available)
+    if missing:
+        raise KeyError(f"Columns not found in {path}: {sorted(missing)}")
+    selected = [c for c in available if c in wanted or (where is not None and where(c))]
+    return pd.read_parquet(cached, columns=selected)
+
+
+def dynamic_tensor(dyn_df, grid_keys, features=None, size=None):
+    """wide 동적 컬럼 '<피처>_YY_MM' → (months, features, tensor).
+
+    grid_keys: 격자 순서대로의 식별자(ID_COLS) DataFrame. 행 i 가 tensor[:, i].
+    features:  피처 순서 (없으면 이름순). size: 격자 축 길이 (기본 len(grid_keys), 뒤는 0 패딩).
+    tensor:    (T, size, F) float32. months 는 'YYYY-MM' 오름차순.
+    grid_keys 에 없는 행은 버리고, 없는 (월, 격자, 피처) 와 NaN 은 0 이다.
+    """
+    parsed = []
+    for column in dyn_df.columns:
+        m = MONTH_COLUMN.match(str(column))
+        if m:
+            parsed.append((column, m.group(1), f'20{m.group(2)}-{m.group(3)}'))
+    if features is None:
+        features = sorted({feature for _, feature, _ in parsed})
+    feature_pos = {feature: i for i, feature in enumerate(features)}
+    parsed = [p for p in parsed if p[1] in feature_pos]
+    months = sorted({month for _, _, month in parsed})
+    month_pos = {month: i for i, month in enumerate(months)}
+
+    # 동적 행 → 격자 번호 (식별자 3개 일치, 없으면 -1)
+    rows = pd.MultiIndex.from_frame(grid_keys[ID_COLS]).get_indexer(pd.MultiIndex.from_frame(dyn_df[ID_COLS]))
+    valid = rows >= 0
+    # 컬럼 dtype 이 모두 같으면 to_numpy 가 읽기 전용 뷰를 줄 수 있어 (copy-on-write) 제자리로 고치지 않는다
+    block = np.nan_to_num(dyn_df.loc[valid, [column for column, _, _ in parsed]].to_numpy(np.float32))  # (R, C)
+
+    tensor = np.zeros((len(months), size or len(grid_keys), len(features)), np.float32)
+    t = np.array([month_pos[month] for _, _, month in parsed], np.intp)
+    f = np.array([feature_pos[feature] for _, feature, _ in parsed], np.intp)
+    tensor[t[:, None], rows[valid][None, :], f[:, None]] = block.T
+    return months, features, tensor
@@ -0,0 +1,72 @@
+# layout.py
+#
+# 격자 → 래스터 배치 (prepare_convLSTM / prepare_tft / prepare_transformer)
+#
+# 예전에는 격자를 grid_idx 순서대로 ceil(sqrt(N)) 정사각형에 채워 넣어서 이웃 픽셀이 실제
+# 이웃 격자가 아니었고, 남는 칸(0)도 진짜 격자처럼 학습에 들어갔다. 이제 격자100m 키에 든
+# 100m 위치(국가지점번호)로 실제 지리 배치를 만든다. 래스터는 격자들의 외접 사각형이고
+# (북쪽이 행 0), 격자가 없는 칸은 mask 가 False 이다.
+#
+#   layout = GridLayout(grid_meta['격자100m'])
+#   frames = layout.scatter(dyn)      # (T, N, F) → (T, H, W, F), 빈 칸 0
+#   values = layout.gather(frames_2d) # (..., H, W) → (..., N)
+#
+# 키 하나가 정확히 100m 칸 하나이므로 위도/경도는 쓰지 않는다.
+
+import numpy as np
+import pandas as pd
+
+# backend d3/grid.py 와 같은 원점과 cell_id 인코딩 (cell_id = col * CELL_ID_STRIDE + row)
+ZONE_LETTERS = '가나다라마바사'
+EASTING_ORIGIN = 7000      # '가' 구역의 시작 동서 100m 인덱스
+NORTHING_ORIGIN = 13000    # '가' 구역의 시작 남북 100m 인덱스
+CELLS_PER_ZONE = 1000
+CELL_ID_STRIDE = 100000
+
+
+def grid_position(keys):
+    """'다마847996' 형태 키 → (동서, 남북) 100m 인덱스 int64 배열."""
+    keys = pd.Series(np.asarray(keys, dtype=str))
+    valid = keys.str.fullmatch(f'[{ZONE_LETTERS}]{{2}}\\d{{6}}')
+    if not valid.all():
+        raise ValueError(f"Invalid 격자100m keys: {keys[~valid].head().tolist()}")
+    zone = {letter: i for i, letter in enumerate(ZONE_LETTERS)}
+    col = EASTING_ORIGIN + keys.str[0].map(zone) * CELLS_PER_ZONE + keys.str[2:5].astype(int)
+    row = NORTHING_ORIGIN + keys.str[1].map(zone) * CELLS_PER_ZONE + keys.str[5:8].astype(int)
+    return col.to_numpy(np.int64), row.to_numpy(np.int64)
+
+
+def cell_ids(keys):
+    """키 → backend cell_id (d3.grid.cell_id_from_key 와 같은 값) int64 배열."""
+    col, row = grid_position(keys)
+    return col * CELL_ID_STRIDE + row
+
+
+class GridLayout:
+    """격자 i 의 래스터 위치 (y[i], x[i]). H×W 는 격자들의 외접 사각형."""
+
+    def __init__(self, keys):
+        col, row = grid_position(keys)
+        self.x = col - col.min()
+        self.y = row.max() - row
+        self.H, self.W = int(self.y.max()) + 1, int(self.x.max()) + 1
+        self.flat = self.y * self.W + self.x
+
+        counts = np.bincount(self.flat, minlength=self.H * self.W)
+        if counts.max() > 1:
+            raise ValueError(f"{int((counts > 1).sum())} raster cells have more than one 격자100m key")
+        self.mask = (counts == 1).reshape(self.H, self.W)
+
+    def __len__(self):
+        return len(self.flat)
+
+    def scatter(self, values):
+        """(..., N, F) → (..., H, W, F). 격자가 없는 칸은 0."""
+        lead, features = values.shape[:-2], values.shape[-1]
+        out = np.zeros(lead + (self.H * self.W, features), values.dtype)
+        out[..., self.flat, :] = values
+        return out.reshape(lead + (self.H, self.W, features))
+
+    def gather(self, raster):
+        """(..., H, W) → (..., N). 격자 순서대로."""
+        return raster[..., self.y, self.x]
@@ -1,19 +1,14 @@
 import pandas as pd
 import numpy as np
-from numpy.lib.stride_tricks import sliding_window_view
-from math import ceil, sqrt
 import sys
 
-# 1) Load static & dynamic Excel
-static_df = pd.read_excel('data1.xlsx')  # 정적 피처
-dyn_df    = pd.read_excel('data2.xlsx')  # wide-format 동적 피처
+from ingest import ID_COLS, dynamic_tensor, load_workbook
+from layout import GridLayout
+from windows import save_base, window_count
 
-# 2) Identifier cols check
-id_cols = ['격자100m','위도','경도']
-for df_, name in ((static_df,'data1.xlsx'), (dyn_df,'data2.xlsx')):
-    for c in id_cols:
-        if c not in df_.columns:
-            raise KeyError(f"Identifier column '{c}' not found in {name}")
+# 1) Excel 은 ingest 캐시(Parquet)로 읽는다 → 아래 4-1)
+# 2) Identifier cols (없으면 ingest 가 KeyError)
+id_cols = ID_COLS
 
 # 3) Static feature list (123개)
 static_cols = [
@@ -60,27 +55,11 @@ dynamic_prefixes = [
 ]
 dyn_names = [p.rstrip('_') for p in dynamic_prefixes]
 
-# 5) Melt dynamic wide→long
-panel_dyn = None
-for pref in dynamic_prefixes:
-    cols = [c for c in dyn_df.columns if c.startswith(pref)]
-    tmp = dyn_df[id_cols + cols].melt(
-        id_vars=id_cols, value_vars=cols,
-        var_name='orig', value_name=pref.rstrip('_')
-    )
-    tmp['year_month'] = (
-        tmp['orig']
-           .str.replace(pref, '', regex=False)
-           .str.replace(r'(\d{2})_(\d{2})',
-                        lambda m: f"20{m.group(1)}-{m.group(2)}",
-                        regex=True)
-    )
-    tmp = tmp.drop(columns='orig')
-    panel_dyn = tmp if panel_dyn is None else panel_dyn.merge(
-        tmp, on=id_cols+['year_month'], how='outer'
-    )
+# 4-1) Load static & dynamic (필요한 컬럼만)
+static_df = load_workbook('data1.xlsx', columns=static_cols)  # 정적 피처
+dyn_df    = load_workbook('data2.xlsx', where=lambda c: c.startswith(tuple(dynamic_prefixes)))  # wide-format 동적 피처
 
-# 6) Grid metadata
+# 5) Grid metadata
 grid_meta = static_df[id_cols].drop_duplicates().reset_index(drop=True)
 grid_meta['grid_idx'] = np.arange(len(grid_meta))
 grid_meta = grid_meta.merge(
@@ -88,67 +67,33 @@ grid_meta = grid_meta.merge(
     on=id_cols, how='left'
 )
 
-# 7) H, W grid dimensions
+# 6) H, W: 격자100m 위치로 만든 지리 래스터 (격자 없는 칸은 mask False, 값 0)
 N = len(grid_meta)
-W = H = ceil(sqrt(N))
+layout = GridLayout(grid_meta['격자100m'])
+H, W = layout.H, layout.W
 
-# 8) Full space–time skeleton
-all_months = sorted(panel_dyn['year_month'].unique())
-full_idx = pd.MultiIndex.from_product(
-    [all_months, np.arange(H*W)],
-    names=['year_month','grid_idx']
-)
-full_df = pd.DataFrame(index=full_idx).reset_index()
-
-# 9) Merge static + dynamic
-full_df = full_df.merge(
-    grid_meta.assign(**{c:0 for c in static_cols}),
-    on='grid_idx', how='left'
-)
-panel_dyn = panel_dyn.merge(
-    grid_meta[id_cols+['grid_idx']], on=id_cols, how='left'
-)
-full_df = full_df.merge(
-    panel_dyn[['year_month','grid_idx']+dyn_names],
-    on=['year_month','grid_idx'], how='left'
-)
-full_df[static_cols] = full_df[static_cols].fillna(0)
-full_df[dyn_names]    = full_df[dyn_names].fillna(0)
-
-# 10) Compute row/col & sort
-full_df['row'] = full_df['grid_idx'] // W
-full_df['col'] = full_df['grid_idx'] % W
-full_df = full_df.sort_values(['year_month','row','col']).reset_index(drop=True)
-
-# 11) Build data tensor (T,H,W,C)
+# 7) Dynamic wide → (T, N, 동적) 한 번에 (없는 값 0)
+all_months, _, dyn = dynamic_tensor(dyn_df, grid_meta, features=dyn_names)
 T = len(all_months)
-feature_cols = static_cols + dyn_names
-vals = full_df[feature_cols].to_numpy(np.float32)
-data = vals.reshape(T, H, W, len(feature_cols))
 
-# 12) Sliding window for inputs (민원수 제외)
+# 8) Build data tensor (T,H,W,D) — 동적 채널만
+#    채널 순서: [동적(민원수 제외)..., 민원수] → 입력은 [..., :-1], 목표는 [..., -1]
 K = 12
-# 인덱스 계산
-static_len = len(static_cols)
-mn_idx     = static_len + dyn_names.index('민원수')
-input_idxs = list(range(static_len)) + [static_len + i for i in range(len(dyn_names)) if dyn_names[i]!='민원수']
-
-# 윈도우
-X = sliding_window_view(data[..., input_idxs], window_shape=K, axis=0)
-X = np.moveaxis(X, -1, 1)  # → (T-K+1, K, H, W, C-1)
-X = X[:-1]                 # → (T-K, K, H, W, C-1)
-
-# 13) Targets: 민원수 채널만
-Y_full = data[..., mn_idx]           # (T, H, W)
-Y      = Y_full[K:][..., np.newaxis] # (T-K, H, W, 1)
-
-# 14) Save
-np.savez_compressed('convLSTM_data.npz', X=X, Y=Y)
-full_df[['grid_idx','격자100m','위도','경도']].drop_duplicates().to_csv(
+input_dyn  = [n for n in dyn_names if n != '민원수']
+channels   = input_dyn + ['민원수']
+data = layout.scatter(dyn[..., [dyn_names.index(n) for n in channels]])
+del dyn
+
+# 9) Static (H,W,S) — 격자당 한 번, 모델이 FiLM 으로 섞는다 (빈 칸은 0)
+static = layout.scatter(grid_meta[static_cols].fillna(0).to_numpy(dtype=np.float32))
+
+# 10) Save base/static tensors (윈도우는 학습 때 windows.window_batch 가 잘라 쓴다)
+save_base(data, {'K': K, 'H': H, 'W': W, 'months': all_months, 'channels': channels,
+                 'static_cols': static_cols}, static=static)
+grid_meta[['grid_idx'] + id_cols].assign(row=layout.y, col=layout.x).to_csv(
     'grid_meta.csv', index=False, encoding='utf-8-sig'
 )
 
 print("✅ prepare_convLSTM complete")
-print(f"H={H}, W={W}, static_feats={len(static_cols)}, dyn_feats={len(dyn_names)-1}")
-print(f"X.shape = {X.shape}")   # (66,12,98,98,static+dyn-1)
-print(f"Y.shape = {Y.shape}")   # (66,98,98,1)
+print(f"H={H}, W={W}, cells={N} ({N/(H*W):.0%} of raster), static_feats={len(static_cols)}, dyn_feats={len(dyn_names)-1}")
+print(f"base.shape = {data.shape}, static.shape = {static.shape}, windows = {window_count(data, K)}")
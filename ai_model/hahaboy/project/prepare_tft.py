@@ -1,18 +1,13 @@
 import pandas as pd
 import numpy as np
-from math import ceil, sqrt
 import sys
 
-# 1) static + dynamic 파일 읽기
-static_df = pd.read_excel('data1.xlsx')
-dyn_df    = pd.read_excel('data2.xlsx')
+from ingest import ID_COLS, dynamic_tensor, load_workbook
+from layout import GridLayout
 
-# 2) 식별자 컬럼 확인
-id_cols = ['격자100m','위도','경도']
-for df_ in (static_df, dyn_df):
-    for c in id_cols:
-        if c not in df_.columns:
-            raise KeyError(f"Identifier column '{c}' not found in {'data1.xlsx' if df_ is static_df else 'data2.xlsx'}")
+# 1) static + dynamic 파일은 ingest 캐시(Parquet)로 읽는다 → 아래 4-1)
+# 2) 식별자 컬럼 (없으면 ingest 가 KeyError)
+id_cols = ID_COLS
 
 # 3) 정적 피처 리스트 (data1.xlsx 에 있는 모든 정적 컬럼)
 static_cols = [
@@ -59,27 +54,11 @@ dynamic_prefixes = [
 ]
 dyn_names = [p.rstrip('_') for p in dynamic_prefixes]
 
-# 5) dyn_df를 long-format으로 melt
-panel_dyn = None
-for pref in dynamic_prefixes:
-    cols = [c for c in dyn_df.columns if c.startswith(pref)]
-    tmp = dyn_df[id_cols + cols].melt(
-        id_vars=id_cols, value_vars=cols,
-        var_name='orig', value_name=pref.rstrip('_')
-    )
-    tmp['year_month'] = (
-        tmp['orig']
-           .str.replace(pref, '', regex=False)
-           .str.replace(r'(\d{2})_(\d{2})',
-                        lambda m: f"20{m.group(1)}-{m.group(2)}",
-                        regex=True)
-    )
-    tmp = tmp.drop(columns='orig')
-    panel_dyn = tmp if panel_dyn is None else panel_dyn.merge(
-        tmp, on=id_cols+['year_month'], how='outer'
-    )
+# 4-1) 필요한 컬럼만 읽기
+static_df = load_workbook('data1.xlsx', columns=static_cols)
+dyn_df    = load_workbook('data2.xlsx', where=lambda c: c.startswith(tuple(dynamic_prefixes)))
 
-# 6) 정적 메타 생성
+# 5) 정적 메타 생성
 grid_meta = static_df[id_cols].drop_duplicates().reset_index(drop=True)
 grid_meta['grid_idx'] = np.arange(len(grid_meta))
 grid_meta = grid_meta.merge(
@@ -87,46 +66,40 @@ grid_meta = grid_meta.merge(
     on=id_cols, how='left'
 )
 
-# 7) 격자 H×W 자동 계산
+# 6) 지리 래스터 위치 (격자100m 기준, 실제 격자만 — 빈 칸/패딩 격자는 panel 에 없다)
 N = len(grid_meta)
-W = H = ceil(sqrt(N))
+layout = GridLayout(grid_meta['격자100m'])
 
-# 8) 전체 시공간 skeleton
-all_months = sorted(panel_dyn['year_month'].unique())
-full_idx   = pd.MultiIndex.from_product(
-    [all_months, np.arange(H*W)],
-    names=['year_month','grid_idx']
-)
-full_df = pd.DataFrame(index=full_idx).reset_index()
+# 7) dyn_df wide → (T, N, 동적) 한 번에 (없는 값 0)
+all_months, _, dyn = dynamic_tensor(dyn_df, grid_meta, features=dyn_names)
+T = len(all_months)
 
-# 9) static 합치기
-full_df = full_df.merge(grid_meta, on='grid_idx', how='left')
-full_df[static_cols] = full_df[static_cols].fillna(0)
+# 8) 격자 축 (grid_idx 0..N-1)
+#    정적 피처는 격자당 한 줄로 panel_static.csv 에 따로 저장한다 (panel 에 T 번 복제하지 않음)
+space_static = grid_meta[['grid_idx'] + static_cols].fillna(0)
+space = grid_meta[['grid_idx'] + id_cols].assign(row=layout.y, col=layout.x)
 
-# 10) dynamic 합치기
-panel_dyn = panel_dyn.merge(
-    grid_meta[id_cols+['grid_idx']], on=id_cols, how='left'
-)
-full_df = full_df.merge(
-    panel_dyn[['year_month','grid_idx']+dyn_names],
-    on=['year_month','grid_idx'], how='left'
-)
-full_df[dyn_names] = full_df[dyn_names].fillna(0)
+# 9~10) 전체 시공간 panel = (year_month, grid_idx) 순서로 식별자·dynamic 을 이어 붙인다 (merge 없음)
+full_df = pd.concat([
+    pd.DataFrame({'year_month': np.repeat(all_months, N)}),
+    space.iloc[np.tile(np.arange(N), T)].reset_index(drop=True),
+    pd.DataFrame(dyn.reshape(T*N, len(dyn_names)), columns=dyn_names),
+], axis=1)
+del dyn
 
-# 11) row/col
-full_df['row'] = full_df['grid_idx'] // W
-full_df['col'] = full_df['grid_idx'] % W
+# 11) row/col = 지리 래스터 위치 (8 에서 붙였다)
 
 # 12) time_idx (문자열 카테고리)
-full_df = full_df.sort_values(['year_month','grid_idx']).reset_index(drop=True)
+# (이미 year_month, grid_idx 순)
 full_df['time_idx'] = pd.factorize(full_df['year_month'])[0].astype(str)
 
 # 13) CSV로 저장
 full_df.to_csv('panel.csv', index=False, encoding='utf-8-sig')
-grid_meta[['grid_idx','격자100m','위도','경도']].to_csv(
+space_static.to_csv('panel_static.csv', index=False, encoding='utf-8-sig')
+space.to_csv(
     'grid_meta.csv', index=False, encoding='utf-8-sig'
 )
 
 print("✅ prepare_tft complete")
-print(f"panel.csv  shape = {full_df.shape}")
+print(f"panel.csv  shape = {full_df.shape}, panel_static.csv shape = {space_static.shape}")
 print(f"grid_meta.csv shape = {grid_meta.shape}")
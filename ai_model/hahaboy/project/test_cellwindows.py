@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from cellwindows import RunningStats, frame_stats, sample_batch, windows_for_months
+
+
+class SampleTests(unittest.TestCase):
+    def test_sample_batch_matches_windows(self):
+        base = np.random.default_rng(0).random((8, 5, 3)).astype(np.float32)
+        base[..., 2] = base[..., 2] > 0.5
+        K, target = 3, 2
+        windows = np.array([0, 4, 2])
+        cells = np.array([1, 4, 0])
+        x, y = sample_batch(base, K, target, windows, cells)
+        for j, (w, c) in enumerate(zip(windows, cells)):
+            np.testing.assert_array_equal(x[j], base[w:w + K, c])
+            self.assertEqual(y[j], float(base[w + K, c, target] > 0))
+
+    def test_windows_for_months(self):
+        meta = {'K': 2, 'months': [f'2020-{m:02d}' for m in range(1, 13)]}
+        # 윈도우 w 의 목표 달은 months[w + 2]
+        np.testing.assert_array_equal(windows_for_months(meta, range(10), [6, 7]), [3, 4])
+
+
+class RunningStatsTests(unittest.TestCase):
+    def test_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        blocks = [rng.normal(3, 2, (n, 4)) for n in (5, 1, 17)]
+        weights = [1, 3, 2]
+        stats = RunningStats(4)
+        for block, weight in zip(blocks, weights):
+            stats.update(block, weight)
+        stats.update(np.empty((0, 4)))
+        rows = np.concatenate([np.repeat(b, w, axis=0) for b, w in zip(blocks, weights)])
+        np.testing.assert_allclose(stats.mean, rows.mean(axis=0))
+        np.testing.assert_allclose(stats.var, rows.var(axis=0))
+
+    def test_constant_feature_scale(self):
+        stats = RunningStats(2)
+        stats.update(np.array([[1.0, 5.0], [3.0, 5.0]]))
+        np.testing.assert_allclose(stats.scale, [1.0, 1.0])
+
+    def test_frame_stats_matches_stacked_windows(self):
+        base = np.random.default_rng(1).random((7, 4, 3))
+        K, windows = 3, np.array([0, 2, 3])
+        rows = np.concatenate([base[w:w + K].reshape(-1, 3) for w in windows])
+        stats = frame_stats(base, K, windows)
+        np.testing.assert_allclose(stats.mean, rows.mean(axis=0))
+        np.testing.assert_allclose(stats.var, rows.var(axis=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
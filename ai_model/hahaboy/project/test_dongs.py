@@ -0,0 +1,31 @@
+import inspect
+import os
+import unittest
+
+import dongs
+
+BACKEND_DONGS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', '..', 'backend', 'd3', 'dongs.py')
+
+
+class PinnedCopyTests(unittest.TestCase):
+    def test_matches_backend_source(self):
+        # 백엔드 파일은 import 하지 않고 (Django 앱 경로 없이) 소스만 비교한다
+        with open(BACKEND_DONGS, encoding='utf-8') as f:
+            backend = f.read()
+        for obj in (dongs._ring_contains, dongs._bounds, dongs.DongLocator):
+            with self.subTest(name=obj.__name__):
+                self.assertIn(inspect.getsource(obj), backend)
+
+    def test_locate(self):
+        square = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+        hole = [[1, 1], [2, 1], [2, 2], [1, 2], [1, 1]]
+        locator = dongs.DongLocator([{'properties': {'EMD_KOR_NM': '갑동'},
+                                      'geometry': {'type': 'Polygon', 'coordinates': [square, hole]}}])
+        self.assertEqual(locator.names, ['갑동'])
+        self.assertEqual(locator.codes, ['0'])
+        self.assertEqual([locator.locate(3, 3), locator.locate(1.5, 1.5), locator.locate(5, 1)], [0, None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
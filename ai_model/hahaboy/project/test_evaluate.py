@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from evaluate import best_threshold, dong_labels, grouped_metrics, pr_curve
+
+
+def brute_force(y_true, score, threshold):
+    t, p = y_true > 0, score >= threshold
+    tp, fp, fn = (t & p).sum(), (~t & p).sum(), (t & ~p).sum()
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    return precision, recall, f1
+
+
+class PrCurveTests(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        y_true = rng.random(300) < 0.2
+        score = np.round(rng.random(300), 2)   # 같은 점수가 여러 개
+        thresholds, precision, recall, f1 = pr_curve(y_true, score)
+        np.testing.assert_array_equal(thresholds, np.unique(score)[::-1])
+        for i in (0, 7, len(thresholds) // 2, len(thresholds) - 1):
+            np.testing.assert_allclose((precision[i], recall[i], f1[i]),
+                                       brute_force(y_true, score, thresholds[i]))
+
+    def test_no_positives(self):
+        _, precision, recall, f1 = pr_curve(np.zeros(4), [0.1, 0.2, 0.2, 0.9])
+        self.assertTrue((precision == 0).all() and (recall == 0).all() and (f1 == 0).all())
+
+
+class BestThresholdTests(unittest.TestCase):
+    def test_matches_linspace_loop(self):
+        # 예전 train_eval_transformer 의 0.1–0.9 81 점 루프 (같은 F1 이면 앞 임계값)
+        rng = np.random.default_rng(2)
+        for trial in range(5):
+            y_true = rng.random(500) < 0.15
+            score = np.clip(y_true * 0.3 + rng.random(500) * 0.7, 0, 1).astype(np.float32)
+            expected = 0.5, 0.0
+            for thr in np.linspace(0.1, 0.9, 81):
+                f1 = brute_force(y_true, score, thr)[2]
+                if f1 > expected[1]:
+                    expected = thr, f1
+            with self.subTest(trial=trial):
+                thr, f1 = best_threshold(y_true, score)
+                self.assertEqual(thr, expected[0])
+                self.assertAlmostEqual(f1, expected[1])
+
+    def test_no_useful_threshold(self):
+        self.assertEqual(best_threshold(np.zeros(3), [0.2, 0.5, 0.95]), (0.5, 0.0))
+        self.assertEqual(best_threshold([1, 0], [0.05, 0.01]), (0.5, 0.0))
+
+
+class GroupedMetricsTests(unittest.TestCase):
+    def test_matches_per_group(self):
+        rng = np.random.default_rng(1)
+        group = rng.choice(['a', 'b', 'c'], 200)
+        y_true, y_pred = rng.random(200) * 3, rng.random(200) * 3
+        cls_true, cls_pred = rng.random(200) < 0.3, rng.random(200) < 0.4
+        table = grouped_metrics({'g': group}, y_true=y_true, y_pred=y_pred, cls_true=cls_true, cls_pred=cls_pred)
+        self.assertEqual(table['g'].tolist(), ['a', 'b', 'c'])
+        for row in table.itertuples():
+            m = group == row.g
+            err = y_pred[m] - y_true[m]
+            sst = ((y_true[m] - y_true[m].mean()) ** 2).sum()
+            precision, recall, f1 = brute_force(cls_true[m], cls_pred[m].astype(float), 0.5)
+            np.testing.assert_allclose(
+                (row.n, row.MSE, row.MAE, row.R2, row.Acc, row.Prec, row.Rec, row.F1),
+                (m.sum(), (err ** 2).mean(), np.abs(err).mean(), 1 - (err ** 2).sum() / sst,
+                 (cls_true[m] == cls_pred[m]).mean(), precision, recall, f1))
+
+    def test_overall_and_constant_target(self):
+        table = grouped_metrics({}, y_true=[2, 2, 2], y_pred=[2, 2, 2])
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.loc[0, 'R2'], 1.0)
+        self.assertEqual(grouped_metrics({}, y_true=[2, 2], y_pred=[1, 2]).loc[0, 'R2'], 0.0)
+        self.assertEqual(list(grouped_metrics({}, cls_true=[1], cls_pred=[1]).columns),
+                         ['n', 'Acc', 'Prec', 'Rec', 'F1'])
+
+
+class DongLabelTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        square = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+        hole = [[1, 1], [2, 1], [2, 2], [1, 2], [1, 1]]
+        features = [
+            {'properties': {'name': '갑동'}, 'geometry': {'type': 'Polygon', 'coordinates': [square, hole]}},
+            {'properties': {'name': '을동'}, 'geometry': {'type': 'MultiPolygon', 'coordinates': [
+                [[[10, 0], [11, 0], [11, 1], [10, 0]]], [[[1.2, 1.2], [1.8, 1.2], [1.8, 1.8], [1.2, 1.2]]]]}},
+        ]
+        self.path = os.path.join(self.tmp, 'dong.geojson')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': features}, f)
+
+    def test_polygons_holes_and_misses(self):
+        lon = np.array([3.0, 1.5, 1.7, 10.8, 20.0])
+        lat = np.array([3.0, 1.1, 1.3, 0.5, 20.0])
+        labels = dong_labels(pd.Series(lon), pd.Series(lat), self.path)
+        self.assertEqual(labels.tolist(), ['갑동', '', '을동', '을동', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from export import export_predictions, prediction_table, write_month_csvs
+
+GRID = pd.DataFrame({
+    'grid_idx': [0, 1, 2],
+    '격자100m': ['다마847996', '다마848992', '다마848996'],
+    '위도': [36.19386884, 36.19026416, 36.19386000],
+    '경도': [127.3303794, 127.3314994, 127.3315000],
+})
+MONTHS = ['2020-06', '2020-07']
+
+
+class ExportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.actual = np.array([[0, 1, 0], [1, 0, 0]])
+        self.score = np.array([[0.2, 0.9, 0.6], [0.7, 0.1, 0.4]], np.float32)
+
+    def test_frontend_csv_and_parquet(self):
+        paths = export_predictions('m', MONTHS, GRID, self.actual, self.score >= 0.5, score=self.score,
+                                   extra={'pred_reg': self.score * 3}, out_dir=self.tmp)
+        self.assertEqual(paths['2020-07'], os.path.join(self.tmp, 'm', '2020', 'ssookssook_07.csv'))
+
+        with open(paths['2020-06'], 'rb') as f:
+            self.assertTrue(f.read(3) == b'\xef\xbb\xbf')   # frontend 파일과 같은 utf-8-sig
+        july = pd.read_csv(paths['2020-07'], encoding='utf-8-sig')
+        self.assertEqual(july.columns.tolist(), ['격자순번', '격자100m', '위도', '경도', '실제값', '예측값', '시계열예측값'])
+        self.assertEqual(july['격자순번'].tolist(), [1, 2, 3])
+        self.assertEqual(july['실제값'].tolist(), [1, 0, 0])
+        self.assertEqual(july['예측값'].tolist(), [1, 0, 0])
+        np.testing.assert_allclose(july['시계열예측값'], self.score[1], rtol=1e-6)
+
+        table = pd.read_parquet(os.path.join(self.tmp, 'm.parquet'))
+        self.assertEqual(len(table), 6)
+        self.assertEqual(table['year_month'].astype(str).tolist(), ['2020-06'] * 3 + ['2020-07'] * 3)
+        self.assertEqual(table['cell_id'].iloc[0], 984717996)   # backend cell_id_from_key
+        np.testing.assert_allclose(table['pred_reg'], (self.score * 3).ravel(), rtol=1e-6)
+
+        # Parquet 에서 달만 골라 다시 쓴 CSV 도 같다
+        again = write_month_csvs(table, os.path.join(self.tmp, 'again'), ['2020-07'])
+        pd.testing.assert_frame_equal(pd.read_csv(again['2020-07'], encoding='utf-8-sig'), july)
+        with self.assertRaises(KeyError):
+            write_month_csvs(table, self.tmp, ['2021-01'])
+
+    def test_cells_join_by_grid_idx(self):
+        grid = GRID.iloc[::-1].reset_index(drop=True)   # grid_meta 행 순서와 무관
+        table = prediction_table(MONTHS, grid, self.actual[:, :2], self.actual[:, :2], cells=[2, 0])
+        self.assertEqual(table['격자100m'].astype(str).tolist(), ['다마848996', '다마847996'] * 2)
+        self.assertEqual(table['격자순번'].tolist(), [3, 1] * 2)
+        self.assertTrue(table['score'].isna().all())
+
+    def test_bad_shapes(self):
+        with self.assertRaises(ValueError):
+            prediction_table(['2020-06'], GRID, self.actual, self.actual)
+        with self.assertRaises(ValueError):
+            prediction_table(MONTHS, GRID, self.actual, self.actual, cells=[0, 1, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
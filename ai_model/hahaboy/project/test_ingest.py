@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from ingest import ID_COLS, dynamic_tensor, load_workbook
+
+KEYS = ['다마847996', '다마848992', '다마848996']
+
+
+def make_dynamic(dtype):
+    """격자 3개, 피처 2개 × 2달의 wide 동적 DataFrame (모든 피처 컬럼이 같은 dtype)."""
+    ids = pd.DataFrame({'격자100m': KEYS, '위도': [36.19, 36.18, 36.17], '경도': [127.33, 127.34, 127.35]})
+    values = np.arange(12).reshape(3, 4).astype(dtype)
+    columns = ['민원수_20_01', '민원수_20_02', '평균기온_20_01', '평균기온_20_02']
+    return pd.concat([ids, pd.DataFrame(values, columns=columns)], axis=1)
+
+
+def melt_pivot(dyn_df, grid_keys, features):
+    """예전 prepare 스크립트의 melt → 월/피처 파싱 → pivot 경로 (비교 기준)."""
+    long = dyn_df.melt(id_vars=ID_COLS, var_name='column', value_name='value')
+    parts = long['column'].str.extract(r'^(.+)_(\d{2})_(\d{2})$')
+    long['feature'] = parts[0]
+    long['month'] = '20' + parts[1] + '-' + parts[2]
+    long = long.merge(grid_keys[ID_COLS].reset_index(), on=ID_COLS)
+    table = long.pivot_table(index=['month', 'index'], columns='feature', values='value', aggfunc='first')
+    months = sorted(long['month'].unique())
+    tensor = np.zeros((len(months), len(grid_keys), len(features)), np.float32)
+    for (month, row), values in table[features].iterrows():
+        tensor[months.index(month), row] = np.nan_to_num(values.to_numpy(np.float32))
+    return months, tensor
+
+
+class DynamicTensorTests(unittest.TestCase):
+    def test_matches_melt_pivot(self):
+        dyn = make_dynamic(np.float32)
+        dyn.loc[1, '평균기온_20_02'] = np.nan
+        grid = dyn[ID_COLS].iloc[[2, 0, 1]].reset_index(drop=True)
+        months, features, tensor = dynamic_tensor(dyn, grid)
+        ref_months, ref = melt_pivot(dyn, grid, features)
+        self.assertEqual(months, ref_months)
+        self.assertEqual(features, ['민원수', '평균기온'])
+        np.testing.assert_array_equal(tensor, ref)
+        self.assertEqual(tensor[1, 2, 1], 0)   # NaN → 0
+
+    def test_single_dtype_columns(self):
+        # 피처 컬럼이 모두 int32 / float32 면 to_numpy 가 읽기 전용 뷰를 줄 수 있다 (copy-on-write)
+        for dtype in (np.int32, np.float32):
+            with self.subTest(dtype=dtype.__name__):
+                dyn = make_dynamic(dtype)
+                months, _, tensor = dynamic_tensor(dyn, dyn[ID_COLS])
+                self.assertEqual(months, ['2020-01', '2020-02'])
+                np.testing.assert_array_equal(tensor[:, 0], [[0, 2], [1, 3]])
+
+    def test_size_padding_and_unknown_rows(self):
+        dyn = make_dynamic(np.float32)
+        grid = dyn[ID_COLS].iloc[:2]
+        _, _, tensor = dynamic_tensor(dyn, grid, features=['평균기온'], size=4)
+        self.assertEqual(tensor.shape, (2, 4, 1))
+        np.testing.assert_array_equal(tensor[0, :, 0], [2, 6, 0, 0])
+
+
+class WorkbookCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'data2.xlsx')
+        make_dynamic(np.int64).to_excel(self.path, index=False)
+
+    def test_cache_reused_and_refreshed(self):
+        read_excel = mock.Mock(wraps=pd.read_excel)
+        with mock.patch.object(ingest.pd, 'read_excel', read_excel):
+            first = load_workbook(self.path)
+            second = load_workbook(self.path)
+            self.assertEqual(read_excel.call_count, 1)
+            pd.testing.assert_frame_equal(first, second)
+            self.assertEqual(first['민원수_20_01'].dtype, np.int32)
+            self.assertEqual(first['격자100m'].tolist(), KEYS)
+
+            make_dynamic(np.int64).iloc[:2].to_excel(self.path, index=False)
+            self.assertEqual(len(load_workbook(self.path)), 2)
+            self.assertEqual(read_excel.call_count, 2)
+        # 같은 워크북의 이전 캐시는 지워진다
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp, ingest.CACHE_DIR))), 1)
+
+    def test_column_projection(self):
+        df = load_workbook(self.path, columns=['민원수_20_01'], where=lambda c: c.startswith('평균기온'))
+        self.assertEqual(df.columns.tolist(), ID_COLS + ['민원수_20_01', '평균기온_20_01', '평균기온_20_02'])
+        with self.assertRaises(KeyError):
+            load_workbook(self.path, columns=['없는컬럼'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import re
+import unittest
+
+import numpy as np
+
+import layout
+from layout import GridLayout, cell_ids, grid_position
+
+BACKEND_GRID = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', '..', '..', 'backend', 'd3', 'grid.py')
+
+
+class GridPositionTests(unittest.TestCase):
+    def test_backend_cell_id(self):
+        # backend d3.grid.cell_id_from_key 와 같은 값
+        np.testing.assert_array_equal(cell_ids(['다마847996', '가가000000']), [984717996, 700013000])
+
+    def test_constants_match_backend(self):
+        # backend d3/grid.py 는 미터 단위 원점, 여기는 100m 인덱스
+        with open(BACKEND_GRID, encoding='utf-8') as f:
+            backend = dict(re.findall(r'^([A-Z_]+) = (\S+)', f.read(), re.M))
+        self.assertEqual(int(backend['CELL_ID_STRIDE']), layout.CELL_ID_STRIDE)
+        self.assertEqual(backend['ZONE_LETTERS'], repr(layout.ZONE_LETTERS))
+        cell = int(backend['CELL_SIZE'])
+        self.assertEqual(int(backend['EASTING_ORIGIN']), layout.EASTING_ORIGIN * cell)
+        self.assertEqual(int(backend['NORTHING_ORIGIN']), layout.NORTHING_ORIGIN * cell)
+        self.assertEqual(int(backend['ZONE_SIZE']), layout.CELLS_PER_ZONE * cell)
+
+    def test_invalid_key(self):
+        for key in ('다마84799', '하마847996', 'xx847996'):
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                grid_position([key])
+
+
+class GridLayoutTests(unittest.TestCase):
+    def setUp(self):
+        # (동서, 남북) = (847, 996), (848, 996), (848, 994) — 2칸 남쪽에 하나
+        self.layout = GridLayout(['다마847996', '다마848996', '다마848994'])
+
+    def test_north_up_bounding_raster(self):
+        layout = self.layout
+        self.assertEqual((layout.H, layout.W), (3, 2))
+        np.testing.assert_array_equal(layout.y, [0, 0, 2])
+        np.testing.assert_array_equal(layout.x, [0, 1, 1])
+        np.testing.assert_array_equal(layout.mask, [[True, True], [False, False], [False, True]])
+
+    def test_scatter_gather_round_trip(self):
+        values = np.arange(2 * 3 * 2, dtype=np.float32).reshape(2, 3, 2) + 1   # (T, N, F)
+        frames = self.layout.scatter(values)
+        self.assertEqual(frames.shape, (2, 3, 2, 2))
+        self.assertTrue((frames[:, ~self.layout.mask] == 0).all())
+        np.testing.assert_array_equal(self.layout.gather(frames[..., 1]), values[..., 1])
+
+    def test_duplicate_cells(self):
+        with self.assertRaises(ValueError):
+            GridLayout(['다마847996', '다마847996'])
+
+
+if __name__ == '__main__':
+    unittest.main()
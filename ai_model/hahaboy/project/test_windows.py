@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from windows import (
+    balanced_indices, open_base, open_static, patch_origin, predict_tiled, save_base,
+    target_frames, tile_origins, tile_windows, window_batch, window_count, window_patch
+)
+
+
+def make_base(T=6, H=5, W=7, D=3, seed=0):
+    return np.random.default_rng(seed).random((T, H, W, D)).astype(np.float32)
+
+
+class BaseFileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_windows_match_stacked_arrays(self):
+        data, K = make_base(), 3
+        paths = {name: os.path.join(self.tmp, name) for name in ('base.npy', 'meta.json', 'static.npy')}
+        save_base(data, {'K': K}, np.ones((5, 7, 2)), paths['base.npy'], paths['meta.json'], paths['static.npy'])
+        base, meta = open_base(paths['base.npy'], paths['meta.json'])
+        self.assertIsInstance(base, np.memmap)
+        self.assertEqual(meta, {'K': K})
+        self.assertEqual(open_static(paths['static.npy']).shape, (5, 7, 2))
+
+        # 예전 prepare_convLSTM 의 X / Y 윈도우
+        X = np.stack([data[i:i + K, ..., :-1] for i in range(len(data) - K)])
+        Y = np.stack([data[i + K, ..., -1:] for i in range(len(data) - K)])
+        self.assertEqual(window_count(base, K), len(X))
+        x, y = window_batch(base, K, [2, 0])
+        np.testing.assert_array_equal(x, X[[2, 0]])
+        np.testing.assert_array_equal(y, Y[[2, 0]])
+        np.testing.assert_array_equal(target_frames(base, K, [1]), Y[[1], ..., 0])
+
+        x, y = window_patch(base, K, 1, 2, 3, (2, 4))
+        np.testing.assert_array_equal(x, X[1, :, 2:4, 3:7])
+        np.testing.assert_array_equal(y, Y[1, 2:4, 3:7])
+
+
+class SamplerTests(unittest.TestCase):
+    def test_balanced_indices(self):
+        indices = np.arange(10)
+        positive = indices < 2
+        sampler = balanced_indices(indices, positive, replicate_times=4, seed=0)
+        draws = np.array([next(sampler) for _ in range(20000)])
+        self.assertTrue(np.isin(draws, indices).all())
+        # 양성 2개 × 5 : 음성 8개 × 1
+        self.assertAlmostEqual(np.isin(draws, [0, 1]).mean(), 10 / 18, delta=0.02)
+
+
+class PatchTests(unittest.TestCase):
+    def test_tile_origins_cover(self):
+        for length, size, overlap in ((10, 4, 1), (8, 4, 0), (3, 4, 1), (33, 32, 8)):
+            with self.subTest(length=length, size=size):
+                covered = np.zeros(length, bool)
+                for o in tile_origins(length, size, overlap):
+                    self.assertLessEqual(o + min(size, length), length)
+                    covered[o:o + size] = True
+                self.assertTrue(covered.all())
+
+    def test_patch_origin(self):
+        rng = np.random.default_rng(0)
+        mask = np.zeros((10, 12), bool)
+        mask[6:, 8:] = True
+        target = np.zeros((10, 12))
+        target[8, 9] = 1
+        for _ in range(50):
+            y0, x0 = patch_origin(target, mask, (4, 4), rng, positive_bias=1.0)
+            self.assertTrue(y0 <= 8 < y0 + 4 and x0 <= 9 < x0 + 4)
+            y0, x0 = patch_origin(target, mask, (4, 4), rng, positive_bias=0.0, tries=100)
+            self.assertTrue(0 <= y0 <= 6 and 0 <= x0 <= 8)
+            self.assertTrue(mask[y0:y0 + 4, x0:x0 + 4].any())
+        # 패치가 래스터보다 크면 전체
+        self.assertEqual(patch_origin(target, mask, (32, 32), rng), (0, 0))
+
+    def test_tile_windows(self):
+        mask = np.zeros((10, 12), bool)
+        mask[6:, 8:] = True
+        tiles = tile_windows([3, 5], mask, (4, 4), overlap=1)
+        # 타일 원점 y ∈ {0, 3, 6}, x ∈ {0, 3, 6, 8} 중 격자(6–9행, 8–11열)가 걸치는 것만
+        origins = [[3, 6], [3, 8], [6, 6], [6, 8]]
+        np.testing.assert_array_equal(tiles, [[i] + o for i in (3, 5) for o in origins])
+        self.assertEqual(tile_windows([], mask, (4, 4), 1).shape, (0, 3))
+
+    def test_predict_tiled_matches_full_frame(self):
+        # 픽셀마다 독립인 모델이면 타일로 나눠도 전체 예측과 같아야 한다
+        x = make_base(T=2 * 3, H=9, W=11, D=3).reshape(2, 3, 9, 11, 3)
+        static = make_base(T=1, H=9, W=11, D=2)[0]
+
+        def predict(x_tile, static_tile):
+            s = x_tile.sum(axis=(1, 4))[..., None] + static_tile[None, ..., :1]
+            return [s, s * 2]
+
+        reg, cls = predict_tiled(predict, x, static, (4, 5), overlap=1)
+        full = predict(x, static)
+        np.testing.assert_allclose(reg, full[0], rtol=1e-5)
+        np.testing.assert_allclose(cls, full[1], rtol=1e-5)
+
+    def test_predict_tiled_skips_empty_tiles(self):
+        x = make_base(T=2 * 3, H=10, W=12, D=3).reshape(2, 3, 10, 12, 3)
+        static = make_base(T=1, H=10, W=12, D=2)[0]
+        mask = np.zeros((10, 12), bool)
+        mask[6:, 8:] = True
+        calls = []
+
+        def predict(x_tile, static_tile):
+            calls.append(x_tile.shape)
+            s = x_tile.sum(axis=(1, 4))[..., None] + static_tile[None, ..., :1]
+            return [s]
+
+        reg, = predict_tiled(predict, x, static, (4, 4), overlap=1, mask=mask)
+        # test_tile_windows 와 같은 4 타일만 돈다 (전체 3 × 4 = 12)
+        self.assertEqual(len(calls), 4)
+        full, = predict(x, static)
+        np.testing.assert_allclose(reg[:, mask], full[:, mask], rtol=1e-5)
+        self.assertTrue((reg[:, :3] == 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
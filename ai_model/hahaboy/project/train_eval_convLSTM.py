@@ -1,15 +1,18 @@
+import argparse
 import numpy as np
 import pandas as pd
 import time
 import tensorflow as tf
 
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, ConvLSTM2D, BatchNormalization, Conv2D
+from tensorflow.keras.layers import Input, ConvLSTM2D, BatchNormalization, Conv2D, Normalization, Multiply, Add
 from tensorflow.keras.optimizers import Adam
 
-from sklearn.metrics import (
-    mean_squared_error, mean_absolute_error, r2_score,
-    accuracy_score, precision_score, recall_score
+from evaluate import dong_labels, grouped_metrics
+from export import export_predictions
+from windows import (
+    balanced_indices, open_base, open_static, patch_origin, predict_tiled,
+    target_frames, tile_windows, window_batch, window_count, window_patch
 )
 
 def focal_binary_loss(gamma=2.0, alpha=0.25):
@@ -19,54 +22,118 @@ def focal_binary_loss(gamma=2.0, alpha=0.25):
         p_t = y_true * y_pred + (1-y_true)*(1-y_pred)
         modulating = tf.pow(1 - p_t, gamma)
         alpha_factor = y_true * alpha + (1-y_true)*(1-alpha)
-        return tf.reduce_mean(alpha_factor * modulating * cross_entropy)
+        # 픽셀별 손실 (채널 평균) — 배치 평균은 Keras 가 sample_weight(격자 마스크)를 곱해 낸다
+        return tf.reduce_mean(alpha_factor * modulating * cross_entropy, axis=-1)
     return loss_fn
 
+def window_dataset(base, static, mask, K, indices, batch_size, patch=None, positive_bias=0.5):
+    """윈도우 번호 (리스트 또는 끝없는 샘플러) → ({'input_seq', 'input_static'}, {'reg', 'cls'}, 격자 마스크 가중치)
+    배치의 tf.data 파이프라인. 윈도우는 병렬 map 에서 memmap 을 잘라 만들고, prefetch 로 학습과 겹친다.
+    patch=(ph, pw) 이면 윈도우마다 타일 하나만 자른다 (positive_bias 확률로 민원이 있는 곳).
+    indices 가 (n, 3) 배열이면 고정 타일 (윈도우, y0, x0) 목록이다 (tile_windows — 검증용).
+    가중치는 격자 없는 칸 0, 래스터 전체 평균이 1 이 되도록 맞춘다."""
+    H, W, D = base.shape[1], base.shape[2], base.shape[3]
+    ph, pw = (H, W) if patch is None else (min(patch[0], H), min(patch[1], W))
+    weight = (mask / mask.mean()).astype('float32')
+    rng = np.random.default_rng()
+
+    fixed = isinstance(indices, np.ndarray) and indices.ndim == 2
+
+    def load_window(item):
+        if fixed:
+            i, y0, x0 = (int(v) for v in item)
+        elif patch is None:
+            i, y0, x0 = int(item), 0, 0
+        else:
+            i = int(item)
+            y0, x0 = patch_origin(base[i+K, ..., -1], mask, (ph, pw), rng, positive_bias)
+        x, y = window_patch(base, K, i, y0, x0, (ph, pw))
+        ys, xs = slice(y0, y0+ph), slice(x0, x0+pw)
+        return np.ascontiguousarray(x), np.ascontiguousarray(y), static[ys, xs], weight[ys, xs]
+
+    def load(i):
+        x, y, s, w = tf.numpy_function(
+            load_window, [i], (tf.float32,)*4, stateful=patch is not None and not fixed)
+        x = tf.ensure_shape(x, (K, ph, pw, D-1))
+        y = tf.ensure_shape(y, (ph, pw, 1))
+        s = tf.ensure_shape(s, (ph, pw, static.shape[-1]))
+        w = tf.ensure_shape(w, (ph, pw))
+        return ({'input_seq': x, 'input_static': s},
+                {'reg': y, 'cls': tf.cast(y > 0, tf.float32)},
+                {'reg': w, 'cls': w})
+
+    if isinstance(indices, (list, np.ndarray)):
+        ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, np.int64))
+    else:
+        ds = tf.data.Dataset.from_generator(lambda: indices, output_signature=tf.TensorSpec((), tf.int64))
+    return (ds.map(load, num_parallel_calls=tf.data.AUTOTUNE)
+              .batch(batch_size)
+              .prefetch(tf.data.AUTOTUNE))
+
 if __name__ == '__main__':
-    # 1) Load preprocessed tensors
-    data = np.load('convLSTM_data.npz')
-    X, Y_reg = data['X'], data['Y']
-    Y_cls   = (Y_reg > 0).astype('float32')
-    print(f"Loaded X{X.shape}, Y_reg{Y_reg.shape}")
-
-    # 2) Split train / eval
-    N = X.shape[0]
-    X_train,  X_eval   = X[:N-12], X[N-12:]
-    Y_reg_tr, Y_reg_ev = Y_reg[:N-12], Y_reg[N-12:]
-    Y_cls_tr, Y_cls_ev = Y_cls[:N-12], Y_cls[N-12:]
-    print(f"Train samples={X_train.shape[0]}, Eval samples={X_eval.shape[0]}")
-
-    # 3) Random minority oversampling
-    pos_idx = [i for i in range(len(X_train)) if Y_cls_tr[i].sum() > 0]
+    # 0) 실행 인자 — 패치/배치 크기 (--full-frame 이면 타일 없이 전체 격자로 학습)
+    parser = argparse.ArgumentParser(description='ConvLSTM 학습·평가')
+    parser.add_argument('--patch', type=int, nargs=2, default=[32, 32], metavar=('H', 'W'),
+                        help='학습 타일 크기 (기본 32 32)')
+    parser.add_argument('--full-frame', action='store_true', help='타일 없이 전체 격자로 학습')
+    parser.add_argument('--batch-size', type=int, help='배치 크기 (기본: 타일 32, 전체 격자 4)')
+    args = parser.parse_args()
+
+    # 1) Open base tensor (memmap; 윈도우는 배치마다 잘라 쓴다)
+    base, meta = open_base()
+    static = open_static()   # (H, W, S)
+    K = meta['K']
+    N = window_count(base, K)
+    # 지리 래스터에서 실제 격자 위치 (prepare 가 grid_meta.csv 에 row/col 로 저장)
+    unique = pd.read_csv('grid_meta.csv', encoding='utf-8-sig')
+    rows, cols = unique['row'].to_numpy(), unique['col'].to_numpy()
+    mask = np.zeros(base.shape[1:3], bool)
+    mask[rows, cols] = True
+    print(f"Opened base{base.shape}, K={K}, windows={N}, cells={mask.sum()}")
+
+    # 2) Split train / eval (윈도우 번호)
+    train_idx = np.arange(N-12)
+    eval_idx  = np.arange(N-12, N)
+    print(f"Train samples={len(train_idx)}, Eval samples={len(eval_idx)}")
+
+    # 3) Random minority oversampling (가중 번호 샘플러 — 양성 윈도우를 4배 자주 뽑는다, 데이터 복사 없음)
+    #    patch_size 가 있으면 윈도우마다 타일 하나로 학습한다 (스텝당 메모리가 도시 크기와 무관,
+    #    큰 배치). None 이면 전체 프레임.
+    patch_size = None if args.full_frame else tuple(args.patch)
+    batch_size = args.batch_size or (4 if patch_size is None else 32)
+    overlap = 0 if patch_size is None else patch_size[0] // 4
+    positive = (target_frames(base, K, train_idx) > 0).any(axis=(1, 2))
     replicate_times = 3
-    X_pos     = X_train[pos_idx]
-    Y_reg_pos = Y_reg_tr[pos_idx]
-    Y_cls_pos = Y_cls_tr[pos_idx]
-
-    X_rep     = np.concatenate([X_pos]*replicate_times,     axis=0)
-    Y_reg_rep = np.concatenate([Y_reg_pos]*replicate_times, axis=0)
-    Y_cls_rep = np.concatenate([Y_cls_pos]*replicate_times, axis=0)
-
-    X_train_bal     = np.concatenate([X_train,   X_rep],     axis=0)
-    Y_reg_train_bal = np.concatenate([Y_reg_tr, Y_reg_rep],  axis=0)
-    Y_cls_train_bal = np.concatenate([Y_cls_tr, Y_cls_rep],  axis=0)
+    epoch_size = len(train_idx) + replicate_times * int(positive.sum())
+    sampler  = balanced_indices(train_idx, positive, replicate_times)
+    train_ds = window_dataset(base, static, mask, K, sampler, batch_size, patch=patch_size)
+    # 검증은 매번 같은 타일 — 예측(predict_tiled)과 같은 타일 배치, 격자가 없는 타일은 뺀다
+    eval_items = eval_idx if patch_size is None else tile_windows(eval_idx, mask, patch_size, overlap)
+    eval_ds  = window_dataset(base, static, mask, K, eval_items, batch_size, patch=patch_size)
 
-    perm = np.random.permutation(len(X_train_bal))
-    X_train_bal     = X_train_bal[perm]
-    Y_reg_train_bal = Y_reg_train_bal[perm]
-    Y_cls_train_bal = Y_cls_train_bal[perm]
-
-    print(f"After oversampling → total train samples: {len(X_train_bal)}, positives: {len(pos_idx)*(1+replicate_times)}")
+    print(f"After oversampling → train samples per epoch: {epoch_size}, expected positives: {int(positive.sum())*(1+replicate_times)}"
+          f", patch={patch_size}, batch={batch_size}")
 
     # 4) Build model
-    inp = Input(shape=X_train.shape[1:], name='input_seq')
+    #    ConvLSTM 은 동적 채널만 보고, 정적 피처는 격자별 scale/shift (FiLM) 로 섞는다
+    #    완전 합성곱 — 공간 크기를 정하지 않아 타일로 학습하고 전체 격자로 예측할 수 있다
+    inp = Input(shape=(K, None, None, base.shape[3]-1), name='input_seq')
+    static_inp = Input(shape=(None, None, static.shape[-1]), name='input_static')
+    static_norm = Normalization(axis=-1, name='static_norm')
+    static_norm.adapt(static[mask])
+    s = static_norm(static_inp)
+    s = Conv2D(32, (1,1), activation='relu', padding='same')(s)
+    gamma = Conv2D(32, (1,1), padding='same', name='film_gamma')(s)
+    beta  = Conv2D(32, (1,1), padding='same', name='film_beta')(s)
+
     x = ConvLSTM2D(64, (3,3), padding='same', return_sequences=True)(inp)
     x = BatchNormalization()(x)
     x = ConvLSTM2D(32, (3,3), padding='same', return_sequences=False)(x)
     x = BatchNormalization()(x)
+    x = Add()([x, Multiply()([x, gamma]), beta])   # x * (1 + gamma) + beta
     reg_out = Conv2D(1, (1,1), activation='relu',    padding='same', name='reg')(x)
     cls_out = Conv2D(1, (1,1), activation='sigmoid', padding='same', name='cls')(x)
-    model = Model(inputs=inp, outputs=[reg_out, cls_out])
+    model = Model(inputs=[inp, static_inp], outputs=[reg_out, cls_out])
     opt = Adam(learning_rate=5e-5, clipnorm=1.0)
     model.compile(
         optimizer=opt,
@@ -79,55 +146,48 @@ if __name__ == '__main__':
     print("Training …")
     t0 = time.time()
     history = model.fit(
-        X_train_bal,
-        {'reg':Y_reg_train_bal, 'cls':Y_cls_train_bal},
-        validation_data=(X_eval, {'reg':Y_reg_ev, 'cls':Y_cls_ev}),
+        train_ds,
+        steps_per_epoch=-(-epoch_size // batch_size),
+        validation_data=eval_ds,
         epochs=20,
-        batch_size=4,
         verbose=1
     )
     print(f"Training completed in {time.time()-t0:.1f}s")
-
-    # 6) Predict
-    Y_pred_reg, Y_pred_cls = model.predict(X_eval)
-    Y_pred_reg = Y_pred_reg[...,0]
-    Y_pred_cls = Y_pred_cls[...,0]
-    Y_true_reg = Y_reg_ev[...,0]
-    Y_true_cls = Y_cls_ev[...,0].astype(int)
+    # 백엔드 온라인 추론용 (/api/predict/, d3.inference)
+    model.save('convLSTM_model.keras')
+    print("Saved → convLSTM_model.keras")
+
+    # 6) Predict — 전체 격자 (패치 학습이면 겹치는 타일로 나눠 예측하고 이어 붙인다, 격자가 없는 타일은 건너뜀)
+    #    래스터 → 실제 격자만 (12, cells)
+    def predict_tile(x_tile, static_tile):
+        s = np.broadcast_to(static_tile, (len(x_tile), *static_tile.shape))
+        return model.predict_on_batch({'input_seq': x_tile, 'input_static': s})
+
+    if patch_size is None:
+        Y_pred_reg, Y_pred_cls = model.predict(eval_ds)
+    else:
+        preds = [predict_tiled(predict_tile, window_batch(base, K, [i])[0], static, patch_size, overlap, mask)
+                 for i in eval_idx]
+        Y_pred_reg = np.concatenate([reg for reg, _ in preds])
+        Y_pred_cls = np.concatenate([cls for _, cls in preds])
+    Y_pred_reg = Y_pred_reg[...,0][:, rows, cols]
+    Y_pred_cls = Y_pred_cls[...,0][:, rows, cols]
+    Y_true_reg = target_frames(base, K, eval_idx)[:, rows, cols]
+    Y_true_cls = (Y_true_reg > 0).astype(int)
 
     # 7) Metrics
-    print("\n2020 Metrics per Month:")
-    for i in range(12):
-        yt_r, yp_r = Y_true_reg[i].ravel(), Y_pred_reg[i].ravel()
-        yt_c = Y_true_cls[i].ravel()
-        yp_c = (Y_pred_cls[i].ravel()>=0.5).astype(int)
-        print(f" Month {i+1:2d}: "
-              f"MSE={mean_squared_error(yt_r,yp_r):.4f}, "
-              f"MAE={mean_absolute_error(yt_r,yp_r):.4f}, "
-              f"R2={r2_score(yt_r,yp_r):.3f}  |  "
-              f"Acc={accuracy_score(yt_c,yp_c):.3f}, "
-              f"Prec={precision_score(yt_c,yp_c,zero_division=0):.3f}, "
-              f"Rec={recall_score(yt_c,yp_c,zero_division=0):.3f}")
-
-    # 8) Export per‐grid CSV for 2020
-    unique = pd.read_csv('grid_meta.csv', encoding='utf-8-sig')
-    months = [f"2020-{m:02d}" for m in range(1,13)]
-    H, W = Y_true_reg.shape[1], Y_true_reg.shape[2]
-
-    records = []
-    for mi, month in enumerate(months):
-        rec = pd.DataFrame({
-            'year_month': month,
-            'grid_idx':   np.arange(H*W),
-            'true_reg':   Y_true_reg[mi].ravel(),
-            'pred_reg':   Y_pred_reg[mi].ravel(),
-            'true_cls':   Y_true_cls[mi].ravel(),
-            'pred_cls':   (Y_pred_cls[mi].ravel()>=0.5).astype(int),
-            'score_cls':  Y_pred_cls[mi].ravel()
-        })
-        rec = rec.merge(unique, on='grid_idx', how='left')
-        records.append(rec)
-
-    out = pd.concat(records, ignore_index=True)
-    out.to_csv('multitask_predictions_2020.csv', index=False, encoding='utf-8-sig')
-    print("Saved → multitask_predictions_2020.csv")
+    #    (12, cells) 를 (월, 행정동) 라벨과 함께 펼쳐 groupby 한 번씩
+    months = [meta['months'][i + K] for i in eval_idx]
+    cell_month = np.repeat(months, len(rows))
+    cell_dong  = np.tile(dong_labels(unique['경도'], unique['위도']), len(eval_idx))
+    for title, key, labels in (("2020 Metrics per Month", 'month', cell_month),
+                               ("2020 Metrics per 행정동", 'dong', cell_dong)):
+        print(f"\n{title}:")
+        table = grouped_metrics({key: labels}, y_true=Y_true_reg, y_pred=Y_pred_reg,
+                                cls_true=Y_true_cls, cls_pred=Y_pred_cls >= 0.5)
+        print(table.to_string(index=False, float_format='%.4f'))
+
+    # 8) Export — 모든 달을 한 번에: predictions/convlstm.parquet + 월별 ssookssook_MM.csv (frontend 형식)
+    #    회귀 값은 Parquet 에만 (true_reg, pred_reg). DB 적재: python export.py predictions/convlstm.parquet --load
+    export_predictions('convlstm', months, unique, Y_true_cls, Y_pred_cls >= 0.5, score=Y_pred_cls,
+                       extra={'true_reg': Y_true_reg, 'pred_reg': Y_pred_reg})
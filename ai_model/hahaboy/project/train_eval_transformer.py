@@ -6,89 +6,108 @@ import torch.nn as nn
 import torch.optim as optim
 import pandas as pd
 
-from torch.utils.data import TensorDataset, DataLoader
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler, SequentialSampler
+from cellwindows import BASE_FILE, RunningStats, frame_stats, open_base, sample_batch, window_count, windows_for_months
+from evaluate import best_threshold, dong_labels, grouped_metrics
+from export import export_predictions
 
 class TransformerClassifier(nn.Module):
-    def __init__(self, feat_dim, seq_len, d_model=64, nhead=4, num_layers=2, dropout=0.1):
+    def __init__(self, feat_dim, seq_len, static_dim=0, d_model=64, nhead=4, num_layers=2, dropout=0.1):
         super().__init__()
         self.input_proj = nn.Linear(feat_dim, d_model)
+        # 격자 정적 피처 → 입력 임베딩의 scale/shift (FiLM). 시점마다 복제하지 않는다
+        self.film = nn.Linear(static_dim, 2 * d_model) if static_dim else None
         encoder_layer = nn.TransformerEncoderLayer(
             d_model=d_model, nhead=nhead, dropout=dropout, batch_first=True
         )
         self.transformer = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         self.classifier = nn.Linear(d_model, 1)
     
-    def forward(self, x):
-        # x: (batch, seq_len, feat_dim)
+    def forward(self, x, s=None):
+        # x: (batch, seq_len, feat_dim), s: (batch, static_dim)
         x = self.input_proj(x)                     # → (batch, seq_len, d_model)
+        if self.film is not None:
+            gamma, beta = self.film(s).unsqueeze(1).chunk(2, dim=-1)  # → (batch, 1, d_model) ×2
+            x = x * (1 + gamma) + beta
         x = self.transformer(x)                    # → (batch, seq_len, d_model)
         last = x[:, -1, :]                         # → (batch, d_model)
         out = torch.sigmoid(self.classifier(last)) # → (batch, 1)
         return out.view(-1)                        # → (batch,)
 
-def main():
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+class PackedInput(nn.Module):
+    """추론용 래퍼: (batch, seq_len, static_dim+feat_dim) 한 배열을 받는다 (/api/predict/ 입력 형식).
+    정적 피처는 마지막 시점의 앞 static_dim 칸에서 읽는다."""
+    def __init__(self, model, static_dim):
+        super().__init__()
+        self.model = model
+        self.static_dim = static_dim
 
-    # 1) NPZ 읽기
-    data = np.load("transformer_data.npz", allow_pickle=True)
-    X = data["X"]   # (windows, N, C, K)
-    Y = data["Y"]   # (windows, N)
-    H, W = int(data["H"]), int(data["W"])
+    def forward(self, x):
+        return self.model(x[..., self.static_dim:], x[:, -1, :self.static_dim])
+
+class CellWindowDataset(Dataset):
+    """(윈도우, 격자) 샘플 — 번호 j 는 windows[j // n_cells] 윈도우의 j % n_cells 격자.
+    __getitem__ 은 번호 목록(배치)을 받아 memmap 에서 한 번에 잘라 정규화한다.
+    DataLoader 워커에는 배열 대신 파일 경로가 넘어가고 워커마다 memmap 을 연다 (페이지 캐시 공유)."""
+    def __init__(self, path, K, target, windows, n_cells, mean, scale):
+        self.path, self.K, self.target, self.n_cells = path, K, target, n_cells
+        self.windows = np.asarray(windows)
+        self.mean = mean.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+        self._base = None
+
+    def __len__(self):
+        return len(self.windows) * self.n_cells
+
+    def __getstate__(self):
+        return {**self.__dict__, '_base': None}
+
+    def __getitem__(self, idx):
+        if self._base is None:
+            self._base = np.load(self.path, mmap_mode='r')
+        w, c = np.divmod(np.asarray(idx), self.n_cells)
+        x, y = sample_batch(self._base, self.K, self.target, self.windows[w], c)
+        x = (x - self.mean) / self.scale
+        return torch.from_numpy(x), torch.from_numpy(c), torch.from_numpy(y)
 
-    # 2) 차원 재배열 → (windows, N, K, C)
-    X = np.transpose(X, (0,1,3,2))
-    windows, N, seq_len, feat_dim = X.shape
+def main():
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-    # 3) flatten → (windows*N, seq_len, feat_dim), (windows*N,)
-    X_flat = X.reshape(windows*N, seq_len, feat_dim)
-    Y_flat = Y.reshape(windows*N)
+    # 1) 기본 텐서 열기 (memmap — 샘플은 배치마다 잘라 만든다)
+    base, S, meta = open_base()   # (T, N, D) 동적, (N, S) 격자별 정적 피처
+    K = meta['K']
+    windows = window_count(base, K)
+    N, feat_dim = base.shape[1], base.shape[2]
+    seq_len, static_dim = K, S.shape[1]
 
-    # 4) 학습/평가 분할 (마지막 12 윈도우는 2020년 예측용)
+    # 2~4) 학습/평가 분할 (마지막 12 윈도우는 2020년 예측용)
     num_eval_windows  = 12
     num_train_windows = windows - num_eval_windows
-    train_size = num_train_windows * N
-
-    # 5) “예측 월(month_of_pred)” 계산 (1월=1 … 12월=12)
-    #    첫 번째 Y_flat block(window 0) 은 time_idx=K (13번째 달) 예측 → month = (K mod 12)+1
-    K = 12
-    month_of_pred = ((np.arange(windows) + K) % 12) + 1  # length = windows
-
-    # 6) 6–10월만 선택하도록 마스크 생성
-    train_mask_windows = np.isin(month_of_pred[:num_train_windows], [6,7,8,9,10])
-    eval_mask_windows  = np.isin(month_of_pred[num_train_windows:], [6,7,8,9,10])
-    # → 길이 num_train_windows, num_eval_windows
 
-    # 7) flat 단위로 확장
-    train_mask = np.repeat(train_mask_windows, N)
-    eval_mask  = np.repeat(eval_mask_windows,  N)
+    # 5~7) 예측 월(윈도우 다음 달)이 6–10월인 윈도우 번호만 (샘플 = 윈도우 × 격자)
+    train_windows = windows_for_months(meta, range(num_train_windows), [6,7,8,9,10])
+    eval_windows  = windows_for_months(meta, range(num_train_windows, windows), [6,7,8,9,10])
 
-    X_train = X_flat[:train_size][train_mask]
-    Y_train = Y_flat[:train_size][train_mask]
-    X_eval  = X_flat[train_size:][eval_mask]
-    Y_eval  = Y_flat[train_size:][eval_mask]
+    print(f"Train samples={len(train_windows)*N}, Eval samples={len(eval_windows)*N}  (6–10월만)")
 
-    print(f"Train samples={len(Y_train)}, Eval samples={len(Y_eval)}  (6–10월만)")
+    # 8) 피처 스케일링: 학습 윈도우의 피처별 평균/분산을 한 번 훑어 구하고 배치마다 적용
+    stats = frame_stats(base, K, train_windows)
+    # 정적 피처는 격자 단위로 맞춘다 (학습 샘플 수가 격자마다 같아 샘플 단위로 맞춘 것과 같다)
+    static_stats = RunningStats(static_dim)
+    static_stats.update(S)
+    S_scaled = torch.from_numpy((S - static_stats.mean) / static_stats.scale).float().to(device)
 
-    # 8) 피처 스케일링
-    scaler = StandardScaler()
-    X_train_2d = X_train.reshape(-1, feat_dim)
-    scaler.fit(X_train_2d)
-    X_train = scaler.transform(X_train_2d).reshape(-1, seq_len, feat_dim)
-    X_eval  = scaler.transform(X_eval.reshape(-1, feat_dim)).reshape(-1, seq_len, feat_dim)
-
-    # 9) DataLoader
+    # 9) DataLoader — 배치 번호 목록을 통째로 넘겨 한 번에 잘라 온다 (batch_size=None + BatchSampler)
     batch_size = 256
-    train_ds = TensorDataset(torch.from_numpy(X_train).float(),
-                             torch.from_numpy(Y_train).float())
-    eval_ds  = TensorDataset(torch.from_numpy(X_eval).float(),
-                             torch.from_numpy(Y_eval).float())
-    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True,  num_workers=4)
-    eval_loader  = DataLoader(eval_ds,  batch_size=batch_size, shuffle=False, num_workers=4)
+    train_ds = CellWindowDataset(BASE_FILE, K, meta['target'], train_windows, N, stats.mean, stats.scale)
+    eval_ds  = CellWindowDataset(BASE_FILE, K, meta['target'], eval_windows,  N, stats.mean, stats.scale)
+    train_loader = DataLoader(train_ds, batch_size=None, num_workers=4,
+                              sampler=BatchSampler(RandomSampler(train_ds), batch_size, drop_last=False))
+    eval_loader  = DataLoader(eval_ds,  batch_size=None, num_workers=4,
+                              sampler=BatchSampler(SequentialSampler(eval_ds), batch_size, drop_last=False))
 
     # 10) 모델·손실·최적화
-    model = TransformerClassifier(feat_dim, seq_len).to(device)
+    model = TransformerClassifier(feat_dim, seq_len, static_dim).to(device)
     criterion = nn.BCELoss()
     optimizer = optim.Adam(model.parameters(), lr=1e-3)
 
@@ -97,9 +116,9 @@ def main():
     for epoch in range(1, epochs+1):
         model.train()
         total_loss = 0.0
-        for xb, yb in train_loader:
+        for xb, cb, yb in train_loader:
             xb, yb = xb.to(device), yb.to(device)
-            pred = model(xb)
+            pred = model(xb, S_scaled[cb.to(device)])
             loss = criterion(pred, yb)
             optimizer.zero_grad()
             loss.backward()
@@ -111,32 +130,45 @@ def main():
         model.eval()
         all_preds, all_trues = [], []
         with torch.no_grad():
-            for xb, yb in eval_loader:
+            for xb, cb, yb in eval_loader:
                 xb = xb.to(device)
-                out = model(xb).cpu().numpy()
+                out = model(xb, S_scaled[cb.to(device)]).cpu().numpy()
                 all_preds.append(out); all_trues.append(yb.numpy())
         all_preds = np.concatenate(all_preds)
         all_trues = np.concatenate(all_trues)
-        preds_bin = (all_preds >= 0.5).astype(int)
-
-        acc  = accuracy_score(all_trues, preds_bin)
-        prec = precision_score(all_trues, preds_bin, zero_division=0)
-        rec  = recall_score(all_trues, preds_bin, zero_division=0)
-        f1   = f1_score(all_trues, preds_bin, zero_division=0)
+        m = grouped_metrics({}, cls_true=all_trues, cls_pred=all_preds >= 0.5).iloc[0]
         print(f"Epoch {epoch}/{epochs}  TrainLoss={avg_loss:.4f}  "
-              f"Eval Acc={acc:.4f}  Prec={prec:.4f}  Rec={rec:.4f}  F1={f1:.4f}")
-
-    # 12) 임계값 튜닝
-    best_thr, best_f1 = 0.5, 0.0
-    for thr in np.linspace(0.1, 0.9, 81):
-        p = (all_preds >= thr).astype(int)
-        f1_ = f1_score(all_trues, p, zero_division=0)
-        if f1_ > best_f1:
-            best_f1, best_thr = f1_, thr
+              f"Eval Acc={m.Acc:.4f}  Prec={m.Prec:.4f}  Rec={m.Rec:.4f}  F1={m.F1:.4f}")
+
+    # 12) 임계값 튜닝 (0.1–0.9 의 81 점 중 F1 최대 — 정렬 한 번으로 모든 후보를 읽는다)
+    best_thr, best_f1 = best_threshold(all_trues, all_preds)
     print(f"\nOptimal threshold={best_thr:.2f}, F1={best_f1:.4f}")
 
-    # 13) 월별(6–10월) 지표 출력
-    # (필터링 했으므로 따로 월별 분리 없이 전체 성능만 보임)
+    # 13) 월별(6–10월)·행정동별 지표 (최적 임계값) — 평가 샘플 순서는 (윈도우, 격자)
+    grid = pd.read_csv('grid_meta.csv', encoding='utf-8-sig')
+    months = [meta['months'][w + K] for w in eval_windows]
+    sample_month = np.repeat(months, N)
+    sample_dong  = np.tile(dong_labels(grid['경도'], grid['위도']), len(eval_windows))
+    for key, labels in (('month', sample_month), ('dong', sample_dong)):
+        table = grouped_metrics({key: labels}, cls_true=all_trues, cls_pred=all_preds >= best_thr)
+        print(table.to_string(index=False, float_format='%.4f'))
+
+    # 14) Export — 평가 윈도우의 목표 달별 (윈도우, 격자) → predictions/transformer.parquet + ssookssook_MM.csv
+    export_predictions('transformer', months, grid, all_trues.reshape(-1, N),
+                       (all_preds >= best_thr).reshape(-1, N), score=all_preds.reshape(-1, N))
+
+    # 15) 백엔드 온라인 추론용 저장 (/api/predict/, d3.inference)
+    #     모델은 클래스 정의 없이 읽도록 TorchScript 로, 스케일러/입력 모양/임계값은 npz 로
+    #     입력은 [정적, 동적] 을 이어 붙인 (seq_len, static_dim+feat_dim) 한 배열 (PackedInput)
+    model = model.cpu().eval()
+    packed = PackedInput(model, static_dim).eval()
+    example = torch.zeros(1, seq_len, static_dim + feat_dim)
+    torch.jit.trace(packed, example).save("transformer_model.pt")
+    np.savez("transformer_model.npz",
+             mean=np.concatenate([static_stats.mean, stats.mean]),
+             scale=np.concatenate([static_stats.scale, stats.scale]),
+             seq_len=seq_len, feat_dim=static_dim + feat_dim, threshold=best_thr)
+    print("Saved → transformer_model.pt, transformer_model.npz")
 
 if __name__ == "__main__":
     main()
@@ -12,6 +12,9 @@ from pytorch_forecasting import (
 from pytorch_forecasting.data import GroupNormalizer
 from pytorch_forecasting.metrics import QuantileLoss
 
+from evaluate import grouped_metrics
+from export import export_predictions
+
 if __name__ == "__main__":
     # 1) 데이터 불러오기
     panel = pd.read_csv("panel.csv", encoding="utf-8-sig")
@@ -104,9 +107,25 @@ if __name__ == "__main__":
 
     # 10) 검증 예측 및 Baseline 비교
     actuals        = torch.cat([y[0] for x, y in val_loader], dim=0)
-    predictions    = tft.predict(val_loader)
+    prediction     = tft.predict(val_loader, return_index=True)
+    predictions    = prediction.output
     baseline_preds = Baseline().predict(val_loader)
 
+    # (series, 12) → 예측 구간 월별 회귀 지표 (groupby 한 번)
+    horizon_months = np.array(sorted(panel["year_month"].unique())[-max_prediction_length:])
+    month = np.tile(horizon_months, len(actuals))
     print("----- Baseline vs TFT MAE -----")
-    print(f"Baseline MAE: {((baseline_preds - actuals).abs()).mean().item():.4f}")
-    print(f"TFT      MAE: {((predictions    - actuals).abs()).mean().item():.4f}")
+    for name, preds in (("Baseline", baseline_preds), ("TFT", predictions)):
+        overall = grouped_metrics({}, y_true=actuals.cpu().numpy(), y_pred=preds.cpu().numpy()).iloc[0]
+        print(f"{name:<8} MAE: {overall.MAE:.4f}")
+        by_month = grouped_metrics({"month": month}, y_true=actuals.cpu().numpy(), y_pred=preds.cpu().numpy())
+        print(by_month.to_string(index=False, float_format="%.4f"))
+
+    # 11) Export — (series, 12) → (12, series) 그대로, 격자는 series 의 grid_idx 로 붙인다
+    #     실제값/예측값은 민원 발생 여부 (예측 민원수 0.5 이상), 시계열예측값은 예측 민원수
+    true_reg = actuals.cpu().numpy().T
+    pred_reg = predictions.cpu().numpy().T
+    export_predictions("tft", list(horizon_months), pd.read_csv("grid_meta.csv", encoding="utf-8-sig"),
+                       true_reg > 0, pred_reg >= 0.5, score=pred_reg,
+                       cells=prediction.index["grid_idx"].astype(int).to_numpy(),
+                       extra={"true_reg": true_reg, "pred_reg": pred_reg})
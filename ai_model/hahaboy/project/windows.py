@@ -0,0 +1,158 @@
+# windows.py
+#
+# convLSTM 학습 데이터 (prepare_convLSTM → train_eval_convLSTM)
+#
+# 예전에는 (T-K, K, H, W, C-1) 윈도우를 모두 만들어 convLSTM_data.npz 에 압축 저장했다.
+# 윈도우끼리 K-1 달이 겹치므로 같은 값이 K 번씩 저장되고, 학습 때는 그걸 통째로 메모리에
+# 올렸다. 이제 동적 기본 텐서 (T, H, W, D) 하나만 압축 없이 .npy 로 저장하고
+# np.load(mmap_mode='r') 로 연다. 윈도우는 배치를 만들 때 슬라이스로 잘라 쓴다.
+#
+# 채널 순서는 [입력 채널..., 민원수] 로 저장한다. 그래서 윈도우 입력 base[i:i+K, ..., :-1]
+# 과 목표 base[i+K, ..., -1:] 가 모두 연속 슬라이스이다 (채널 fancy indexing 복사 없음).
+# 시간에 따라 변하지 않는 정적 피처 (H, W, S) 는 convLSTM_static.npy 에 한 번만 저장하고
+# 모델의 두 번째 입력으로 넣는다.
+#
+#   base, meta = open_base()
+#   x, y = window_batch(base, meta['K'], [0, 1, 2])   # (3, K, H, W, D-1), (3, H, W, 1)
+#   static = open_static()                             # (H, W, S)
+#
+# 소수(양성) 윈도우 오버샘플링은 데이터를 복사하지 않고 번호 샘플러로 한다 (balanced_indices).
+#
+# 패치 학습: 윈도우마다 (ph, pw) 타일 하나를 잘라 쓴다 (patch_origin → window_patch). 모델이
+# 완전 합성곱이라 타일로 학습하고 전체 격자는 겹치는 타일을 이어 붙여 예측한다 (predict_tiled).
+# 검증은 같은 타일 배치로 고정한다 (tile_windows). 예측도 검증도 격자가 없는 타일은 건너뛴다.
+
+import json
+
+import numpy as np
+
+BASE_FILE = 'convLSTM_base.npy'
+META_FILE = 'convLSTM_meta.json'
+STATIC_FILE = 'convLSTM_static.npy'
+
+
+def save_base(data, meta, static, path=BASE_FILE, meta_path=META_FILE, static_path=STATIC_FILE):
+    """data: (T, H, W, D) float32, 마지막 채널이 목표(민원수). static: (H, W, S). meta: K, channels 등."""
+    np.save(path, np.ascontiguousarray(data, dtype=np.float32))
+    np.save(static_path, np.ascontiguousarray(static, dtype=np.float32))
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+
+def open_base(path=BASE_FILE, meta_path=META_FILE):
+    """(base, meta). base 는 읽기 전용 memmap 이라 실제로 읽은 윈도우만 메모리에 올라온다."""
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return np.load(path, mmap_mode='r'), meta
+
+
+def open_static(path=STATIC_FILE):
+    return np.load(path)
+
+
+def window_count(base, K):
+    # 마지막 달은 목표로만 쓰인다
+    return base.shape[0] - K
+
+
+def window_batch(base, K, indices):
+    """윈도우 indices 의 입력 (n, K, H, W, D-1) 과 목표 (n, H, W, 1)."""
+    x = np.stack([base[i:i + K, ..., :-1] for i in indices])
+    y = np.stack([base[i + K, ..., -1:] for i in indices])
+    return x, y
+
+
+def target_frames(base, K, indices):
+    """윈도우 indices 의 목표 (n, H, W) — 평가용. 한 채널만 읽는다."""
+    return np.stack([base[i + K, ..., -1] for i in indices])
+
+
+def balanced_indices(indices, positive, replicate_times, seed=None):
+    """윈도우 번호를 끝없이 내는 샘플러. 에폭마다 len(indices) + replicate_times*양성 수 개를
+    양성 (1+replicate_times) : 음성 1 의 가중치로 복원추출한다 — 양성을 replicate_times 번 더
+    붙여 섞던 예전 학습셋과 기대 구성이 같다. positive: indices 와 같은 길이의 bool."""
+    indices = np.asarray(indices)
+    weight = 1 + replicate_times * np.asarray(positive, dtype=np.float64)
+    size = int(weight.sum())
+    p = weight / weight.sum()
+    rng = np.random.default_rng(seed)
+    while True:
+        yield from rng.choice(indices, size=size, p=p)
+
+
+def patch_origin(target, mask, size, rng, positive_bias=0.5, tries=8):
+    """(H, W) 목표 프레임에서 자를 타일의 왼쪽 위 (y0, x0). positive_bias 확률로 민원이 있는
+    칸을 포함하는 타일을, 아니면 균일한 위치의 타일을 고른다. 격자가 하나도 없는 타일은 다시 뽑는다."""
+    H, W = mask.shape
+    ph, pw = min(size[0], H), min(size[1], W)
+    positive = None
+    for _ in range(tries):
+        if rng.random() < positive_bias:
+            if positive is None:
+                positive = np.argwhere(target > 0)
+            if len(positive):
+                y, x = positive[rng.integers(len(positive))]
+                y0 = int(np.clip(y - rng.integers(ph), 0, H - ph))
+                x0 = int(np.clip(x - rng.integers(pw), 0, W - pw))
+                return y0, x0
+        y0, x0 = int(rng.integers(H - ph + 1)), int(rng.integers(W - pw + 1))
+        if mask[y0:y0 + ph, x0:x0 + pw].any():
+            break
+    return y0, x0
+
+
+def window_patch(base, K, i, y0, x0, size):
+    """윈도우 i 의 타일 입력 (K, ph, pw, D-1) 과 목표 (ph, pw, 1). memmap 에서 타일 영역만 읽는다."""
+    ys, xs = slice(y0, y0 + size[0]), slice(x0, x0 + size[1])
+    return base[i:i + K, ys, xs, :-1], base[i + K, ys, xs, -1:]
+
+
+def tile_origins(length, size, overlap):
+    """길이 length 를 size 타일로 overlap 만큼 겹쳐 덮는 시작 위치들 (마지막 타일은 끝에 맞춘다)."""
+    if length <= size:
+        return [0]
+    origins = list(range(0, length - size, size - overlap))
+    return origins + [length - size]
+
+
+def _tiles(shape, size, overlap, mask=None):
+    """(ph, pw, [(y0, x0), ...]) — 래스터 shape 를 덮는 타일 원점. mask 가 있으면 격자가 없는 타일은 뺀다."""
+    H, W = shape
+    ph, pw = min(size[0], H), min(size[1], W)
+    origins = [(y0, x0) for y0 in tile_origins(H, ph, overlap) for x0 in tile_origins(W, pw, overlap)
+               if mask is None or mask[y0:y0 + ph, x0:x0 + pw].any()]
+    return ph, pw, origins
+
+
+def tile_windows(indices, mask, size, overlap):
+    """윈도우 indices × predict_tiled 와 같은 타일 배치 → (n, 3) int64 배열 (윈도우, y0, x0).
+    격자가 하나도 없는 타일은 뺀다. 검증을 매번 같은 타일로 하려고 쓴다."""
+    _, _, origins = _tiles(mask.shape, size, overlap, mask)
+    return np.array([(i, y0, x0) for i in indices for y0, x0 in origins], dtype=np.int64).reshape(-1, 3)
+
+
+def predict_tiled(predict, x, static, size, overlap, mask=None):
+    """전체 프레임 예측을 겹치는 타일로 나눠 돌리고 이어 붙인다.
+
+    predict(x_tile, static_tile) → 출력 배열 목록, 각 (n, ph, pw, c). x: (n, K, H, W, D-1),
+    static: (H, W, S). 겹치는 곳은 타일 가운데일수록 큰 가중치(삼각형)로 평균해 가장자리
+    ('same' 패딩) 효과를 줄인다. mask (H, W) 를 주면 격자가 없는 타일은 돌리지 않는다
+    (어느 타일에도 들지 않은 픽셀은 0).
+    """
+    H, W = x.shape[2], x.shape[3]
+    ph, pw, origins = _tiles((H, W), size, overlap, mask)
+    ramp_y = np.minimum(np.arange(ph) + 1, np.arange(ph)[::-1] + 1)
+    ramp_x = np.minimum(np.arange(pw) + 1, np.arange(pw)[::-1] + 1)
+    tile_weight = np.outer(ramp_y, ramp_x).astype(np.float32)[None, :, :, None]
+
+    outputs, total = None, np.zeros((H, W), np.float32)
+    for y0, x0 in origins:
+        ys, xs = slice(y0, y0 + ph), slice(x0, x0 + pw)
+        tiles = predict(x[:, :, ys, xs], static[ys, xs])
+        if outputs is None:
+            outputs = [np.zeros((len(x), H, W, t.shape[-1]), np.float32) for t in tiles]
+        for out, t in zip(outputs, tiles):
+            out[:, ys, xs] += t * tile_weight
+        total[ys, xs] += tile_weight[0, :, :, 0]
+    total = np.where(total > 0, total, 1)[None, :, :, None]
+    return [out / total for out in outputs]
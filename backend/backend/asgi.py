@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# 워커 기동 시 격자 공간 인덱스를 미리 만든다
+from d3.spatial import warm_index  # noqa: E402
+
+warm_index()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +52,7 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'd3.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -117,17 +119,25 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# DJANGO_DB_* 환경변수로 로컬 MySQL/SQLite 로 바꿔 띄울 수 있다 (부하 테스트 등)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'fixbug',  # Replace with your actual database name
-        'USER': 'root',                # As seen in your settings
-        'PASSWORD': '1234',   # Replace with your actual password
-        'HOST': '13.124.192.99',
-        'PORT': '3306',
+        'ENGINE': os.environ.get('DJANGO_DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.environ.get('DJANGO_DB_NAME', 'fixbug'),  # Replace with your actual database name
+        'USER': os.environ.get('DJANGO_DB_USER', 'root'),                # As seen in your settings
+        'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', '1234'),   # Replace with your actual password
+        'HOST': os.environ.get('DJANGO_DB_HOST', '13.124.192.99'),
+        'PORT': os.environ.get('DJANGO_DB_PORT', '3306'),
+        # 지속 연결 + 재사용 전 상태 확인
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', '300')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# 비동기 뷰가 DB 작업을 돌리는 스레드 수 = 워커당 유지하는 DB 연결 수 (d3.db)
+# 0 이면 풀 없이 Django 기본 sync_to_async 로 실행한다
+DB_POOL_SIZE = int(os.environ.get('DJANGO_DB_POOL_SIZE', '4'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -168,3 +178,91 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 STATIC_ROOT = os.path.join(BASE_DIR,'static')
 
+
+# fixbug_db 데이터셋 버전 스탬프 (load_grid_csv 등 적재 명령이 끝나면 갱신)
+DATASET_STAMP_FILE = os.path.join(BASE_DIR, 'dataset.stamp')
+
+# 격자 스냅샷 (manage.py export_snapshot). 워커는 current 가 가리키는 파일을 읽기 전용 mmap 으로
+# 열어 페이지 캐시 한 벌을 함께 쓴다. 켜면 격자/예측/행정동 집계 API 가 DB 를 읽지 않으므로
+# DJANGO_DB_ENGINE=django.db.backends.dummy 와 함께 MySQL 없이 띄울 수 있다 (읽기 전용 배포).
+# 켜 둔 채로 적재 명령을 돌리면 끝날 때 스냅샷도 새로 내보낸다
+GRID_SNAPSHOT_DIR = os.environ.get('DJANGO_GRID_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots'))
+GRID_SNAPSHOT_ENABLED = os.environ.get('DJANGO_GRID_SNAPSHOT', '') == '1'
+GRID_SNAPSHOT_KEEP = 2  # 교체 후 남겨 둘 이전 스냅샷 수
+
+# 행정동 경계 (build_dong_stats 가 격자 → 행정동 매핑에 사용)
+DONG_GEOJSON_FILE = os.path.join(BASE_DIR.parent, 'frontend', 'public', 'data', 'dong.geojson')
+
+# load_predictions / 예측 API 에서 모델 버전을 지정하지 않을 때 쓰는 값
+PREDICTION_MODEL_VERSION = 'v1'
+
+# 온라인 추론 모델 (/api/predict/). 워커마다 처음 요청 때 한 번 읽는다.
+# kind: torchscript (TransformerClassifier), keras (ConvLSTM), python (factory 경로의 함수가 Model 생성)
+MODEL_DIR = os.path.join(BASE_DIR.parent, 'ai_model', 'hahaboy', 'project')
+INFERENCE_MODELS = {
+    'transformer': {
+        'kind': 'torchscript',
+        'path': os.path.join(MODEL_DIR, 'transformer_model.pt'),
+        'meta': os.path.join(MODEL_DIR, 'transformer_model.npz'),
+    },
+    'convlstm': {
+        'kind': 'keras',
+        'path': os.path.join(MODEL_DIR, 'convLSTM_model.keras'),
+        'static': os.path.join(MODEL_DIR, 'convLSTM_static.npy'),  # 격자 정적 피처 (두 번째 입력)
+        'max_batch': 4,  # 샘플 하나가 도시 전체 격자
+    },
+}
+# 마이크로배치: 최대 샘플 수, 첫 요청 뒤 더 모으는 최대 시간 (ms), 대기 큐 한도, 요청당 최대 대기 (초)
+INFERENCE_MAX_BATCH = 256
+INFERENCE_MAX_WAIT_MS = 5
+INFERENCE_QUEUE_SIZE = 1024
+INFERENCE_TIMEOUT = 10
+
+# 좌표 → 격자 조회 시 격자 중심까지 허용하는 최대 거리 (m)
+GRID_LOOKUP_MAX_DISTANCE = 100
+
+# batch_lookup 한 번에 조회할 수 있는 최대 항목 수
+BATCH_LOOKUP_MAX_ITEMS = 10000
+
+# bbox 영역 조회: 격자를 돌려주는 최소 줌 (프론트엔드 Z_GRID) 과 최대 격자 수
+GRID_BBOX_MIN_ZOOM = 15
+GRID_BBOX_MAX_CELLS = 20000
+
+# 격자 API 응답 캐시 (데이터셋 버전이 키에 포함되므로 적재 후 자동 무효화)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'd3-grid',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+GRID_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+# 같은 응답을 동시에 만들 때 워커 사이에서도 한 번만 만들지 (캐시 잠금).
+# 공유 캐시 백엔드(파일/Redis 등)로 바꿨을 때만 켠다
+SINGLE_FLIGHT_CROSS_WORKER = False
+SINGLE_FLIGHT_LOCK_TIMEOUT = 5  # 다른 워커 결과를 기다리는 최대 시간 (초)
+SINGLE_FLIGHT_POLL_INTERVAL = 0.01
+# 브라우저/프록시가 재검증 없이 쓰는 시간 (초). 이후에는 ETag 로 304 재검증
+GRID_HTTP_MAX_AGE = 300
+
+# 요청 지표 (/metrics). gunicorn 워커별 스냅샷을 이 디렉터리에 모아 합산한다.
+# 배포 때 서버를 띄우기 전에 비우면 이전 실행의 누적값이 섞이지 않는다. 비우면 워커별 값만.
+METRICS_DIR = os.environ.get('DJANGO_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'fixbug-metrics'))
+METRICS_FLUSH_INTERVAL = 5  # 워커 스냅샷 저장 주기 (초)
+# 이 시간(초) 넘게 갱신되지 않은 스냅샷은 죽은 워커로 보고 합산에서 빼고 지운다 (저장 주기보다 충분히 길게)
+METRICS_STALE_AFTER = 60
+METRICS_SERVER_TIMING = True  # 응답에 Server-Timing 헤더 추가
+
+# d3 요청 로그 표본 비율 (0~1). 오류 로그는 항상 남긴다
+D3_LOG_SAMPLE_RATE = float(os.environ.get('DJANGO_D3_LOG_SAMPLE_RATE', '0.01'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'd3': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from d3.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/',  include('d3.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,384 @@
+"""재현 가능한 백엔드 벤치마크: 합성 격자 DB + 클릭/이동 트래픽 재생.
+
+backend 디렉터리에서 실행한다. 결과는 커밋 사이에 비교할 수 있는 JSON 으로 남긴다.
+
+    # SQLite 에 격자 10만 개를 채우고 gunicorn 을 띄워 32 동시 사용자로 30초
+    python -m benchmarks.harness --cells 100000 --concurrency 32 --duration 30 \\
+        --json /tmp/bench-$(git rev-parse --short HEAD).json
+
+    # 이전 결과와 비교
+    python -m benchmarks.harness --cells 100000 --baseline /tmp/bench-abc1234.json
+
+    # MySQL 컨테이너 등 DJANGO_DB_* 환경변수의 DB 를 그대로 쓰기
+    DJANGO_DB_HOST=127.0.0.1 python -m benchmarks.harness --settings-db --cells 1000000
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode, urlsplit
+
+from benchmarks.loadtest import BACKEND_DIR, SERVERS, sqlite_env, wait_for_port
+
+# 대전 서쪽 '다라000000' 격자에서 시작해 정사각형으로 채운다 (500만 개 → 약 224km × 224km)
+ORIGIN_KEY = '다라000000'
+DONG_NAMES = ('가수원동', '도안동', '관저1동', '관저2동', '기성동', '정림동', '복수동', '도마1동')
+
+# 지도 화면 크기 (px) 와 줌. 격자는 Z_GRID(15) 이상에서만 그린다
+VIEWPORT = (1280, 800)
+ZOOMS = (15, 16, 17)
+
+# 사용자 한 명의 다음 동작 비율
+CLICK_RATIO = 0.35      # get_xy (격자 클릭)
+DONG_RATIO = 0.10       # dong_data
+CELL_GET_RATIO = 0.10   # cells/<grid_100>/ (캐시 가능한 GET 클릭)
+# 나머지는 화면 이동 (bbox)
+
+# --hot-ratio 요청이 몰리는 격자 수 (공유 화면에 띄운 행정동 등)
+HOT_CELLS = 5
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class SyntheticGrid:
+    """ORIGIN_KEY 에서 시작하는 side × side 정사각형 격자의 앞 cells 개."""
+
+    def __init__(self, cells):
+        from d3.grid import cell_id_from_key, cell_index
+        self.cells = cells
+        self.side = math.ceil(math.sqrt(cells))
+        self.col0, self.row0 = cell_index(cell_id_from_key(ORIGIN_KEY))
+
+    def index(self, k):
+        return self.col0 + k // self.side, self.row0 + k % self.side
+
+    def rows(self, start, stop, rng):
+        from d3.grid import cell_id_from_index, key_from_cell_id, lonlat_from_cell_id
+        for k in range(start, stop):
+            cell_id = cell_id_from_index(*self.index(k))
+            longitude, latitude = lonlat_from_cell_id(cell_id)
+            dong = DONG_NAMES[(k // 500) % len(DONG_NAMES)]
+            ages = [rng.randrange(0, 60) for _ in range(12)]
+            male, female = rng.randrange(0, 300), rng.randrange(0, 300)
+            yield (key_from_cell_id(cell_id), cell_id, dong, dong, str(30000 + k // 500), '서구',
+                   f'대전광역시 서구 {dong}', latitude, longitude, male, female, male + female,
+                   *ages)
+
+    def random_point(self, rng):
+        """격자 안 임의 지점 (경도, 위도) — 프론트엔드 클릭처럼 격자 중심이 아니다."""
+        from d3.grid import CELL_SIZE, from_utmk
+        col, row = self.index(rng.randrange(self.cells))
+        return from_utmk((col + rng.uniform(0.05, 0.95)) * CELL_SIZE,
+                         (row + rng.uniform(0.05, 0.95)) * CELL_SIZE)
+
+
+def seed(grid, batch_size=5000, seed_value=0):
+    """fixbug_db 를 합성 격자로 채운다. 이미 같은 수가 있으면 그대로 쓴다."""
+    from django.db import connection, transaction
+
+    from d3.dataset import bump_dataset_version
+    from d3.models import GRID_FIELDS, fixbug_db
+
+    existing = fixbug_db.objects.count()
+    if existing == grid.cells:
+        print(f'seed: 기존 {existing}개 격자 재사용')
+        return 0.0
+
+    t0 = time.perf_counter()
+    columns = ('grid_100', 'cell_id') + GRID_FIELDS[1:]
+    qn = connection.ops.quote_name
+    sql = (f'INSERT INTO {qn(fixbug_db._meta.db_table)} ({", ".join(qn(c) for c in columns)}) '
+           f'VALUES ({", ".join(["%s"] * len(columns))})')
+    rng = random.Random(seed_value)
+    fixbug_db.objects.all().delete()
+    for start in range(0, grid.cells, batch_size):
+        rows = list(grid.rows(start, min(start + batch_size, grid.cells), rng))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        done = start + len(rows)
+        if done % (batch_size * 20) == 0 or done == grid.cells:
+            print(f'seed: {done}/{grid.cells} ({done / (time.perf_counter() - t0):.0f}행/초)')
+    bump_dataset_version()
+    return time.perf_counter() - t0
+
+
+def _viewport(center, zoom):
+    """center (경도, 위도) 를 중심으로 하는 화면 영역 (west, south, east, north)."""
+    longitude, latitude = center
+    meters_per_px = 156543.03392 * math.cos(math.radians(latitude)) / 2 ** zoom
+    half_w = VIEWPORT[0] * meters_per_px / 2 / (111320 * math.cos(math.radians(latitude)))
+    half_h = VIEWPORT[1] * meters_per_px / 2 / 110540
+    return longitude - half_w, latitude - half_h, longitude + half_w, latitude + half_h
+
+
+def user_session(grid, rng, hot_ratio=0.0):
+    """사용자 한 명의 요청 흐름: 화면을 이리저리 옮기며 가끔 격자를 클릭한다.
+
+    hot_ratio 비율의 요청은 모두가 같이 보는 소수의 격자(HOT_CELLS) 조회다.
+    """
+    from d3.grid import cell_id_from_index, key_from_cell_id
+    hot_keys = [key_from_cell_id(cell_id_from_index(*grid.index(k))) for k in range(min(HOT_CELLS, grid.cells))]
+    center = grid.random_point(rng)
+    zoom = rng.choice(ZOOMS)
+    while True:
+        if hot_ratio and rng.random() < hot_ratio:
+            yield 'hot', 'GET', f'/api/cells/{quote(rng.choice(hot_keys))}/', None
+            continue
+        r = rng.random()
+        if r < CLICK_RATIO + DONG_RATIO + CELL_GET_RATIO:
+            # 현재 화면 근처의 격자 클릭
+            longitude, latitude = grid.random_point(rng) if rng.random() < 0.2 else (
+                center[0] + rng.uniform(-0.003, 0.003), center[1] + rng.uniform(-0.002, 0.002))
+            if r < CLICK_RATIO:
+                yield 'click', 'POST', '/api/get_xy/', json.dumps({'longitude': longitude, 'latitude': latitude})
+            elif r < CLICK_RATIO + DONG_RATIO:
+                yield 'dong', 'POST', '/api/dong_data/', json.dumps({'longitude': longitude, 'latitude': latitude})
+            else:
+                from d3.grid import key_from_lonlat
+                yield 'cell_get', 'GET', f'/api/cells/{quote(key_from_lonlat(longitude, latitude))}/', None
+        else:
+            # 화면 이동: 화면 크기의 ±40% 만큼 옮기고 가끔 줌 변경
+            west, south, east, north = _viewport(center, zoom)
+            center = (center[0] + (east - west) * rng.uniform(-0.4, 0.4),
+                      center[1] + (north - south) * rng.uniform(-0.4, 0.4))
+            if rng.random() < 0.1:
+                zoom = rng.choice(ZOOMS)
+            west, south, east, north = _viewport(center, zoom)
+            query = urlencode({'west': f'{west:.6f}', 'south': f'{south:.6f}', 'east': f'{east:.6f}',
+                               'north': f'{north:.6f}', 'zoom': zoom,
+                               'format': 'bin' if rng.random() < 0.5 else 'json'})
+            yield 'pan', 'GET', f'/api/bbox/?{query}', None
+
+
+def client(url, grid, seed_value, stop_at, records, hot_ratio=0.0):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    session = user_session(grid, random.Random(seed_value), hot_ratio)
+    headers = {'Content-Type': 'application/json'}
+    while time.monotonic() < stop_at:
+        op, method, path, body = next(session)
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            res = conn.getresponse()
+            res.read()
+        except (OSError, http.client.HTTPException):
+            records.append((op, time.perf_counter() - t0, 'conn', None))
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        match = _QUERIES.search(res.getheader('Server-Timing') or '')
+        records.append((op, time.perf_counter() - t0, res.status, int(match.group(1)) if match else None))
+    conn.close()
+
+
+def summarize(records, elapsed):
+    latencies = sorted(latency for _, latency, status, _ in records if status != 'conn')
+    queries = [q for _, _, _, q in records if q is not None]
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3) \
+            if latencies else None
+
+    return {
+        'requests': len(records),
+        # 404 는 격자 밖 클릭이므로 오류로 세지 않는다
+        'errors': sum(1 for _, _, status, _ in records if status == 'conn' or status >= 500
+                      or status in (400, 405)),
+        'not_found': sum(1 for _, _, status, _ in records if status == 404),
+        'rps': round(len(records) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'queries_per_request': round(sum(queries) / len(queries), 3) if queries else None,
+    }
+
+
+def scrape_counter(url, name):
+    """/metrics 에서 카운터 하나를 읽는다 (모든 워커 합계). 없으면 0, 실패하면 None."""
+    parts = urlsplit(url)
+    try:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+        conn.request('GET', '/metrics')
+        text = conn.getresponse().read().decode()
+        conn.close()
+    except (OSError, http.client.HTTPException):
+        return None
+    match = re.search(rf'^{name} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+def bump_periodically(every, stop_at):
+    """every 초마다 데이터셋 버전을 올려 적재 직후처럼 모든 캐시를 동시에 비운다."""
+    from d3.dataset import bump_dataset_version
+    while time.monotonic() + every < stop_at:
+        time.sleep(every)
+        bump_dataset_version()
+
+
+def run_traffic(url, grid, concurrency, duration, warmup, seed_value, hot_ratio=0.0, bump_every=0.0):
+    # 워밍업 (워커별 인덱스 생성, 연결 수립) 은 결과에서 뺀다
+    warm = [threading.Thread(target=client, args=(url, grid, -1 - i, time.monotonic() + warmup, []))
+            for i in range(concurrency)]
+    for t in warm:
+        t.start()
+    for t in warm:
+        t.join()
+
+    coalesced_before = scrape_counter(url, 'd3_coalesced_requests_total')
+    records = []
+    stop_at = time.monotonic() + duration
+    threads = [threading.Thread(target=client, args=(url, grid, seed_value + i, stop_at, records, hot_ratio))
+               for i in range(concurrency)]
+    if bump_every:
+        threads.append(threading.Thread(target=bump_periodically, args=(bump_every, stop_at)))
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    ops = {}
+    for record in records:
+        ops.setdefault(record[0], []).append(record)
+    overall = summarize(records, elapsed)
+
+    # 다른 워커의 지표 스냅샷이 저장될 때까지 기다렸다가 합쳐진 요청 수를 읽는다
+    from django.conf import settings
+    time.sleep(settings.METRICS_FLUSH_INTERVAL + 0.5)
+    coalesced_after = scrape_counter(url, 'd3_coalesced_requests_total')
+    overall['coalesced'] = None if None in (coalesced_before, coalesced_after) \
+        else int(coalesced_after - coalesced_before)
+    return {
+        'overall': overall,
+        'ops': {op: summarize(op_records, elapsed) for op, op_records in sorted(ops.items())},
+    }
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip())
+        return rev, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare_with(baseline, result):
+    """이전 결과 대비 변화율을 출력한다."""
+    print(f"\nbaseline {baseline['meta'].get('git_commit', '?')[:10]} → "
+          f"{result['meta'].get('git_commit', '?')[:10]}")
+    for key in ('cells', 'server', 'workers', 'concurrency', 'db_engine'):
+        if baseline['meta'].get(key) != result['meta'].get(key):
+            print(f"  주의: {key} 가 다릅니다 ({baseline['meta'].get(key)} → {result['meta'].get(key)})")
+    sections = [('overall', baseline['overall'], result['overall'])]
+    sections += [(op, baseline['ops'][op], stats) for op, stats in result['ops'].items()
+                 if op in baseline['ops']]
+    for name, old, new in sections:
+        parts = []
+        for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'coalesced'):
+            if old.get(key) and new.get(key) is not None:
+                parts.append(f"{key} {old[key]}→{new[key]} ({(new[key] / old[key] - 1) * 100:+.1f}%)")
+        print(f'  {name:<9} ' + '  '.join(parts))
+
+
+def print_summary(result):
+    print(f"coalesced={result['overall'].get('coalesced')}")
+    rows = [('overall', result['overall'])] + list(result['ops'].items())
+    for name, stats in rows:
+        print(f"{name:<9} rps={stats['rps']:8.1f}  p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  "
+              f"p99={stats['p99_ms']}ms  q/req={stats['queries_per_request']}  "
+              f"n={stats['requests']}  errors={stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cells', type=int, default=10000, help='합성 격자 수 (1만 ~ 500만)')
+    parser.add_argument('--sqlite', default='/tmp/fixbug_harness.sqlite3', help='SQLite 파일')
+    parser.add_argument('--settings-db', action='store_true',
+                        help='SQLite 대신 DJANGO_DB_* 환경변수의 DB 사용 (예: MySQL 컨테이너)')
+    parser.add_argument('--url', help='이미 떠 있는 서버에 부하만 준다 (DB 는 같은 격자로 채워져 있어야 함)')
+    parser.add_argument('--server', choices=sorted(SERVERS), default='wsgi-sync')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--concurrency', type=int, default=16, help='동시 사용자 수 (고정)')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hot-ratio', type=float, default=0.0,
+                        help=f'모두가 같은 {HOT_CELLS}개 격자를 조회하는 요청 비율')
+    parser.add_argument('--bump-every', type=float, default=0.0,
+                        help='이 간격(초)으로 데이터셋 버전을 올려 캐시를 비운다 (같은 DB 를 쓰는 로컬 서버만)')
+    parser.add_argument('--server-log', default=os.devnull, help='서버 stderr 를 남길 파일')
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    args = parser.parse_args()
+
+    env = dict(os.environ) if args.settings_db else sqlite_env(Path(args.sqlite).resolve())
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    os.environ.update(env)
+    import django
+    django.setup()
+
+    grid = SyntheticGrid(args.cells)
+    seed_seconds = None
+    if not args.url:
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'], cwd=BACKEND_DIR, env=env, check=True)
+        seed_seconds = seed(grid, seed_value=args.seed)
+
+    from django.conf import settings
+    rev, dirty = git_revision()
+    meta = {
+        'git_commit': rev, 'git_dirty': dirty, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(), 'django': django.get_version(),
+        'db_engine': settings.DATABASES['default']['ENGINE'], 'cells': args.cells,
+        'server': args.url or args.server, 'workers': None if args.url else args.workers,
+        'concurrency': args.concurrency, 'duration': args.duration, 'seed': args.seed,
+        'hot_ratio': args.hot_ratio, 'bump_every': args.bump_every,
+        'seed_seconds': seed_seconds,
+    }
+
+    if args.url:
+        result = run_traffic(args.url, grid, args.concurrency, args.duration, args.warmup, args.seed,
+                             args.hot_ratio, args.bump_every)
+    else:
+        command = SERVERS[args.server] + ['--workers', str(args.workers), '--bind', f'127.0.0.1:{args.port}',
+                                          '--log-level', 'warning', '--timeout', '300']
+        server_log = open(args.server_log, 'w')
+        server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=server_log,
+                                  stderr=server_log, start_new_session=True)
+        try:
+            wait_for_port('127.0.0.1', args.port, timeout=120)
+            result = run_traffic(f'http://127.0.0.1:{args.port}', grid, args.concurrency,
+                                 args.duration, args.warmup, args.seed, args.hot_ratio, args.bump_every)
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+            server_log.close()
+
+    result = {'meta': meta, **result}
+    print_summary(result)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare_with(json.load(f), result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
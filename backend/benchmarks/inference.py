@@ -0,0 +1,102 @@
+"""마이크로배치 추론 벤치마크: 최대 배치 크기별 처리량과 지연 분포.
+
+backend 디렉터리에서 실행한다. 동시 클라이언트 스레드가 샘플 하나씩 계속 요청하고,
+d3.inference.MicroBatcher 가 모아 모델에 넣는다. --model 을 주면 INFERENCE_MODELS 의
+학습된 모델(torch/tensorflow 필요)을, 없으면 TransformerClassifier 입력 모양(12 x 130)의
+numpy 2층 투영 모델을 쓴다.
+
+    python -m benchmarks.inference --batches 1 8 32 128 --concurrency 64
+    python -m benchmarks.inference --model transformer --json /tmp/inference.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from d3.inference import LOADERS, MicroBatcher, Model  # noqa: E402
+
+
+def numpy_model(seq_len=12, feat_dim=130, d_model=64, seed=0):
+    rng = np.random.default_rng(seed)
+    w1 = rng.standard_normal((feat_dim, d_model), dtype=np.float32) / np.sqrt(feat_dim)
+    w2 = rng.standard_normal((d_model, 1), dtype=np.float32) / np.sqrt(d_model)
+
+    def predict(batch):
+        hidden = np.maximum(batch @ w1, 0).mean(axis=1)
+        return {'score': 1 / (1 + np.exp(-(hidden @ w2)[:, 0]))}
+
+    return Model(predict, (seq_len, feat_dim), ('score',))
+
+
+def client(batcher, sample, stop_at, latencies):
+    while time.monotonic() < stop_at:
+        t0 = time.perf_counter()
+        batcher.submit(sample).result()
+        latencies.append(time.perf_counter() - t0)
+
+
+def run(load, max_batch, max_wait, concurrency, duration):
+    batcher = MicroBatcher(load, max_batch=max_batch, max_wait=max_wait, max_queue=concurrency * 2)
+    model = batcher._get_model()
+    sample = np.random.default_rng(1).standard_normal((1, *model.input_shape), dtype=np.float32)
+    client(batcher, sample, time.monotonic() + 0.5, [])  # 워밍업
+
+    latencies = []
+    stop_at = time.monotonic() + duration
+    threads = [threading.Thread(target=client, args=(batcher, sample, stop_at, latencies))
+               for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {'max_batch': max_batch, 'samples_per_s': len(latencies) / elapsed,
+            'p50_ms': pct(0.50), 'p99_ms': pct(0.99), 'requests': len(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', help='INFERENCE_MODELS 이름 (없으면 numpy 모델)')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--max-wait-ms', type=float, default=settings.INFERENCE_MAX_WAIT_MS)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    if args.model:
+        config = settings.INFERENCE_MODELS[args.model]
+        load = lambda: LOADERS[config['kind']](config)  # noqa: E731
+    else:
+        load = numpy_model
+
+    results = []
+    for max_batch in args.batches:
+        result = run(load, max_batch, args.max_wait_ms / 1000, args.concurrency, args.duration)
+        results.append(result)
+        print(f"max_batch={max_batch:<5} {result['samples_per_s']:9.1f} samples/s  "
+              f"p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
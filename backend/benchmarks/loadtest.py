@@ -0,0 +1,203 @@
+"""격자 API 부하 테스트: gunicorn 동기 워커(WSGI) vs uvicorn 워커(ASGI).
+
+backend 디렉터리에서 실행한다.
+
+    # 로컬 SQLite 로 두 서버를 차례로 띄워 비교
+    python -m benchmarks.loadtest --compare --sqlite /tmp/fixbug_bench.sqlite3
+
+    # 이미 떠 있는 서버에 부하만 주기
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+GRID_META = BACKEND_DIR.parent / 'ai_model' / 'hahaboy' / 'project' / 'grid_meta.csv'
+
+SERVERS = {
+    'wsgi-sync': ['gunicorn', 'backend.wsgi', '--worker-class', 'sync'],
+    'wsgi-gthread': ['gunicorn', 'backend.wsgi', '--worker-class', 'gthread', '--threads', '8'],
+    'asgi-uvicorn': ['gunicorn', 'backend.asgi', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def load_cells(path=GRID_META):
+    with open(path, encoding='utf-8-sig') as f:
+        return [(row['격자100m'], float(row['경도']), float(row['위도'])) for row in csv.DictReader(f)]
+
+
+def prepare_sqlite(db_path):
+    """SQLite 스탠드인 DB 를 만들고 비어 있으면 grid_meta.csv 격자로 채운다."""
+    env = sqlite_env(db_path)
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'],
+                   cwd=BACKEND_DIR, env=env, check=True)
+    seed = (
+        "import django; django.setup()\n"
+        "from benchmarks.loadtest import load_cells\n"
+        "from d3.dataset import bump_dataset_version\n"
+        "from d3.grid import cell_id_from_key\n"
+        "from d3.models import fixbug_db\n"
+        "if not fixbug_db.objects.exists():\n"
+        "    fixbug_db.objects.bulk_create([fixbug_db(\n"
+        "        grid_100=key, cell_id=cell_id_from_key(key), h_area='-', b_area='-', g_area='-',\n"
+        "        city='-', h_a_area='-', x=lat, y=lon, total_population=0)\n"
+        "        for key, lon, lat in load_cells()], batch_size=1000)\n"
+        "    bump_dataset_version()\n"
+    )
+    subprocess.run([sys.executable, '-c', seed], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def sqlite_env(db_path):
+    env = dict(os.environ)
+    env.update({
+        'DJANGO_SETTINGS_MODULE': 'backend.settings',
+        'DJANGO_DB_ENGINE': 'django.db.backends.sqlite3',
+        'DJANGO_DB_NAME': str(db_path),
+    })
+    return env
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{host}:{port} 서버가 {timeout}초 안에 뜨지 않았습니다.')
+
+
+def make_requests(cells, rng, batch_ratio=0.1, batch_size=200):
+    """클릭(get_xy POST), 캐시 가능한 GET 조회, 여러 건 batch_lookup 을 섞은 요청 생성기."""
+    while True:
+        key, lon, lat = rng.choice(cells)
+        r = rng.random()
+        if r < batch_ratio:
+            keys = [cell[0] for cell in rng.sample(cells, batch_size)]
+            yield 'POST', '/api/batch_lookup/', json.dumps({'keys': keys})
+        elif r < 0.55:
+            body = json.dumps({'longitude': lon, 'latitude': lat})
+            yield 'POST', '/api/get_xy/', body
+        else:
+            yield 'GET', f'/api/cells/{quote(key)}/', None
+
+
+def worker(url, cells, seed, stop_at, latencies, errors):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    requests = make_requests(cells, random.Random(seed))
+    headers = {'Content-Type': 'application/json'}
+    while time.monotonic() < stop_at:
+        method, path, body = next(requests)
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            res = conn.getresponse()
+            res.read()
+            if res.status >= 400:
+                errors.append(res.status)
+        except (OSError, http.client.HTTPException):
+            errors.append('conn')
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def run_load(url, cells, concurrency, duration, warmup=1.0):
+    # 워밍업 (인덱스 생성, 연결 수립)
+    worker(url, cells, -1, time.monotonic() + warmup, [], [])
+
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    threads = [threading.Thread(target=worker, args=(url, cells, i, stop_at, latencies, errors))
+               for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else None
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+    }
+
+
+def compare(args, cells):
+    db_path = Path(args.sqlite).resolve()
+    prepare_sqlite(db_path)
+    env = sqlite_env(db_path)
+    results = {}
+    for name, command in SERVERS.items():
+        command = command + ['--workers', str(args.workers), '--bind', f'127.0.0.1:{args.port}',
+                             '--log-level', 'warning']
+        server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, start_new_session=True)
+        try:
+            wait_for_port('127.0.0.1', args.port)
+            results[name] = run_load(f'http://127.0.0.1:{args.port}', cells,
+                                     args.concurrency, args.duration)
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name, result):
+    print(f"{name:<14} rps={result['rps']:8.1f}  p50={result['p50_ms']:.2f}ms  "
+          f"p99={result['p99_ms']:.2f}ms  requests={result['requests']}  errors={result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='이미 떠 있는 서버 주소')
+    parser.add_argument('--compare', action='store_true', help='WSGI/ASGI 서버를 띄워 비교')
+    parser.add_argument('--sqlite', default='/tmp/fixbug_bench.sqlite3', help='--compare 용 SQLite 파일')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    cells = load_cells()
+    if args.compare:
+        results = compare(args, cells)
+    elif args.url:
+        results = {args.url: run_load(args.url, cells, args.concurrency, args.duration)}
+        print_result('target', results[args.url])
+    else:
+        parser.error('--url 또는 --compare 가 필요합니다.')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
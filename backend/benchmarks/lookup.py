@@ -0,0 +1,87 @@
+"""격자 조회 벤치마크: 기존 좌표 범위 검색 vs cell_id 단건 조회 vs 메모리 공간 인덱스.
+
+backend 디렉터리에서 실행한다.
+
+    python -m benchmarks.lookup --samples 500
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from d3.grid import cell_id_from_lonlat  # noqa: E402
+from d3.models import fixbug_db  # noqa: E402
+from d3.spatial import get_index  # noqa: E402
+
+TOLERANCE = 0.00001
+
+
+def range_query(longitude, latitude):
+    # 기존 get_xy 방식 (x=위도, y=경도 네 방향 범위 검색)
+    return list(fixbug_db.objects.filter(
+        x__gte=latitude - TOLERANCE, x__lte=latitude + TOLERANCE,
+        y__gte=longitude - TOLERANCE, y__lte=longitude + TOLERANCE,
+    ))
+
+
+def cell_query(longitude, latitude):
+    return list(fixbug_db.objects.filter(cell_id=cell_id_from_lonlat(longitude, latitude)))
+
+
+def index_query(longitude, latitude):
+    return get_index().nearest(longitude, latitude, 100) is not None
+
+
+def run(name, fn, points):
+    timings = []
+    hits = 0
+    for longitude, latitude in points:
+        t0 = time.perf_counter()
+        hits += bool(fn(longitude, latitude))
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f"{name:<12} mean={statistics.mean(timings):.3f}ms  "
+          f"p50={statistics.median(timings):.3f}ms  p95={p95:.3f}ms  "
+          f"hit={hits}/{len(points)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    coords = list(fixbug_db.objects.exclude(x=None).values_list('y', 'x'))
+    if not coords:
+        print("fixbug_db 가 비어 있습니다. 먼저 데이터를 적재하세요.")
+        return
+
+    rng = random.Random(args.seed)
+    points = [rng.choice(coords) for _ in range(args.samples)]
+    # 프론트엔드처럼 격자 안의 임의 지점을 클릭한 경우 (±40m)
+    jittered = [(lon + rng.uniform(-4e-4, 4e-4), lat + rng.uniform(-3e-4, 3e-4))
+                for lon, lat in points]
+
+    t0 = time.perf_counter()
+    get_index()
+    print(f"rows={len(coords)}, samples={args.samples}, "
+          f"index build={(time.perf_counter() - t0) * 1000:.1f}ms")
+    print("[격자 중심 좌표]")
+    run('range', range_query, points)
+    run('cell_id', cell_query, points)
+    run('index', index_query, points)
+    print("[격자 내부 임의 좌표]")
+    run('range', range_query, jittered)
+    run('cell_id', cell_query, jittered)
+    run('index', index_query, jittered)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""d3 응답 직렬화 벤치마크: 모델 인스턴스 + JsonResponse vs 필드 투영 + 공용 직렬화.
+
+backend 디렉터리에서 실행한다. 설정된 DB 엔진으로 임시 테스트 DB 를 만들어
+합성 격자를 채우므로 실제 데이터는 건드리지 않는다. 요청당 CPU 시간을
+쿼리 포함 전체와 직렬화만 따로 잰다. (1행 조회는 ORM 쿼리 생성 비용이 대부분이고,
+실제 get_xy/dong_data 는 메모리 인덱스에서 읽으므로 직렬화 부분만 해당된다.)
+
+    python -m benchmarks.serialization --json /tmp/serialization.json
+"""
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.http import JsonResponse  # noqa: E402
+
+from d3 import serializers  # noqa: E402
+from d3.grid import CELL_ID_STRIDE, cell_id_from_key, key_from_cell_id  # noqa: E402
+from d3.models import DONG_FIELDS, GRID_FIELDS, fixbug_db  # noqa: E402
+
+SIZES = (1, 100, 10000)
+
+
+def seed(n):
+    origin = cell_id_from_key('다마800000')
+    rows = []
+    for i in range(n):
+        cell_id = origin + (i // 1000) * CELL_ID_STRIDE + i % 1000
+        rows.append(fixbug_db(
+            grid_100=key_from_cell_id(cell_id), cell_id=cell_id, h_area='가수원동', b_area='가수원동',
+            g_area='35001', city='서구', h_a_area='대전광역시 서구 가수원동',
+            x=36.19 + i * 1e-6, y=127.33 + i * 1e-6, **{f: i % 97 for f in GRID_FIELDS[8:]}))
+    fixbug_db.objects.bulk_create(rows, batch_size=2000)
+
+
+def before(n, fields):
+    # 기존 get_xy/dong_data: 모델 인스턴스 전체를 읽고 필드별 dict → JsonResponse
+    results = fixbug_db.objects.all()[:n]
+    data_list = [{field: getattr(result, field) for field in fields} for result in results]
+    return JsonResponse({'data': data_list}, status=200).content
+
+
+def after(n, fields):
+    # 필드 투영을 쿼리로 내리고 공용 직렬화 사용
+    rows = fixbug_db.objects.values_list(*fields)[:n]
+    data_list = [dict(zip(fields, values)) for values in rows]
+    return serializers.json_response({'data': data_list}).content
+
+
+def encode_before(results, fields):
+    # 직렬화만: 이미 읽어 둔 인스턴스 → dict → JsonResponse
+    return JsonResponse({'data': [{field: getattr(r, field) for field in fields} for r in results]}).content
+
+
+def encode_after(rows, fields):
+    return serializers.json_response({'data': [dict(zip(fields, values)) for values in rows]}).content
+
+
+def measure(fn, arg, fields, repeat):
+    fn(arg, fields)  # 워밍업
+    t0 = time.process_time()
+    for _ in range(repeat):
+        size = len(fn(arg, fields))
+    return (time.process_time() - t0) / repeat * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=1.0, help='크기별 대략적인 측정 시간 (초)')
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(max(SIZES))
+        results = []
+        print(f"orjson={'yes' if serializers.orjson else 'no'}")
+        for name, fields in (('get_xy', GRID_FIELDS), ('dong_data', DONG_FIELDS)):
+            for n in SIZES:
+                repeat = max(3, int(args.budget * 2000 / n))
+                before_ms, before_size = measure(before, n, fields, repeat)
+                after_ms, after_size = measure(after, n, fields, repeat)
+                instances = list(fixbug_db.objects.all()[:n])
+                rows = list(fixbug_db.objects.values_list(*fields)[:n])
+                encode_before_ms, _ = measure(encode_before, instances, fields, repeat)
+                encode_after_ms, _ = measure(encode_after, rows, fields, repeat)
+                results.append({'route': name, 'rows': n, 'before_cpu_ms': before_ms,
+                                'after_cpu_ms': after_ms, 'before_encode_cpu_ms': encode_before_ms,
+                                'after_encode_cpu_ms': encode_after_ms,
+                                'before_bytes': before_size, 'after_bytes': after_size})
+                print(f"{name:<10} rows={n:<6} 전체 {before_ms:9.3f} → {after_ms:9.3f}ms  "
+                      f"직렬화 {encode_before_ms:9.3f} → {encode_after_ms:9.3f}ms  "
+                      f"bytes {before_size} → {after_size}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class D3Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'd3'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_hook
+
+        # 요청별 DB 쿼리 수/시간 계측
+        connection_created.connect(install_query_hook, dispatch_uid='d3-metrics-query-hook')
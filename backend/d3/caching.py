@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+
+from .dataset import dataset_version
+from .grid import cell_id_from_key
+from .metrics import registry
+from .singleflight import COALESCED_COUNTER, SingleFlight
+
+# 읽기 전용 격자 API 의 HTTP 캐시
+#
+# 응답은 데이터셋 버전이 같으면 항상 같으므로 ETag 를 "버전-키" 로 만들고,
+# 서버 쪽 캐시 키에도 버전을 넣어 적재 후에는 자연히 새 항목을 쓰게 한다.
+
+
+def dataset_etag(request, *args, grid_100=None, **kwargs):
+    """ETag 는 URL 마다 따로 비교되므로 데이터셋 버전(+격자 id)이면 충분하다."""
+    version = dataset_version()
+    # 헤더는 latin-1 이므로 한글 grid_100 대신 정수 cell_id 를 쓴다
+    return f'{version}-{cell_id_from_key(grid_100)}' if grid_100 else str(version)
+
+
+# 같은 캐시 키를 동시에 만들려는 요청은 한 번만 build() 한다
+_flight = SingleFlight()
+
+
+def _wait_for_other_worker(cache_key):
+    """다른 워커가 같은 항목을 만드는 중이면 캐시에 올라올 때까지 기다린다. 시간 초과면 None."""
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            registry.incr(COALESCED_COUNTER)
+            return entry
+    return None
+
+
+def _build_entry(cache_key, build):
+    entry = cache.get(cache_key)  # 기다리는 동안 다른 요청이 채웠을 수 있다
+    if entry is not None:
+        return entry
+
+    lock_key = f'{cache_key}:lock'
+    locked = False
+    if settings.SINGLE_FLIGHT_CROSS_WORKER:
+        # 공유 캐시(파일/Redis 등)에서만 의미가 있다. LocMemCache 는 워커마다 따로다
+        locked = cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+        if not locked:
+            entry = _wait_for_other_worker(cache_key)
+            if entry is not None:
+                return entry
+    try:
+        entry = build()
+        cache.set(cache_key, entry, settings.GRID_RESPONSE_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return entry
+
+
+def cached_response(name, key, build, content_type='application/json'):
+    """(status, body) 를 만드는 build() 결과를 데이터셋 버전별로 캐시해 응답한다."""
+    cache_key = f'd3:{name}:{dataset_version()}:{key}'
+    entry = cache.get(cache_key)
+    if entry is None:
+        entry = _flight.do(cache_key, lambda: _build_entry(cache_key, build))
+    status, body = entry
+    response = HttpResponse(body, status=status, content_type=content_type)
+    patch_cache_control(response, public=True, max_age=settings.GRID_HTTP_MAX_AGE)
+    return response
@@ -0,0 +1,32 @@
+import os
+import time
+
+from django.conf import settings
+
+# fixbug_db 데이터셋 버전
+#
+# 데이터는 적재 스크립트를 다시 돌릴 때만 바뀌므로, 적재가 끝나면 스탬프 파일을
+# 갱신하고 각 워커는 파일의 mtime 으로 자기 캐시가 최신인지 확인한다.
+# (os.stat 한 번이므로 요청마다 확인해도 DB 를 건드리지 않는다.)
+
+
+def _stamp_file():
+    return settings.DATASET_STAMP_FILE
+
+
+def dataset_version():
+    """현재 데이터셋 버전. 스탬프 파일이 없으면 0."""
+    try:
+        return os.stat(_stamp_file()).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_dataset_version():
+    """데이터 적재 후 호출해 모든 워커의 캐시를 무효화한다."""
+    path = _stamp_file()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp, path)
+    return dataset_version()
@@ -0,0 +1,47 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+# 비동기 뷰용 DB 연결 풀
+#
+# Django 의 MySQL 백엔드에는 연결 풀이 없고, ASGI 에서는 요청마다 스레드가 바뀌어
+# 지속 연결(CONN_MAX_AGE)도 재사용되지 않는다. 그래서 DB 작업은 크기가 고정된
+# 스레드 풀에서만 실행한다. 스레드마다 자기 연결을 계속 쓰므로 풀 크기만큼의
+# 연결이 유지되고, 작업 전에 close_old_connections() 로 만료/끊긴 연결을 정리한다
+# (CONN_HEALTH_CHECKS 가 켜져 있으면 재사용 전에 연결 상태를 확인한다).
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DB_POOL_SIZE, thread_name_prefix='d3-db')
+    return _executor
+
+
+def _run_pooled(func, args, kwargs):
+    close_old_connections()
+    return func(*args, **kwargs)
+
+
+async def run_db(func, *args, **kwargs):
+    """동기 ORM 작업 func 를 DB 풀 스레드에서 실행하고 결과를 기다린다."""
+    if not settings.DB_POOL_SIZE:
+        # 풀을 끄면 Django 기본 동작 (요청 스레드의 연결 사용, 테스트 트랜잭션 공유)
+        return await sync_to_async(func)(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    # run_in_executor 는 contextvar 를 넘기지 않으므로 요청 컨텍스트(지표 등)를 복사해 실행
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(context.run, _run_pooled, func, args, kwargs))
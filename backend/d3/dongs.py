@@ -0,0 +1,85 @@
+import json
+
+# 격자 → 행정동 매핑과 행정동별 월 집계
+#
+# 프론트엔드는 페이지를 열 때마다 모든 격자 중심을 모든 행정동 폴리곤과
+# d3.geoContains 로 비교했다. 여기서는 적재 때 한 번만 포함 판정을 하고,
+# 폴리곤마다 경계 상자를 먼저 비교해 실제 판정 횟수를 줄인다.
+# (대전 행정동 수십 개 규모라 R-tree 대신 경계 상자 목록으로 충분하다.)
+#
+# 학습 쪽 평가 (ai_model/hahaboy/project/dongs.py) 에 판정 부분의 고정 사본이 있다.
+# _ring_contains / _bounds / DongLocator 를 고치면 그쪽도 같이 고친다 (test_dongs.py 가 비교).
+
+
+def _ring_contains(ring, x, y):
+    """짝홀(ray casting) 규칙으로 점이 고리 안에 있는지 판정한다."""
+    inside = False
+    x1, y1 = ring[-1][0], ring[-1][1]
+    for point in ring:
+        x2, y2 = point[0], point[1]
+        if (y2 > y) != (y1 > y) and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _bounds(ring):
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class DongLocator:
+    """GeoJSON (Multi)Polygon 행정동 목록에서 점이 속한 행정동을 찾는다."""
+
+    def __init__(self, features):
+        self.codes = []
+        self.names = []
+        self._polygons = []  # (경계 상자, [외곽, 구멍...], 행정동 번호)
+        for i, feature in enumerate(features):
+            props = feature.get('properties') or {}
+            self.codes.append(str(props.get('code') or props.get('ADM_CD') or i))
+            self.names.append(props.get('name') or props.get('EMD_KOR_NM') or '')
+            geometry = feature['geometry']
+            polygons = geometry['coordinates']
+            if geometry['type'] == 'Polygon':
+                polygons = [polygons]
+            for rings in polygons:
+                self._polygons.append((_bounds(rings[0]), rings, i))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['features'])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def locate(self, longitude, latitude):
+        """(경도, 위도) 가 속한 행정동 번호. 어느 행정동에도 없으면 None."""
+        for (west, south, east, north), rings, i in self._polygons:
+            if not (west <= longitude <= east and south <= latitude <= north):
+                continue
+            if _ring_contains(rings[0], longitude, latitude) and \
+                    not any(_ring_contains(hole, longitude, latitude) for hole in rings[1:]):
+                return i
+        return None
+
+
+def aggregate_month(dong_by_cell, values, population_by_cell):
+    """한 달 격자 값(cell_id → (실제값, 예측값))을 행정동 번호별 집계로 묶는다.
+
+    반환: 행정동 번호 → dict(cells, predicted, actual, false_positive, population)
+    """
+    stats = {}
+    for cell_id, dong in dong_by_cell.items():
+        entry = stats.get(dong)
+        if entry is None:
+            entry = stats[dong] = dict(cells=0, predicted=0, actual=0, false_positive=0, population=0)
+        actual, predicted = values.get(cell_id, (0, 0))
+        entry['cells'] += 1
+        entry['predicted'] += 1 if predicted else 0
+        entry['actual'] += 1 if actual else 0
+        entry['false_positive'] += 1 if predicted and not actual else 0
+        entry['population'] += population_by_cell.get(cell_id) or 0
+    return stats
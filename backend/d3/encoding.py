@@ -0,0 +1,57 @@
+import struct
+import sys
+from array import array
+
+# 영역 조회(bbox) 응답의 바이너리 인코딩
+#
+# 헤더 12바이트 (little-endian):
+#   magic   4s   b'GRDB'
+#   version H    1
+#   columns H    뒤따르는 컬럼 수 (4)
+#   count   I    격자 수
+# 본문: 컬럼마다 count 개 값이 연속으로 저장된다.
+#   cell_id          int32
+#   longitude (y)    float32
+#   latitude  (x)    float32
+#   total_population int32 (값이 없으면 -1)
+
+BBOX_MAGIC = b'GRDB'
+BBOX_VERSION = 1
+BBOX_HEADER = struct.Struct('<4sHHI')
+BBOX_COLUMNS = (
+    ('cell_id', 'i'),
+    ('y', 'f'),
+    ('x', 'f'),
+    ('total_population', 'i'),
+)
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+
+
+def pack_bbox(index, rows):
+    """GridIndex 의 행 번호 목록을 바이너리 응답 본문으로 만든다."""
+    parts = [BBOX_HEADER.pack(BBOX_MAGIC, BBOX_VERSION, len(BBOX_COLUMNS), len(rows))]
+    for field, typecode in BBOX_COLUMNS:
+        missing = -1 if typecode == 'i' else float('nan')
+        values = array(typecode, (missing if value is None else value for value in index.take(field, rows)))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        parts.append(values.tobytes())
+    return b''.join(parts)
+
+
+def unpack_bbox(payload):
+    """pack_bbox 의 역변환. {필드: 값 목록} 을 반환한다."""
+    magic, version, columns, count = BBOX_HEADER.unpack_from(payload)
+    if magic != BBOX_MAGIC or version != BBOX_VERSION:
+        raise ValueError('알 수 없는 bbox 바이너리 형식입니다.')
+    offset = BBOX_HEADER.size
+    data = {}
+    for field, typecode in BBOX_COLUMNS[:columns]:
+        values = array(typecode)
+        size = values.itemsize * count
+        values.frombytes(payload[offset:offset + size])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        data[field] = values.tolist()
+        offset += size
+    return data
@@ -0,0 +1,154 @@
+import math
+
+# 국가지점번호 100m 격자 (UTM-K, EPSG:5179) 좌표 변환
+#
+# grid_100 키는 "다마847996" 형태로, 앞의 두 글자가 100km 구역(동서/남북),
+# 뒤의 여섯 자리가 구역 안의 100m 단위 동서/남북 위치이다.
+# 위경도를 UTM-K 로 투영한 뒤 100m 로 내림하면 DB 조회 없이 키를 계산할 수 있다.
+
+_A = 6378137.0                      # GRS80 장반경
+_F = 1 / 298.257222101              # GRS80 편평률
+_E2 = _F * (2 - _F)
+_EP2 = _E2 / (1 - _E2)
+_K0 = 0.9996
+_LON0 = math.radians(127.5)
+_LAT0 = math.radians(38.0)
+_FALSE_EASTING = 1000000.0
+_FALSE_NORTHING = 2000000.0
+
+CELL_SIZE = 100                     # 격자 한 변 (m)
+ZONE_SIZE = 100000                  # 문자 한 칸이 나타내는 구역 크기 (m)
+ZONE_LETTERS = '가나다라마바사'
+EASTING_ORIGIN = 700000             # '가' 구역의 시작 동서 좌표
+NORTHING_ORIGIN = 1300000           # '가' 구역의 시작 남북 좌표
+
+# cell_id = 동서 100m 인덱스 * CELL_ID_STRIDE + 남북 100m 인덱스
+CELL_ID_STRIDE = 100000
+
+_M1 = 1 - _E2 / 4 - 3 * _E2 ** 2 / 64 - 5 * _E2 ** 3 / 256
+_M2 = 3 * _E2 / 8 + 3 * _E2 ** 2 / 32 + 45 * _E2 ** 3 / 1024
+_M3 = 15 * _E2 ** 2 / 256 + 45 * _E2 ** 3 / 1024
+_M4 = 35 * _E2 ** 3 / 3072
+
+
+def _meridian_arc(phi):
+    return _A * (_M1 * phi - _M2 * math.sin(2 * phi)
+                 + _M3 * math.sin(4 * phi) - _M4 * math.sin(6 * phi))
+
+
+_ARC_LAT0 = _meridian_arc(_LAT0)
+
+
+def to_utmk(longitude, latitude):
+    """위경도(도)를 UTM-K 평면좌표 (easting, northing) 미터로 변환한다."""
+    phi = math.radians(latitude)
+    sin_phi = math.sin(phi)
+    cos_phi = math.cos(phi)
+    tan_phi = sin_phi / cos_phi
+
+    n = _A / math.sqrt(1 - _E2 * sin_phi * sin_phi)
+    t = tan_phi * tan_phi
+    c = _EP2 * cos_phi * cos_phi
+    a = (math.radians(longitude) - _LON0) * cos_phi
+
+    easting = _FALSE_EASTING + _K0 * n * (
+        a
+        + (1 - t + c) * a ** 3 / 6
+        + (5 - 18 * t + t * t + 72 * c - 58 * _EP2) * a ** 5 / 120
+    )
+    northing = _FALSE_NORTHING + _K0 * (
+        _meridian_arc(phi) - _ARC_LAT0
+        + n * tan_phi * (
+            a * a / 2
+            + (5 - t + 9 * c + 4 * c * c) * a ** 4 / 24
+            + (61 - 58 * t + t * t + 600 * c - 330 * _EP2) * a ** 6 / 720
+        )
+    )
+    return easting, northing
+
+
+_E1 = (1 - math.sqrt(1 - _E2)) / (1 + math.sqrt(1 - _E2))
+
+
+def from_utmk(easting, northing):
+    """UTM-K 평면좌표 (easting, northing) 미터를 위경도(도) (longitude, latitude) 로 변환한다."""
+    mu = (_ARC_LAT0 + (northing - _FALSE_NORTHING) / _K0) / (_A * _M1)
+    phi1 = (mu
+            + (3 * _E1 / 2 - 27 * _E1 ** 3 / 32) * math.sin(2 * mu)
+            + (21 * _E1 ** 2 / 16 - 55 * _E1 ** 4 / 32) * math.sin(4 * mu)
+            + (151 * _E1 ** 3 / 96) * math.sin(6 * mu)
+            + (1097 * _E1 ** 4 / 512) * math.sin(8 * mu))
+    sin_phi1 = math.sin(phi1)
+    cos_phi1 = math.cos(phi1)
+    tan_phi1 = sin_phi1 / cos_phi1
+
+    w = 1 - _E2 * sin_phi1 * sin_phi1
+    n1 = _A / math.sqrt(w)
+    r1 = _A * (1 - _E2) / (w * math.sqrt(w))
+    t1 = tan_phi1 * tan_phi1
+    c1 = _EP2 * cos_phi1 * cos_phi1
+    d = (easting - _FALSE_EASTING) / (n1 * _K0)
+
+    phi = phi1 - (n1 * tan_phi1 / r1) * (
+        d * d / 2
+        - (5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * _EP2) * d ** 4 / 24
+        + (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * _EP2 - 3 * c1 * c1) * d ** 6 / 720
+    )
+    lam = _LON0 + (
+        d
+        - (1 + 2 * t1 + c1) * d ** 3 / 6
+        + (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * _EP2 + 24 * t1 * t1) * d ** 5 / 120
+    ) / cos_phi1
+    return math.degrees(lam), math.degrees(phi)
+
+
+def cell_id_from_index(col, row):
+    return col * CELL_ID_STRIDE + row
+
+
+def cell_index(cell_id):
+    """cell_id 를 (동서, 남북) 100m 인덱스로 되돌린다."""
+    return divmod(cell_id, CELL_ID_STRIDE)
+
+
+def lonlat_from_cell_id(cell_id):
+    """cell_id 격자 중심의 (경도, 위도)."""
+    col, row = cell_index(cell_id)
+    return from_utmk((col + 0.5) * CELL_SIZE, (row + 0.5) * CELL_SIZE)
+
+
+def cell_id_from_lonlat(longitude, latitude):
+    """좌표가 속한 100m 격자의 cell_id 를 계산한다."""
+    easting, northing = to_utmk(longitude, latitude)
+    return cell_id_from_index(int(easting // CELL_SIZE), int(northing // CELL_SIZE))
+
+
+def cell_id_from_key(grid_100):
+    """'다마847996' 형태의 grid_100 키를 cell_id 로 변환한다. 형식이 틀리면 None."""
+    if not grid_100 or len(grid_100) != 8:
+        return None
+    east_zone = ZONE_LETTERS.find(grid_100[0])
+    north_zone = ZONE_LETTERS.find(grid_100[1])
+    digits = grid_100[2:]
+    if east_zone < 0 or north_zone < 0 or not digits.isdigit():
+        return None
+    per_zone = ZONE_SIZE // CELL_SIZE
+    col = (EASTING_ORIGIN // CELL_SIZE) + east_zone * per_zone + int(digits[:3])
+    row = (NORTHING_ORIGIN // CELL_SIZE) + north_zone * per_zone + int(digits[3:])
+    return cell_id_from_index(col, row)
+
+
+def key_from_cell_id(cell_id):
+    """cell_id 를 grid_100 키로 변환한다. 문자 구역 밖이면 None."""
+    col, row = cell_index(cell_id)
+    per_zone = ZONE_SIZE // CELL_SIZE
+    east_zone, east = divmod(col - EASTING_ORIGIN // CELL_SIZE, per_zone)
+    north_zone, north = divmod(row - NORTHING_ORIGIN // CELL_SIZE, per_zone)
+    if not (0 <= east_zone < len(ZONE_LETTERS) and 0 <= north_zone < len(ZONE_LETTERS)):
+        return None
+    return f"{ZONE_LETTERS[east_zone]}{ZONE_LETTERS[north_zone]}{east:03d}{north:03d}"
+
+
+def key_from_lonlat(longitude, latitude):
+    """좌표가 속한 100m 격자의 grid_100 키를 계산한다."""
+    return key_from_cell_id(cell_id_from_lonlat(longitude, latitude))
@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .log import log_error
+from .metrics import registry
+
+# 학습된 모델 온라인 추론 (마이크로배치)
+#
+# 모델은 워커마다 한 번, 추론 스레드가 처음 배치를 돌릴 때 읽는다. 요청은 입력을
+# 큐에 넣고 결과를 기다리고, 추론 스레드가 첫 입력이 들어온 뒤
+# INFERENCE_MAX_WAIT_MS 안에 온 입력을 INFERENCE_MAX_BATCH 개까지 모아 모델을 한 번
+# 돌린다. 동시 요청이 많을수록 배치가 커지고, 대기 시간은 최대 대기 + 배치 하나로 묶인다.
+# 큐가 INFERENCE_QUEUE_SIZE 를 넘으면 바로 거절(503)해 지연이 쌓이지 않게 한다.
+
+BATCHES_COUNTER = 'inference_batches_total'
+SAMPLES_COUNTER = 'inference_samples_total'
+REJECTED_COUNTER = 'inference_rejected_total'
+
+
+class ModelUnavailable(Exception):
+    """모델 파일이나 추론 라이브러리(torch/tensorflow)가 없다."""
+
+
+class Overloaded(Exception):
+    """추론 큐가 가득 찼다."""
+
+
+class Model:
+    """predict(batch) → {출력 이름: (batch, ...) 배열}. batch 는 (n, *input_shape) float32."""
+
+    def __init__(self, predict, input_shape, outputs):
+        self.predict = predict
+        self.input_shape = tuple(input_shape)
+        self.outputs = tuple(outputs)
+
+
+def _load_scaler(path):
+    # 학습 스크립트가 저장한 StandardScaler 평균/표준편차와 입력 모양
+    meta = np.load(path)
+    return meta['mean'].astype(np.float32), meta['scale'].astype(np.float32), meta
+
+
+def load_torchscript(config):
+    """train_eval_transformer.py 가 저장한 TransformerClassifier (TorchScript + 스케일러)."""
+    try:
+        import torch
+    except ImportError:
+        raise ModelUnavailable('torch 가 설치되어 있지 않습니다.')
+    if not os.path.exists(config['path']):
+        raise ModelUnavailable(f"모델 파일이 없습니다: {config['path']}")
+
+    module = torch.jit.load(config['path'], map_location='cpu').eval()
+    mean, scale, meta = _load_scaler(config['meta'])
+    threshold = float(meta['threshold'])
+
+    def predict(batch):
+        batch = (batch - mean) / scale
+        with torch.inference_mode():
+            score = module(torch.from_numpy(batch)).numpy()
+        return {'score': score, 'predicted': (score >= threshold).astype(np.int8)}
+
+    return Model(predict, (int(meta['seq_len']), int(meta['feat_dim'])), ('score', 'predicted'))
+
+
+def load_keras(config):
+    """train_eval_convLSTM.py 가 저장한 ConvLSTM 다중 출력 모델 (reg, cls)."""
+    try:
+        import tensorflow as tf
+    except ImportError:
+        raise ModelUnavailable('tensorflow 가 설치되어 있지 않습니다.')
+    if not os.path.exists(config['path']):
+        raise ModelUnavailable(f"모델 파일이 없습니다: {config['path']}")
+
+    # 학습용 focal loss 는 추론에 필요 없으므로 compile=False
+    model = tf.keras.models.load_model(config['path'], compile=False)
+    # 정적 피처 (H, W, S) 는 요청마다 보내지 않고 모델과 같이 배포한 파일에서 읽는다
+    static = None
+    if len(model.inputs) > 1:
+        if not os.path.exists(config.get('static', '')):
+            raise ModelUnavailable(f"정적 피처 파일이 없습니다: {config.get('static')}")
+        static = np.load(config['static'])
+
+    def predict(batch):
+        # model.predict 는 호출마다 데이터 파이프라인을 만들어 작은 배치에서 느리다
+        inputs = batch if static is None else [batch, np.broadcast_to(static, (len(batch), *static.shape))]
+        reg, cls = model(inputs, training=False)
+        return {'reg': reg.numpy()[..., 0], 'cls': cls.numpy()[..., 0]}
+
+    # 완전 합성곱 모델은 공간 크기가 None — 배포한 격자 크기 (정적 피처 H, W) 로 받는다
+    input_shape = tuple(model.inputs[0].shape[1:])
+    if static is not None:
+        input_shape = (input_shape[0], *static.shape[:2], input_shape[-1])
+    return Model(predict, input_shape, ('reg', 'cls'))
+
+
+def load_python(config):
+    """config['factory'] 경로의 함수가 Model 을 만든다 (numpy 모델 등)."""
+    return import_string(config['factory'])(config)
+
+
+LOADERS = {
+    'torchscript': load_torchscript,
+    'keras': load_keras,
+    'python': load_python,
+}
+
+
+class MicroBatcher:
+    """submit(inputs) 로 넣은 입력을 모아 load() 가 만든 모델에 한 번에 넣는다."""
+
+    def __init__(self, load, max_batch, max_wait, max_queue):
+        self._load = load
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._model = None
+        self._carry = None  # 이전 배치에 넣지 못한 입력
+
+    def submit(self, inputs):
+        """inputs: (n, *input_shape) 배열. 출력 이름 → (n, ...) 배열을 돌려줄 Future."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='d3-inference', daemon=True)
+                    self._thread.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((inputs, future))
+        except queue.Full:
+            registry.incr(REJECTED_COUNTER)
+            raise Overloaded('추론 요청이 너무 많습니다. 잠시 후 다시 시도하세요.')
+        return future
+
+    def _next_batch(self):
+        first = self._carry or self._queue.get()
+        self._carry = None
+        items, size = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(item[0]) > self.max_batch:
+                self._carry = item
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._next_batch()
+            # 기다리다 포기한 요청은 뺀다
+            items = [(inputs, future) for inputs, future in items if future.set_running_or_notify_cancel()]
+            if items:
+                self._run_batch(items)
+
+    def _get_model(self):
+        if self._model is None:
+            self._model = self._load()
+        return self._model
+
+    def _run_batch(self, items):
+        try:
+            model = self._get_model()
+        except Exception as e:
+            # 모델이 없으면 다음 배치에서 다시 읽어 본다 (파일을 나중에 배포한 경우)
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        accepted = []
+        for inputs, future in items:
+            if inputs.shape[1:] != model.input_shape:
+                future.set_exception(ValueError(
+                    f'입력 모양이 {list(inputs.shape[1:])} 입니다. {list(model.input_shape)} 이어야 합니다.'))
+            else:
+                accepted.append((inputs, future))
+        if not accepted:
+            return
+
+        batch = np.concatenate([inputs for inputs, _ in accepted]) if len(accepted) > 1 else accepted[0][0]
+        try:
+            outputs = model.predict(batch)
+        except Exception as e:
+            log_error('inference_error', batch=len(batch))
+            for _, future in accepted:
+                future.set_exception(e)
+            return
+        registry.incr(BATCHES_COUNTER)
+        registry.incr(SAMPLES_COUNTER, len(batch))
+
+        offset = 0
+        for inputs, future in accepted:
+            n = len(inputs)
+            future.set_result({name: values[offset:offset + n] for name, values in outputs.items()})
+            offset += n
+
+
+_lock = threading.Lock()
+_batchers = {}
+
+
+def get_batcher(name):
+    """INFERENCE_MODELS[name] 의 배처 (워커당 하나). 설정에 없는 이름이면 KeyError."""
+    batcher = _batchers.get(name)
+    if batcher is not None:
+        return batcher
+    config = settings.INFERENCE_MODELS[name]
+    with _lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = _batchers[name] = MicroBatcher(
+                lambda: LOADERS[config['kind']](config),
+                max_batch=config.get('max_batch', settings.INFERENCE_MAX_BATCH),
+                max_wait=config.get('max_wait_ms', settings.INFERENCE_MAX_WAIT_MS) / 1000,
+                max_queue=settings.INFERENCE_QUEUE_SIZE,
+            )
+    return batcher
+
+
+def reset_batchers():
+    # 추론 스레드는 fork 를 넘어가지 않으므로 자식 워커는 새로 만든다
+    global _lock, _batchers
+    _lock = threading.Lock()
+    _batchers = {}
+
+
+os.register_at_fork(after_in_child=reset_batchers)
@@ -0,0 +1,28 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+# 구조화 로그 (한 줄 JSON)
+#
+# 요청마다 찍던 print() 대신 쓴다. 정상 경로 로그는 D3_LOG_SAMPLE_RATE 비율만
+# 남기고, 오류는 항상 남긴다.
+
+logger = logging.getLogger('d3')
+
+
+def _format(event, fields):
+    return json.dumps({'event': event, **fields}, ensure_ascii=False, default=str)
+
+
+def log_sampled(event, **fields):
+    rate = settings.D3_LOG_SAMPLE_RATE
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(_format(event, fields))
+
+
+def log_error(event, **fields):
+    logger.error(_format(event, fields), exc_info=True)
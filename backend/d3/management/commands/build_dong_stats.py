@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from d3.dataset import bump_dataset_version
+from d3.dongs import DongLocator, aggregate_month
+from d3.grid import cell_id_from_key
+from d3.models import dong_stats, fixbug_db, grid_dong, prediction, prediction_cell
+from d3.predictions import parse_month_arg, read_prediction_csv
+from d3.snapshot import refresh_snapshot
+
+
+def _table_months(model_version):
+    """prediction 테이블의 월별 값을 read_prediction_csv 와 같은 모양으로 읽는다."""
+    cells = {cell_id: (grid_100, seq, longitude, latitude) for cell_id, grid_100, seq, longitude, latitude
+             in prediction_cell.objects.values_list('cell_id', 'grid_100', 'seq', 'longitude', 'latitude')}
+    months = {}
+    rows = prediction.objects.filter(model_version=model_version) \
+        .values_list('year_month', 'cell_id', 'actual', 'predicted', 'score')
+    for year_month, cell_id, actual, predicted, score in rows.iterator(chunk_size=5000):
+        meta = cells.get(cell_id)
+        if meta is not None:
+            months.setdefault(year_month, {})[cell_id] = meta + (actual, predicted, score)
+    return dict(sorted(months.items()))
+
+
+class Command(BaseCommand):
+    help = '격자 → 행정동 매핑과 행정동별 월 집계를 미리 계산해 저장한다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--geojson', default=settings.DONG_GEOJSON_FILE, help='행정동 GeoJSON')
+        parser.add_argument('--month', action='append', default=[], metavar='YYYY-MM=CSV',
+                            help='월별 예측 CSV (ssookssook_MM.csv). 여러 번 지정 가능. '
+                                 '없으면 prediction 테이블의 모든 월을 쓴다')
+        parser.add_argument('--model-version', default=settings.PREDICTION_MODEL_VERSION)
+
+    def handle(self, geojson, month, model_version, **options):
+        started = time.perf_counter()
+        try:
+            locator = DongLocator.from_file(geojson)
+            if month:
+                months = dict(parse_month_arg(value) for value in month)
+                predictions = {m: read_prediction_csv(path) for m, path in sorted(months.items())}
+            else:
+                predictions = _table_months(model_version)
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f'입력 파일을 읽을 수 없습니다: {e}')
+
+        # 대상 격자: fixbug_db 전체 + 예측 CSV 에만 있는 격자 (좌표는 격자 중심)
+        cells = {}
+        population = {}
+        for cell_id, grid_100, latitude, longitude, total in fixbug_db.objects.values_list(
+                'cell_id', 'grid_100', 'x', 'y', 'total_population').iterator(chunk_size=2000):
+            cell_id = cell_id if cell_id is not None else cell_id_from_key(grid_100)
+            if cell_id is None or latitude is None or longitude is None:
+                continue
+            cells[cell_id] = (grid_100, longitude, latitude)
+            population[cell_id] = total
+        for values in predictions.values():
+            for cell_id, (grid_100, _, longitude, latitude, *_) in values.items():
+                cells.setdefault(cell_id, (grid_100, longitude, latitude))
+
+        # 포함 판정은 격자마다 한 번
+        dong_by_cell = {}
+        for cell_id, (_, longitude, latitude) in cells.items():
+            dong = locator.locate(longitude, latitude)
+            if dong is not None:
+                dong_by_cell[cell_id] = dong
+        self.stdout.write(f'{len(cells)}개 격자 중 {len(dong_by_cell)}개를 {len(locator)}개 행정동에 배정')
+
+        stats_rows = []
+        for year_month, values in predictions.items():
+            values = {cell_id: (actual, predicted)
+                      for cell_id, (*_, actual, predicted, _) in values.items()}
+            for dong, entry in sorted(aggregate_month(dong_by_cell, values, population).items()):
+                stats_rows.append(dong_stats(
+                    dong_code=locator.codes[dong], dong_name=locator.names[dong],
+                    year_month=year_month, predicted_ratio=entry['predicted'] / entry['cells'],
+                    **entry))
+
+        with transaction.atomic():
+            grid_dong.objects.all().delete()
+            grid_dong.objects.bulk_create(
+                [grid_dong(cell_id=cell_id, grid_100=cells[cell_id][0],
+                           dong_code=locator.codes[dong], dong_name=locator.names[dong])
+                 for cell_id, dong in dong_by_cell.items()], batch_size=2000)
+            if predictions:
+                dong_stats.objects.filter(year_month__in=list(predictions)).delete()
+                dong_stats.objects.bulk_create(stats_rows, batch_size=2000)
+
+        refresh_snapshot()  # GRID_SNAPSHOT_ENABLED 일 때만
+        bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'완료: 월 {len(predictions)}개, 집계 {len(stats_rows)}행, '
+            f'{time.perf_counter() - started:.2f}초'))
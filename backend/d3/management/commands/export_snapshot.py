@@ -0,0 +1,29 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from d3.dataset import bump_dataset_version
+from d3.snapshot import Snapshot, export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'fixbug_db, 예측값, 행정동 집계를 읽기 전용 mmap 스냅샷으로 내보내고 current 를 교체한다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.GRID_SNAPSHOT_DIR, help='스냅샷 디렉터리')
+        parser.add_argument('--keep', type=int, default=settings.GRID_SNAPSHOT_KEEP,
+                            help='남겨 둘 이전 스냅샷 수')
+
+    def handle(self, dir, keep, **options):
+        started = time.perf_counter()
+        path = export_snapshot(dir, keep)
+        # 워커는 데이터셋 버전이 바뀌면 current 를 다시 연다
+        bump_dataset_version()
+
+        snapshot = Snapshot(path)
+        months = sum(len(m) for m in snapshot.predictions.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'완료: {path} ({os.path.getsize(path) / 1e6:.1f}MB), 격자 {snapshot.tables["grid"]["count"]}개, '
+            f'예측 월 {months}개, {time.perf_counter() - started:.2f}초'))
@@ -0,0 +1,112 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from d3.dataset import bump_dataset_version
+from d3.grid import cell_id_from_key
+from d3.models import GRID_FIELDS, fixbug_db
+from d3.snapshot import refresh_snapshot
+
+# CSV 컬럼 순서 (헤더 없는 기존 적재 파일과 동일) = GRID_FIELDS
+STRING_FIELDS = ('grid_100', 'h_area', 'b_area', 'g_area', 'city', 'h_a_area')
+FLOAT_FIELDS = ('x', 'y')
+NULLABLE_FIELDS = ('g_area',)
+
+
+def _to_int(value):
+    value = value.strip()
+    if not value:
+        return None
+    return int(float(value))
+
+
+def _to_float(value):
+    value = value.strip()
+    return float(value) if value else None
+
+
+def parse_row(row):
+    """CSV 한 줄을 fixbug_db 인스턴스로 변환한다. 잘못된 값이면 ValueError."""
+    if len(row) < len(GRID_FIELDS):
+        raise ValueError(f'컬럼 수가 부족합니다 ({len(row)} < {len(GRID_FIELDS)})')
+    values = {}
+    for field, raw in zip(GRID_FIELDS, row):
+        if field in STRING_FIELDS:
+            raw = raw.strip()
+            values[field] = raw if raw or field not in NULLABLE_FIELDS else None
+        elif field in FLOAT_FIELDS:
+            values[field] = _to_float(raw)
+        else:
+            values[field] = _to_int(raw)
+    cell_id = cell_id_from_key(values['grid_100'])
+    if cell_id is None:
+        raise ValueError(f"grid_100 형식이 올바르지 않습니다: {values['grid_100']!r}")
+    return fixbug_db(cell_id=cell_id, **values)
+
+
+class Command(BaseCommand):
+    help = '격자 CSV 를 fixbug_db 에 청크 단위로 upsert 한다 (다시 실행해도 안전).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--header', action='store_true', help='첫 줄이 헤더면 건너뛴다')
+        parser.add_argument('--strict', action='store_true', help='잘못된 행이 있으면 중단한다')
+
+    def handle(self, csv_path, chunk_size, encoding, header, strict, **options):
+        update_fields = [f for f in GRID_FIELDS if f != 'grid_100'] + ['cell_id']
+        # MySQL 은 ON DUPLICATE KEY UPDATE 라 충돌 대상 컬럼을 지정하지 않는다
+        unique_fields = ['grid_100'] if connection.features.supports_update_conflicts_with_target else None
+
+        loaded = skipped = 0
+        started = time.perf_counter()
+
+        def flush(chunk):
+            with transaction.atomic():
+                fixbug_db.objects.bulk_create(
+                    chunk, update_conflicts=True,
+                    unique_fields=unique_fields, update_fields=update_fields,
+                )
+
+        try:
+            f = open(csv_path, encoding=encoding, newline='')
+        except OSError as e:
+            raise CommandError(f'CSV 파일을 열 수 없습니다: {e}')
+
+        with f:
+            reader = csv.reader(f)
+            if header:
+                next(reader, None)
+            chunk = []
+            for line_no, row in enumerate(reader, start=2 if header else 1):
+                if not row:  # 빈 행 건너뛰기
+                    continue
+                try:
+                    chunk.append(parse_row(row))
+                except ValueError as e:
+                    if strict:
+                        raise CommandError(f'{line_no}행: {e}')
+                    skipped += 1
+                    if skipped <= 10:
+                        self.stderr.write(f'{line_no}행 건너뜀: {e}')
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    loaded += len(chunk)
+                    chunk = []
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'{loaded}행 적재 ({loaded / elapsed:.0f}행/초)')
+            if chunk:
+                flush(chunk)
+                loaded += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        refresh_snapshot()  # GRID_SNAPSHOT_ENABLED 일 때만
+        bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'완료: {loaded}행 적재, {skipped}행 건너뜀, {elapsed:.2f}초 '
+            f'({loaded / elapsed if elapsed else 0:.0f}행/초)'))
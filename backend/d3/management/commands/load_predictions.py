@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from d3.dataset import bump_dataset_version
+from d3.models import prediction, prediction_cell
+from d3.predictions import parse_month_arg, read_prediction_csv
+from d3.snapshot import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = '월별 예측 CSV (ssookssook_MM.csv) 를 prediction 테이블에 upsert 한다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', required=True, metavar='YYYY-MM=CSV',
+                            help='월별 예측 CSV. 여러 번 지정 가능')
+        parser.add_argument('--model-version', default=settings.PREDICTION_MODEL_VERSION)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, month, model_version, batch_size, **options):
+        started = time.perf_counter()
+        try:
+            months = dict(parse_month_arg(value) for value in month)
+            data = {m: read_prediction_csv(path) for m, path in sorted(months.items())}
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f'예측 CSV 를 읽을 수 없습니다: {e}')
+
+        cells = {}
+        for values in data.values():
+            for cell_id, (grid_100, seq, longitude, latitude, *_) in values.items():
+                cells.setdefault(cell_id, prediction_cell(
+                    cell_id=cell_id, grid_100=grid_100, seq=seq,
+                    latitude=latitude, longitude=longitude))
+
+        # MySQL 은 ON DUPLICATE KEY UPDATE 라 충돌 대상 컬럼을 지정하지 않는다
+        with_target = connection.features.supports_update_conflicts_with_target
+        loaded = 0
+        with transaction.atomic():
+            prediction_cell.objects.bulk_create(
+                list(cells.values()), batch_size=batch_size, update_conflicts=True,
+                unique_fields=['cell_id'] if with_target else None,
+                update_fields=['grid_100', 'seq', 'latitude', 'longitude'])
+            for year_month, values in data.items():
+                rows = [prediction(cell_id=cell_id, year_month=year_month, model_version=model_version,
+                                   actual=actual, predicted=predicted, score=score)
+                        for cell_id, (*_, actual, predicted, score) in values.items()]
+                prediction.objects.bulk_create(
+                    rows, batch_size=batch_size, update_conflicts=True,
+                    unique_fields=['cell_id', 'year_month', 'model_version'] if with_target else None,
+                    update_fields=['actual', 'predicted', 'score'])
+                loaded += len(rows)
+                self.stdout.write(f'{year_month}: {len(rows)}행')
+
+        refresh_snapshot()  # GRID_SNAPSHOT_ENABLED 일 때만
+        bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'완료: 모델 {model_version}, 격자 {len(cells)}개, 예측 {loaded}행, '
+            f'{time.perf_counter() - started:.2f}초'))
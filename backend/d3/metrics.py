@@ -0,0 +1,235 @@
+import atexit
+import bisect
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+# 요청 지표 레지스트리 (경로별 지연 히스토그램, DB 쿼리 수/시간, 응답 크기)
+#
+# gunicorn 워커는 메모리를 공유하지 않으므로 워커마다 메모리에 누적하고,
+# 백그라운드 스레드가 METRICS_FLUSH_INTERVAL 초마다 METRICS_DIR 에 워커별 스냅샷을
+# 쓴다. /metrics 는 디렉터리의 스냅샷을 모두 합산해 Prometheus 텍스트로 내보낸다.
+# 요청 경로에서는 잠금 한 번과 리스트 갱신만 한다.
+# 워커가 정상 종료하면 자기 스냅샷을 지우고, 비정상 종료로 남은 파일은 METRICS_STALE_AFTER
+# 초 넘게 갱신되지 않으면 합산에서 빼고 지운다 (죽은 워커 값이 계속 더해지지 않게).
+
+# 지연 히스토그램 버킷 상한 (초). 마지막 +Inf 버킷은 암묵적
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 경로별 누적값 리스트의 위치
+_COUNT, _SUM, _QUERIES, _DB_TIME, _BYTES, _BUCKETS = range(6)
+
+
+class RequestStats:
+    """요청 하나 동안의 DB 쿼리 수와 시간 (contextvar 로 스레드 풀까지 따라간다)."""
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+current_stats = contextvars.ContextVar('d3_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrappers 에 등록하는 쿼리 계측 래퍼."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - t0
+
+
+def install_query_hook(sender, connection, **kwargs):
+    # connection_created 시그널 수신기: 새 연결마다 래퍼를 한 번 붙인다
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher = None
+        self.routes = {}    # route → [count, sum, queries, db_time, bytes, [buckets...]]
+        self.statuses = {}  # (route, status) → count
+        self.counters = {}  # 이름 → 값 (뷰/캐시 등에서 올리는 단순 카운터)
+
+    def _start(self):
+        # 이 프로세스의 첫 기록: 스냅샷 파일 이름을 정하고 저장 스레드를 띄운다
+        self._pid = os.getpid()
+        self._started = time.time_ns()
+        if metrics_dir():
+            atexit.register(self.remove)
+            self._flusher = threading.Thread(target=self._flush_loop, name='d3-metrics', daemon=True)
+            self._flusher.start()
+
+    def _after_fork(self):
+        # 마스터에서 상속한 값/잠금은 버리고 워커별로 새로 센다
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher = None
+        self.routes = {}
+        self.statuses = {}
+        self.counters = {}
+
+    def observe(self, route, status, duration, queries, db_time, size):
+        with self._lock:
+            if self._pid is None:
+                self._start()
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = [0, 0.0, 0, 0.0, 0, [0] * (len(LATENCY_BUCKETS) + 1)]
+            entry[_COUNT] += 1
+            entry[_SUM] += duration
+            entry[_QUERIES] += queries
+            entry[_DB_TIME] += db_time
+            entry[_BYTES] += size
+            entry[_BUCKETS][bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            key = (route, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def incr(self, name, value=1):
+        with self._lock:
+            if self._pid is None:
+                self._start()
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'routes': {route: entry[:_BUCKETS] + [list(entry[_BUCKETS])]
+                           for route, entry in self.routes.items()},
+                'statuses': [[route, status, count] for (route, status), count in self.statuses.items()],
+                'counters': dict(self.counters),
+            }
+
+    def flush(self):
+        """이 워커의 스냅샷을 METRICS_DIR 에 원자적으로 쓴다."""
+        directory = metrics_dir()
+        if not directory or self._pid is None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = self._path(directory)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def remove(self):
+        """이 워커의 스냅샷을 지운다 (워커 종료 시 atexit)."""
+        directory = metrics_dir()
+        # fork 전에 등록된 핸들러가 자식에서 불려도 부모의 파일은 건드리지 않는다
+        if not directory or self._pid != os.getpid():
+            return
+        try:
+            os.remove(self._path(directory))
+        except OSError:
+            pass
+
+    def _path(self, directory):
+        return os.path.join(directory, f'worker-{self._pid}-{self._started}.json')
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry._after_fork)
+
+
+def metrics_dir():
+    return settings.METRICS_DIR
+
+
+def merge(snapshots):
+    """여러 워커의 스냅샷을 합산한다."""
+    routes, statuses, counters = {}, {}, {}
+    for snap in snapshots:
+        for route, entry in snap['routes'].items():
+            total = routes.get(route)
+            if total is None:
+                routes[route] = entry[:_BUCKETS] + [list(entry[_BUCKETS])]
+                continue
+            for i in range(_BUCKETS):
+                total[i] += entry[i]
+            total[_BUCKETS] = [a + b for a, b in zip(total[_BUCKETS], entry[_BUCKETS])]
+        for route, status, count in snap['statuses']:
+            statuses[(route, status)] = statuses.get((route, status), 0) + count
+        for name, value in snap['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+    return {'routes': routes, 'statuses': statuses, 'counters': counters}
+
+
+def collect():
+    """모든 워커 스냅샷 합계. METRICS_DIR 이 없으면 이 프로세스 값만."""
+    directory = metrics_dir()
+    if not directory:
+        return merge([registry.snapshot()])
+    registry.flush()  # 이 워커 값은 최신으로
+    # 살아 있는 워커는 METRICS_FLUSH_INTERVAL 마다 파일을 다시 쓴다
+    stale_before = time.time() - settings.METRICS_STALE_AFTER
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'worker-*.json')):
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)  # 정상 종료하지 못한 워커
+                continue
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # 쓰는 중이거나 지워진 파일
+    return merge(snapshots)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(data):
+    lines = [
+        '# HELP d3_request_duration_seconds Request latency by route.',
+        '# TYPE d3_request_duration_seconds histogram',
+    ]
+    for route, entry in sorted(data['routes'].items()):
+        label = f'route="{_label(route)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), entry[_BUCKETS]):
+            cumulative += count
+            lines.append(f'd3_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'd3_request_duration_seconds_sum{{{label}}} {entry[_SUM]}')
+        lines.append(f'd3_request_duration_seconds_count{{{label}}} {entry[_COUNT]}')
+
+    for name, index, kind, help_text in (
+            ('d3_db_queries_total', _QUERIES, 'counter', 'DB queries by route.'),
+            ('d3_db_query_seconds_total', _DB_TIME, 'counter', 'Time spent in DB queries by route.'),
+            ('d3_response_bytes_total', _BYTES, 'counter', 'Response body bytes by route.')):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for route, entry in sorted(data['routes'].items()):
+            lines.append(f'{name}{{route="{_label(route)}"}} {entry[index]}')
+
+    lines.append('# HELP d3_requests_total Requests by route and status.')
+    lines.append('# TYPE d3_requests_total counter')
+    for (route, status), count in sorted(data['statuses'].items()):
+        lines.append(f'd3_requests_total{{route="{_label(route)}",status="{status}"}} {count}')
+
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f'# TYPE d3_{name} counter')
+        lines.append(f'd3_{name} {value}')
+    return '\n'.join(lines) + '\n'
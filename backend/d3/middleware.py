@@ -0,0 +1,63 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import RequestStats, current_stats, registry
+
+# 요청 계측 미들웨어
+#
+# MiddlewareMixin 을 쓰지 않고 동기/비동기 체인 모두에 직접 붙어, ASGI 에서
+# 스레드 전환을 추가하지 않는다. MIDDLEWARE 맨 앞에 둬야 전체 처리 시간을 잰다.
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    # URL 패턴(예: api/cells/<str:grid_100>/) 으로 묶어 라벨 수를 제한한다
+    return match.route if match is not None else 'unmatched'
+
+
+def _finish(request, response, stats, started, server_timing):
+    duration = time.perf_counter() - started
+    size = 0 if response.streaming else len(response.content)
+    registry.observe(_route(request), response.status_code, duration,
+                     stats.queries, stats.db_time, size)
+    if server_timing:
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.2f}, '
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"')
+    return response
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        self.server_timing = settings.METRICS_SERVER_TIMING
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return _finish(request, response, stats, started, self.server_timing)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return _finish(request, response, stats, started, self.server_timing)
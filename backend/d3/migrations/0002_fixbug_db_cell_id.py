@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+# 이 마이그레이션 시점의 d3.grid.cell_id_from_key 복사본.
+# 나중에 d3.grid 가 바뀌어도 예전 마이그레이션을 다시 돌린 결과가 같도록 고정해 둔다.
+ZONE_LETTERS = '가나다라마바사'
+CELLS_PER_ZONE = 1000        # 100km 구역 / 100m 격자
+EASTING_ORIGIN = 7000        # '가' 구역의 시작 동서 100m 인덱스
+NORTHING_ORIGIN = 13000      # '가' 구역의 시작 남북 100m 인덱스
+CELL_ID_STRIDE = 100000
+
+
+def cell_id_from_key(grid_100):
+    if not grid_100 or len(grid_100) != 8:
+        return None
+    east_zone = ZONE_LETTERS.find(grid_100[0])
+    north_zone = ZONE_LETTERS.find(grid_100[1])
+    digits = grid_100[2:]
+    if east_zone < 0 or north_zone < 0 or not digits.isdigit():
+        return None
+    col = EASTING_ORIGIN + east_zone * CELLS_PER_ZONE + int(digits[:3])
+    row = NORTHING_ORIGIN + north_zone * CELLS_PER_ZONE + int(digits[3:])
+    return col * CELL_ID_STRIDE + row
+
+
+def backfill_cell_id(apps, schema_editor):
+    fixbug_db = apps.get_model('d3', 'fixbug_db')
+    rows = []
+    for row in fixbug_db.objects.only('grid_100').iterator(chunk_size=2000):
+        row.cell_id = cell_id_from_key(row.grid_100)
+        rows.append(row)
+    fixbug_db.objects.bulk_update(rows, ['cell_id'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d3', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixbug_db',
+            name='cell_id',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_cell_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d3', '0002_fixbug_db_cell_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='grid_dong',
+            fields=[
+                ('cell_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('grid_100', models.CharField(max_length=100)),
+                ('dong_code', models.CharField(db_index=True, max_length=20)),
+                ('dong_name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='dong_stats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dong_code', models.CharField(max_length=20)),
+                ('dong_name', models.CharField(max_length=100)),
+                ('year_month', models.CharField(max_length=7)),
+                ('cells', models.IntegerField()),
+                ('predicted', models.IntegerField()),
+                ('actual', models.IntegerField()),
+                ('false_positive', models.IntegerField()),
+                ('population', models.BigIntegerField()),
+                ('predicted_ratio', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('dong_code', 'year_month')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d3', '0003_grid_dong_dong_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='prediction_cell',
+            fields=[
+                ('cell_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('grid_100', models.CharField(max_length=100)),
+                ('seq', models.IntegerField(null=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='prediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_id', models.BigIntegerField()),
+                ('year_month', models.CharField(max_length=7)),
+                ('model_version', models.CharField(max_length=50)),
+                ('actual', models.SmallIntegerField()),
+                ('predicted', models.SmallIntegerField()),
+                ('score', models.FloatField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_version', 'year_month'], name='d3_predicti_model_v_87c4c0_idx')],
+                'unique_together': {('cell_id', 'year_month', 'model_version')},
+            },
+        ),
+    ]
@@ -1,8 +1,18 @@
 from django.db import models
 
+# get_xy 가 반환하는 필드 (순서 유지)
+GRID_FIELDS = (
+    'grid_100', 'h_area', 'b_area', 'g_area', 'city', 'h_a_area', 'x', 'y',
+    'male', 'female', 'total_population', 'kid', 'old', 'realkid', 'element',
+    'middle', 'high', 'twenty', 'thirty', 'fourty', 'fifty', 'sixty', 'seventy',
+)
+# dong_data 가 반환하는 필드
+DONG_FIELDS = ('grid_100', 'h_area', 'b_area', 'g_area')
+
 # 수강생 정보를 저장하는 모델
 class fixbug_db(models.Model):
     grid_100 = models.CharField(max_length=100, primary_key=True)
+    cell_id = models.BigIntegerField(null=True, unique=True)  # 100m 격자 정수 id (d3.grid)
     h_area = models.CharField(max_length=100)  # 행정동명
     b_area = models.CharField(max_length=255)  # 법정동명
     g_area = models.CharField(max_length=100, null=True)  # 기초구역명
@@ -26,6 +36,53 @@ class fixbug_db(models.Model):
     sixty = models.IntegerField(null=True)  # 60대 인구
     seventy = models.IntegerField(null=True)  # 70대 인구
 
+# 격자 → 행정동 매핑 (build_dong_stats 가 dong.geojson 으로 미리 계산)
+class grid_dong(models.Model):
+    cell_id = models.BigIntegerField(primary_key=True)  # 100m 격자 정수 id
+    grid_100 = models.CharField(max_length=100)
+    dong_code = models.CharField(max_length=20, db_index=True)  # 행정동 코드
+    dong_name = models.CharField(max_length=100)  # 행정동명
+
+
+# 행정동별 월 집계
+class dong_stats(models.Model):
+    dong_code = models.CharField(max_length=20)
+    dong_name = models.CharField(max_length=100)
+    year_month = models.CharField(max_length=7)  # "2024-06"
+    cells = models.IntegerField()  # 행정동 안 격자 수
+    predicted = models.IntegerField()  # 예측값 양성 격자 수
+    actual = models.IntegerField()  # 실제값 양성 격자 수
+    false_positive = models.IntegerField()  # 실제 0, 예측 1 격자 수
+    population = models.BigIntegerField()  # 총 인구 수 합
+    predicted_ratio = models.FloatField()  # predicted / cells
+
+    class Meta:
+        unique_together = ('dong_code', 'year_month')
+
+
+# 예측 격자 (격자 순서와 좌표는 한 번만 내려받도록 월별 값과 분리)
+class prediction_cell(models.Model):
+    cell_id = models.BigIntegerField(primary_key=True)  # 100m 격자 정수 id
+    grid_100 = models.CharField(max_length=100)
+    seq = models.IntegerField(null=True)  # 격자순번
+    latitude = models.FloatField()  # 위도 (격자 중심)
+    longitude = models.FloatField()  # 경도 (격자 중심)
+
+
+# 월별 모델 예측값
+class prediction(models.Model):
+    cell_id = models.BigIntegerField()
+    year_month = models.CharField(max_length=7)  # "2024-06"
+    model_version = models.CharField(max_length=50)
+    actual = models.SmallIntegerField()  # 실제값
+    predicted = models.SmallIntegerField()  # 예측값
+    score = models.FloatField(null=True)  # 시계열예측값 (없는 파일도 있음)
+
+    class Meta:
+        unique_together = ('cell_id', 'year_month', 'model_version')
+        indexes = [models.Index(fields=['model_version', 'year_month'])]
+
+
 '''
 class fixbug_data(models.Model):
     grid_100 = models.FloatField(primary_key=True)
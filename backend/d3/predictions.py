@@ -0,0 +1,92 @@
+import csv
+import re
+
+from .grid import cell_id_from_key
+from .models import prediction, prediction_cell
+from .snapshot import get_snapshot, prediction_table, snapshot_enabled
+
+# 월별 예측값 적재/조회
+#
+# 격자 순서는 cell_id 오름차순으로 고정한다. 격자 목록(id, 코드, 좌표)은
+# 한 번만 내려주고, 월 응답은 그 순서에 맞춘 실제값/예측값 배열만 담는다.
+# 스냅샷 모드(GRID_SNAPSHOT_ENABLED)에서는 DB 대신 스냅샷 파일에서 읽는다.
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# 월 배열에서 해당 월 값이 없는 격자
+MISSING = None
+
+
+def read_prediction_csv(path):
+    """ssookssook_MM.csv → {cell_id: (grid_100, 격자순번, 경도, 위도, 실제값, 예측값, 시계열예측값)}."""
+    cells = {}
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            cell_id = cell_id_from_key(row['격자100m'])
+            if cell_id is None:
+                continue
+            seq = row.get('격자순번')
+            score = row.get('시계열예측값')
+            cells[cell_id] = (
+                row['격자100m'], int(seq) if seq else None,
+                float(row['경도']), float(row['위도']),
+                int(float(row['실제값'] or 0)), int(float(row['예측값'] or 0)),
+                float(score) if score else None,
+            )
+    return cells
+
+
+def parse_month_arg(value):
+    """'2024-06=경로' → ('2024-06', '경로'). 형식이 틀리면 ValueError."""
+    month, sep, path = value.partition('=')
+    if not sep or not MONTH_PATTERN.match(month):
+        raise ValueError(f'YYYY-MM=경로 형식이어야 합니다: {value!r}')
+    return month, path
+
+
+def available_months(model_version):
+    if snapshot_enabled():
+        return list(get_snapshot().predictions.get(model_version, []))
+    return list(prediction.objects.filter(model_version=model_version)
+                .order_by('year_month').values_list('year_month', flat=True).distinct())
+
+
+def cell_order():
+    """고정 격자 순서 (cell_id 오름차순) 의 (cell_id, grid_100, 위도, 경도) 목록."""
+    if snapshot_enabled():
+        return get_snapshot().rows('prediction_cell', ('cell_id', 'grid_100', 'latitude', 'longitude'))
+    return list(prediction_cell.objects.order_by('cell_id')
+                .values_list('cell_id', 'grid_100', 'latitude', 'longitude'))
+
+
+def month_vectors(model_version, year_month, cell_ids):
+    """cell_ids 순서에 맞춘 (실제값, 예측값) 배열. 값이 없는 격자는 MISSING."""
+    position = {cell_id: i for i, cell_id in enumerate(cell_ids)}
+    actual = [MISSING] * len(cell_ids)
+    predicted = [MISSING] * len(cell_ids)
+    if snapshot_enabled():
+        # 스냅샷 값은 prediction_cell 순서 (값이 없는 격자는 None = MISSING)
+        snapshot = get_snapshot()
+        table = prediction_table(model_version, year_month)
+        rows = zip(snapshot.column('prediction_cell', 'cell_id').tolist(),
+                   snapshot.column(table, 'actual').tolist(), snapshot.column(table, 'predicted').tolist())
+    else:
+        rows = prediction.objects.filter(model_version=model_version, year_month=year_month) \
+            .values_list('cell_id', 'actual', 'predicted')
+    for cell_id, a, p in rows:
+        i = position.get(cell_id)
+        if i is not None:
+            actual[i] = a
+            predicted[i] = p
+    return actual, predicted
+
+
+def month_delta(base, target):
+    """두 월 배열 (actual, predicted) 사이에서 값이 바뀐 위치와 새 값."""
+    index, actual, predicted = [], [], []
+    for i, (a0, p0, a1, p1) in enumerate(zip(base[0], base[1], target[0], target[1])):
+        if a0 != a1 or p0 != p1:
+            index.append(i)
+            actual.append(a1)
+            predicted.append(p1)
+    return index, actual, predicted
@@ -0,0 +1,54 @@
+import json
+
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 으로 동작
+    orjson = None
+
+# d3 뷰 공용 직렬화
+#
+# 격자 응답은 dict/list/str/int/float/None 만 담으므로 orjson 으로 바로 bytes 를
+# 만들고, JsonResponse (DjangoJSONEncoder + str → bytes 인코딩) 를 거치지 않는다.
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def dumps(data):
+    """data 를 JSON bytes 로 직렬화한다. 한글은 이스케이프하지 않고 UTF-8 로 둔다."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type=JSON_CONTENT_TYPE)
+
+
+def parse_fields(value, allowed, default):
+    """'grid_100,x,y' 같은 fields= 값을 allowed 안의 필드 튜플로 바꾼다.
+
+    비어 있으면 default, 모르는 필드가 있으면 ValueError. 순서는 allowed 순서를 따른다.
+    """
+    if not value:
+        return default
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not all(isinstance(field, str) for field in value):
+        raise ValueError('fields 는 문자열 목록이어야 합니다.')
+    wanted = {field.strip() for field in value}
+    unknown = wanted.difference(allowed)
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(sorted(unknown))}")
+    return tuple(field for field in allowed if field in wanted)
+
+
+def to_columns(rows, fields):
+    """값 튜플 목록을 {필드: [값...]} 컬럼형으로 바꾼다."""
+    columns = {field: [] for field in fields}
+    appenders = [columns[field].append for field in fields]
+    for values in rows:
+        for append, value in zip(appenders, values):
+            append(value)
+    return columns
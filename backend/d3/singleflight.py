@@ -0,0 +1,54 @@
+import threading
+
+from .metrics import registry
+
+# 같은 키의 동시 요청 합치기 (single-flight)
+#
+# 같은 격자 조회가 동시에 여러 번 들어오면 첫 요청만 DB 에서 읽고
+# 나머지는 그 결과를 기다렸다가 함께 받는다. 합쳐진 요청 수는
+# d3_coalesced_requests_total 로 /metrics 에 나온다.
+
+COALESCED_COUNTER = 'coalesced_requests_total'
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """스레드(동기 뷰)용. do(key, fn) 은 같은 key 의 fn 실행이 끝나길 기다려 결과를 공유한다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            registry.incr(COALESCED_COUNTER)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
@@ -0,0 +1,299 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .dataset import dataset_version
+
+# 격자 데이터셋 스냅샷 (읽기 전용 mmap 컬럼 파일)
+#
+# export_snapshot 이 fixbug_db, 예측 격자와 월별 예측값, 행정동 집계를 파일 하나에
+# 컬럼별로 쓴다. 워커는 파일을 읽기 전용으로 mmap 해 numpy 배열로 바로 보므로 (복사 없음)
+# 워커가 몇 개든 페이지 캐시 한 벌을 함께 쓰고, 기동 때 DB 전체를 읽지 않는다.
+#
+# 파일 형식 (little-endian):
+#   magic    8s  b'D3SNAP01'
+#   length   Q   manifest JSON 바이트 수
+#   manifest     {"version", "arrays": {이름: [dtype, offset, count]},
+#                 "tables": {테이블: {"count": n, "columns": {컬럼: 종류}}},
+#                 "predictions": {모델 버전: [월, ...]}}
+#   배열         manifest 뒤 ARRAY_ALIGN 경계부터. offset 은 그 위치 기준
+# 테이블 컬럼은 배열 이름으로 구분한다: '테이블.컬럼' (int/float 값),
+# '테이블.컬럼.offsets' + '.data' (str, utf-8), '테이블.컬럼.null' (None 이 있을 때만).
+#
+# 교체: 새 파일을 다 쓴 뒤 current 심볼릭 링크를 os.replace 로 바꾸고 데이터셋 버전을
+# 올린다. 워커는 다음 요청에서 새 파일을 연다. 이전 파일은 지워져도 열려 있는 mmap 은 유효하다.
+
+MAGIC = b'D3SNAP01'
+HEADER = struct.Struct('<8sQ')
+ARRAY_ALIGN = 64
+CURRENT = 'current'
+
+_DTYPES = {'int': '<i8', 'float': '<f8'}
+
+
+class SnapshotMissing(Exception):
+    """GRID_SNAPSHOT_DIR 에 current 스냅샷이 없다."""
+
+
+def _align(offset):
+    return -(-offset // ARRAY_ALIGN) * ARRAY_ALIGN
+
+
+def prediction_table(model_version, year_month):
+    return f'prediction/{model_version}/{year_month}'
+
+
+class SnapshotWriter:
+    def __init__(self):
+        self.arrays = {}
+        self.tables = {}
+        self.predictions = {}
+
+    def add_array(self, name, values):
+        self.arrays[name] = np.ascontiguousarray(values)
+
+    def add_table(self, name, columns):
+        """columns: {컬럼: (종류, 값 목록)}. 종류는 'int', 'float', 'str'."""
+        counts = {len(values) for _, values in columns.values()}
+        if len(counts) > 1:
+            raise ValueError(f'{name} 테이블의 컬럼 길이가 다릅니다.')
+        self.tables[name] = {'count': counts.pop() if counts else 0,
+                             'columns': {column: kind for column, (kind, _) in columns.items()}}
+        for column, (kind, values) in columns.items():
+            prefix = f'{name}.{column}'
+            null = np.fromiter((v is None for v in values), bool, len(values))
+            if kind == 'str':
+                encoded = [b'' if v is None else v.encode() for v in values]
+                offsets = np.zeros(len(encoded) + 1, '<i8')
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+                self.add_array(f'{prefix}.offsets', offsets)
+                self.add_array(f'{prefix}.data', np.frombuffer(b''.join(encoded), np.uint8))
+            else:
+                self.add_array(prefix, np.array([0 if v is None else v for v in values], _DTYPES[kind]))
+            if null.any():
+                self.add_array(f'{prefix}.null', null)
+
+    def write(self, path, version):
+        """path 에 원자적으로 쓴다 (임시 파일 → fsync → rename)."""
+        layout, offset = {}, 0
+        for name, values in self.arrays.items():
+            offset = _align(offset)
+            layout[name] = [values.dtype.str, offset, len(values)]
+            offset += values.nbytes
+        manifest = json.dumps({'version': version, 'arrays': layout, 'tables': self.tables,
+                               'predictions': self.predictions}, ensure_ascii=False).encode()
+        data_start = _align(HEADER.size + len(manifest))
+
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(manifest)))
+            f.write(manifest)
+            for name, values in self.arrays.items():
+                f.seek(data_start + layout[name][1])
+                f.write(values.tobytes())
+            f.truncate(data_start + _align(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+class Column:
+    """스냅샷 컬럼. column[i] 와 take(rows) 는 파이썬 값(None 포함)을 돌려준다.
+
+    values/offsets/data/null 은 numpy 배열(벡터 연산용)이고, 한 행씩 읽을 때는
+    numpy 스칼라를 만들지 않도록 같은 메모리의 memoryview 를 쓴다.
+    """
+    __slots__ = ('kind', 'values', 'offsets', 'data', 'null', '_values', '_offsets', '_data', '_null')
+
+    def __init__(self, snapshot, prefix, kind):
+        self.kind = kind
+        self.null = snapshot.array(f'{prefix}.null') if f'{prefix}.null' in snapshot.arrays else None
+        if kind == 'str':
+            self.values = None
+            self.offsets = snapshot.array(f'{prefix}.offsets')
+            self.data = snapshot.array(f'{prefix}.data')
+        else:
+            self.values = snapshot.array(prefix)
+            self.offsets = self.data = None
+        self._values, self._offsets, self._data, self._null = (
+            None if a is None else memoryview(a) for a in (self.values, self.offsets, self.data, self.null))
+
+    def __len__(self):
+        return len(self.offsets) - 1 if self.kind == 'str' else len(self.values)
+
+    def __getitem__(self, i):
+        if self._null is not None and self._null[i]:
+            return None
+        if self._offsets is not None:
+            return str(self._data[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+        return self._values[i]
+
+    def take(self, rows):
+        if self.kind == 'str':
+            return [self[i] for i in rows]
+        rows = np.asarray(rows, np.intp)
+        values = self.values[rows].tolist()
+        if self.null is not None:
+            for j in np.flatnonzero(self.null[rows]):
+                values[j] = None
+        return values
+
+    def tolist(self):
+        return self.take(range(len(self)))
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f'스냅샷 파일 형식이 아닙니다: {path}')
+        manifest = json.loads(self._mmap[HEADER.size:HEADER.size + length])
+        self._data_start = _align(HEADER.size + length)
+        self.version = manifest['version']
+        self.arrays = manifest['arrays']
+        self.tables = manifest['tables']
+        self.predictions = manifest['predictions']
+
+    def array(self, name):
+        dtype, offset, count = self.arrays[name]
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + offset)
+
+    def column(self, table, column):
+        return Column(self, f'{table}.{column}', self.tables[table]['columns'][column])
+
+    def rows(self, table, columns):
+        """테이블의 (컬럼 값, ...) 튜플 목록."""
+        return list(zip(*(self.column(table, column).tolist() for column in columns)))
+
+
+def current_path(directory=None):
+    return os.path.join(directory or settings.GRID_SNAPSHOT_DIR, CURRENT)
+
+
+def open_current(directory=None):
+    path = current_path(directory)
+    try:
+        return Snapshot(os.path.realpath(path))
+    except FileNotFoundError:
+        raise SnapshotMissing(f'스냅샷이 없습니다: {path} (manage.py export_snapshot)')
+
+
+_snapshot = None
+_snapshot_key = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """현재 데이터셋 버전의 스냅샷. 버전이 바뀌었으면 current 를 다시 연다."""
+    global _snapshot, _snapshot_key
+    key = (dataset_version(), settings.GRID_SNAPSHOT_DIR)
+    if _snapshot_key == key:
+        return _snapshot
+    with _lock:
+        if _snapshot_key != key:
+            _snapshot = open_current()
+            _snapshot_key = key
+        return _snapshot
+
+
+def snapshot_enabled():
+    return settings.GRID_SNAPSHOT_ENABLED
+
+
+def build_snapshot():
+    """DB 의 격자/예측/행정동 집계로 SnapshotWriter 를 채운다."""
+    from .grid import cell_id_from_key
+    from .models import GRID_FIELDS, dong_stats, fixbug_db, prediction, prediction_cell
+    from .spatial import block_arrays
+
+    writer = SnapshotWriter()
+
+    # 격자: cell_id 순 (조회는 이진 탐색)
+    rows = []
+    for *values, cell_id in fixbug_db.objects.values_list(*GRID_FIELDS, 'cell_id').iterator(chunk_size=2000):
+        cell_id = cell_id if cell_id is not None else cell_id_from_key(values[0])
+        if cell_id is not None:
+            rows.append((cell_id, *values))
+    rows.sort(key=lambda row: row[0])
+    columns = list(zip(*rows)) if rows else [()] * (len(GRID_FIELDS) + 1)
+    kinds = {field.name: field.get_internal_type() for field in fixbug_db._meta.fields}
+    grid = {'cell_id': ('int', columns[0])}
+    for field, values in zip(GRID_FIELDS, columns[1:]):
+        kind = kinds[field]
+        grid[field] = ('float' if kind == 'FloatField' else 'str' if kind == 'CharField' else 'int', values)
+    writer.add_table('grid', grid)
+    for name, values in block_arrays(np.array(columns[0], np.int64)).items():
+        writer.add_array(f'grid.blocks.{name}', values)
+
+    # 예측: 격자 순서 + (모델, 월)별로 그 순서에 맞춘 값 (값이 없으면 None)
+    cells = list(prediction_cell.objects.order_by('cell_id')
+                 .values_list('cell_id', 'grid_100', 'latitude', 'longitude'))
+    cell_ids, keys, lats, lons = zip(*cells) if cells else ((), (), (), ())
+    writer.add_table('prediction_cell', {'cell_id': ('int', cell_ids), 'grid_100': ('str', keys),
+                                         'latitude': ('float', lats), 'longitude': ('float', lons)})
+    position = {cell_id: i for i, cell_id in enumerate(cell_ids)}
+    months = prediction.objects.order_by('model_version', 'year_month') \
+        .values_list('model_version', 'year_month').distinct()
+    for model_version, year_month in months:
+        actual = [None] * len(cell_ids)
+        predicted = [None] * len(cell_ids)
+        for cell_id, a, p in prediction.objects.filter(model_version=model_version, year_month=year_month) \
+                .values_list('cell_id', 'actual', 'predicted'):
+            i = position.get(cell_id)
+            if i is not None:
+                actual[i] = a
+                predicted[i] = p
+        writer.add_table(prediction_table(model_version, year_month),
+                         {'actual': ('int', actual), 'predicted': ('int', predicted)})
+        writer.predictions.setdefault(model_version, []).append(year_month)
+
+    # 행정동 집계: (월, 행정동 코드) 순
+    stats = list(dong_stats.objects.order_by('year_month', 'dong_code').values_list(
+        'year_month', 'dong_code', 'dong_name', 'cells', 'predicted', 'actual',
+        'false_positive', 'population', 'predicted_ratio'))
+    columns = list(zip(*stats)) if stats else [()] * 9
+    writer.add_table('dong_stats', {
+        name: (kind, values) for (name, kind), values in zip(
+            (('year_month', 'str'), ('dong_code', 'str'), ('dong_name', 'str'), ('cells', 'int'),
+             ('predicted', 'int'), ('actual', 'int'), ('false_positive', 'int'), ('population', 'int'),
+             ('predicted_ratio', 'float')), columns)})
+    return writer
+
+
+def export_snapshot(directory=None, keep=None):
+    """새 스냅샷을 쓰고 current 를 원자적으로 바꾼 뒤 오래된 파일을 지운다. 새 파일 경로를 돌려준다."""
+    directory = directory or settings.GRID_SNAPSHOT_DIR
+    keep = settings.GRID_SNAPSHOT_KEEP if keep is None else keep
+    os.makedirs(directory, exist_ok=True)
+
+    version = time.time_ns()
+    name = f'grid-{version}.snap'
+    build_snapshot().write(os.path.join(directory, name), version)
+
+    link = os.path.join(directory, f'{CURRENT}.tmp')
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(name, link)
+    os.replace(link, current_path(directory))
+
+    # 이전 스냅샷은 keep 개만 남긴다 (되돌리기용). 열려 있는 mmap 은 지워도 유지된다
+    old = sorted(f for f in os.listdir(directory) if f.startswith('grid-') and f.endswith('.snap') and f != name)
+    for f in old[:max(len(old) - keep, 0)]:
+        os.remove(os.path.join(directory, f))
+    return os.path.join(directory, name)
+
+
+def refresh_snapshot():
+    """적재 명령 끝에서 호출한다. 스냅샷을 쓰는 설정이면 새로 내보낸다."""
+    if snapshot_enabled():
+        return export_snapshot()
+    return None
@@ -0,0 +1,269 @@
+import bisect
+import math
+import sys
+import threading
+from array import array
+
+import numpy as np
+from django.db import DatabaseError
+
+from .dataset import dataset_version
+from .grid import CELL_ID_STRIDE, CELL_SIZE, cell_id_from_index, cell_id_from_key, cell_index, to_utmk
+from .metrics import registry
+from .models import GRID_FIELDS, fixbug_db
+from .singleflight import COALESCED_COUNTER
+from .snapshot import SnapshotMissing, get_snapshot, snapshot_enabled
+
+# 프로세스 내 격자 공간 인덱스
+#
+# fixbug_db(약 9.5k 행)는 데이터 적재 사이에는 바뀌지 않으므로 워커마다 한 번
+# 읽어 두고, 좌표 조회는 UTM-K 100m 격자 해시로 DB 없이 처리한다.
+# 행은 모델 인스턴스 대신 필드별 컬럼(list/array)으로 보관한다.
+# GRID_SNAPSHOT_ENABLED 이면 DB 대신 스냅샷 파일(d3.snapshot) 컬럼을 그대로 쓴다.
+
+_STRING_FIELDS = ('grid_100', 'h_area', 'b_area', 'g_area', 'city', 'h_a_area')
+
+# 영역 조회용 블록 크기 (격자 수). 10 → 1km × 1km 블록
+BLOCK_CELLS = 10
+
+# 위도 1도의 남북 길이, 적도에서 경도 1도의 동서 길이 (m, WGS84 근사)
+METERS_PER_DEGREE_LAT = 110_574
+METERS_PER_DEGREE_LON = 111_320
+
+
+class GridIndex:
+    __slots__ = ('version', 'cell_ids', 'columns', '_row_by_cell', '_blocks')
+
+    def __init__(self, rows, version=0):
+        """rows: GRID_FIELDS 순서의 값 튜플 + 마지막에 cell_id."""
+        self.version = version
+        self.cell_ids = array('q')
+        self.columns = {field: [] for field in GRID_FIELDS}
+        self._row_by_cell = {}
+        self._blocks = {}
+
+        appenders = [self.columns[field].append for field in GRID_FIELDS]
+        interned = [field in _STRING_FIELDS for field in GRID_FIELDS]
+        for values in rows:
+            *values, cell_id = values
+            if cell_id is None:
+                cell_id = cell_id_from_key(values[0])
+                if cell_id is None:
+                    continue
+            i = len(self.cell_ids)
+            self._row_by_cell[cell_id] = i
+            self.cell_ids.append(cell_id)
+            col, row = cell_index(cell_id)
+            self._blocks.setdefault((col // BLOCK_CELLS, row // BLOCK_CELLS), []).append(i)
+            for append, intern, value in zip(appenders, interned, values):
+                append(sys.intern(value) if intern and value is not None else value)
+
+    def __len__(self):
+        return len(self.cell_ids)
+
+    def row_for_cell(self, cell_id):
+        return self._row_by_cell.get(cell_id)
+
+    def nearest(self, longitude, latitude, max_distance):
+        """(longitude, latitude) 에서 격자 중심까지 max_distance(m) 이내인 가장 가까운 행 번호."""
+        easting, northing = to_utmk(longitude, latitude)
+        col, row = int(easting // CELL_SIZE), int(northing // CELL_SIZE)
+
+        # 좌표가 속한 격자가 있으면 그 격자 중심이 항상 가장 가깝다
+        found = self._row_by_cell.get(cell_id_from_index(col, row))
+        half = CELL_SIZE / 2
+        if found is not None:
+            cx, cy = col * CELL_SIZE + half, row * CELL_SIZE + half
+            return found if math.hypot(easting - cx, northing - cy) <= max_distance else None
+
+        best, best_dist = None, max_distance
+        reach = math.ceil(max_distance / CELL_SIZE)
+        for dc in range(-reach, reach + 1):
+            for dr in range(-reach, reach + 1):
+                i = self._row_by_cell.get(cell_id_from_index(col + dc, row + dr))
+                if i is None:
+                    continue
+                c, r = cell_index(self.cell_ids[i])
+                dist = math.hypot(easting - (c * CELL_SIZE + half), northing - (r * CELL_SIZE + half))
+                if dist <= best_dist:
+                    best, best_dist = i, dist
+        return best
+
+    def within_bbox(self, west, south, east, north):
+        """경위도 사각형에 걸치는 격자의 행 번호 목록.
+
+        격자 중심 좌표(x=위도, y=경도)로 판정하되 사각형을 사방으로 반 격자(50m) 넓혀,
+        중심은 밖이어도 일부가 화면에 보이는 가장자리 격자를 빠뜨리지 않는다.
+        """
+        west, south, east, north = _expand_bbox(west, south, east, north, CELL_SIZE / 2)
+        # 사각형 네 꼭짓점을 투영해 겹치는 블록만 후보로 본다
+        corners = [to_utmk(lon, lat) for lon in (west, east) for lat in (south, north)]
+        block = CELL_SIZE * BLOCK_CELLS
+        bc0 = int(min(e for e, _ in corners) // block) - 1
+        bc1 = int(max(e for e, _ in corners) // block) + 1
+        br0 = int(min(n for _, n in corners) // block) - 1
+        br1 = int(max(n for _, n in corners) // block) + 1
+        if (bc1 - bc0 + 1) * (br1 - br0 + 1) > len(self._blocks):
+            candidates = [range(len(self.cell_ids))]
+        else:
+            candidates = [self._blocks[key] for key in
+                          ((bc, br) for bc in range(bc0, bc1 + 1) for br in range(br0, br1 + 1))
+                          if key in self._blocks]
+
+        return self._filter_bbox(candidates, west, south, east, north)
+
+    def _filter_bbox(self, candidates, west, south, east, north):
+        xs, ys = self.columns['x'], self.columns['y']
+        found = []
+        for rows in candidates:
+            for i in rows:
+                lat, lon = xs[i], ys[i]
+                if lat is not None and lon is not None \
+                        and south <= lat <= north and west <= lon <= east:
+                    found.append(i)
+        found.sort()
+        return found
+
+    def row(self, i, fields=GRID_FIELDS):
+        columns = self.columns
+        return {field: columns[field][i] for field in fields}
+
+    def take(self, field, rows):
+        """행 번호 목록의 field 값 목록 (field 는 GRID_FIELDS 또는 'cell_id')."""
+        column = self.cell_ids if field == 'cell_id' else self.columns[field]
+        return [column[i] for i in rows]
+
+
+def _expand_bbox(west, south, east, north, margin):
+    """경위도 사각형을 사방으로 margin(m) 넓힌다. 경도 폭은 극에 가까운 쪽 위도로 잡아 모자라지 않게."""
+    dlat = margin / METERS_PER_DEGREE_LAT
+    dlon = margin / (METERS_PER_DEGREE_LON * math.cos(math.radians(min(max(abs(south), abs(north)), 89.0))))
+    return west - dlon, south - dlat, east + dlon, north + dlat
+
+
+def _block_key(block_col, block_row):
+    return (block_col << 32) | block_row
+
+
+def block_arrays(cell_ids):
+    """cell_id 순으로 정렬된 격자의 영역 조회 블록 (스냅샷에 저장).
+
+    key: 블록 키 (오름차순), start: 블록별 rows 시작 위치 (len(key) + 1), rows: 블록순 행 번호.
+    """
+    cols, rows = np.divmod(cell_ids, CELL_ID_STRIDE)
+    keys = _block_key(cols // BLOCK_CELLS, rows // BLOCK_CELLS)
+    order = np.argsort(keys, kind='stable')
+    unique, starts = np.unique(keys[order], return_index=True)
+    return {
+        'key': unique.astype(np.int64),
+        'start': np.append(starts, len(order)).astype(np.int64),
+        'rows': order.astype(np.int64),
+    }
+
+
+class _SortedCells:
+    """정렬된 cell_id 배열에서 이진 탐색으로 행 번호를 찾는다 (dict 대신).
+
+    한 건씩 찾을 때는 np.searchsorted 호출 비용이 커서 memoryview 에 bisect 를 쓴다.
+    """
+    __slots__ = ('_cell_ids',)
+
+    def __init__(self, cell_ids):
+        self._cell_ids = memoryview(cell_ids)
+
+    def get(self, cell_id):
+        i = bisect.bisect_left(self._cell_ids, cell_id)
+        if i < len(self._cell_ids) and self._cell_ids[i] == cell_id:
+            return i
+        return None
+
+
+class _Blocks:
+    """block_arrays 결과를 GridIndex._blocks (블록 → 행 번호들) 처럼 쓴다."""
+    __slots__ = ('_keys', '_starts', '_rows')
+
+    def __init__(self, keys, starts, rows):
+        self._keys, self._starts, self._rows = _SortedCells(keys), memoryview(starts), rows
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def __contains__(self, block):
+        return self._keys.get(_block_key(*block)) is not None
+
+    def __getitem__(self, block):
+        i = self._keys.get(_block_key(*block))
+        if i is None:
+            raise KeyError(block)
+        return self._rows[self._starts[i]:self._starts[i + 1]]
+
+
+class SnapshotGridIndex(GridIndex):
+    """스냅샷 mmap 컬럼 위의 GridIndex. 만들 때 복사가 없어 기동이 빠르고 워커끼리 메모리를 공유한다."""
+    __slots__ = ()
+
+    def __init__(self, snapshot, version=0):
+        self.version = version
+        self.cell_ids = snapshot.column('grid', 'cell_id')
+        self.columns = {field: snapshot.column('grid', field) for field in GRID_FIELDS}
+        self._row_by_cell = _SortedCells(self.cell_ids.values)
+        self._blocks = _Blocks(*(snapshot.array(f'grid.blocks.{name}') for name in ('key', 'start', 'rows')))
+
+    def _filter_bbox(self, candidates, west, south, east, north):
+        rows = np.concatenate([np.asarray(c, np.intp) for c in candidates]) if candidates else np.array([], np.intp)
+        xs, ys = self.columns['x'], self.columns['y']
+        lat, lon = xs.values[rows], ys.values[rows]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        for column in (xs, ys):
+            if column.null is not None:
+                inside &= ~column.null[rows]
+        return np.sort(rows[inside]).tolist()
+
+    def take(self, field, rows):
+        column = self.cell_ids if field == 'cell_id' else self.columns[field]
+        return column.take(rows)
+
+
+def _load_rows():
+    return fixbug_db.objects.values_list(*GRID_FIELDS, 'cell_id').iterator(chunk_size=2000)
+
+
+def _build_index(version):
+    if snapshot_enabled():
+        return SnapshotGridIndex(get_snapshot(), version)
+    return GridIndex(_load_rows(), version)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """현재 데이터셋 버전의 인덱스를 반환한다. 버전이 바뀌었으면 다시 만든다."""
+    global _index
+    version = dataset_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = _build_index(version)
+        else:
+            # 기다리는 동안 다른 스레드가 만든 인덱스를 같이 쓴다 (DB 전체 조회 한 번 절약)
+            registry.incr(COALESCED_COUNTER)
+        return _index
+
+
+def invalidate_index():
+    """이 프로세스의 인덱스를 버린다. 다른 워커는 bump_dataset_version() 으로 무효화한다."""
+    global _index
+    with _lock:
+        _index = None
+
+
+def warm_index():
+    """워커 기동 시 인덱스를 미리 만든다. DB/스냅샷이 준비되지 않았으면 첫 요청 때 만든다."""
+    try:
+        get_index()
+    except (DatabaseError, SnapshotMissing):
+        invalidate_index()
@@ -1,3 +1,718 @@
-from django.test import TestCase
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .caching import cached_response
+from .dataset import bump_dataset_version, dataset_version
+from .dongs import DongLocator
+from .encoding import unpack_bbox
+from .grid import (cell_id_from_key, cell_id_from_lonlat, from_utmk, key_from_cell_id, key_from_lonlat,
+                   lonlat_from_cell_id, to_utmk)
+from .inference import MicroBatcher, Model, Overloaded, reset_batchers
+from . import metrics, serializers
+from .models import dong_stats, fixbug_db, grid_dong, prediction
+from .singleflight import COALESCED_COUNTER, SingleFlight
+from .snapshot import CURRENT, Snapshot
+from .spatial import GridIndex, get_index, invalidate_index
+
+_stamp_dir = tempfile.mkdtemp()
+# 테스트 트랜잭션 안의 데이터를 보도록 DB 풀 대신 요청 스레드 연결을 쓴다
+use_test_connection = override_settings(DB_POOL_SIZE=0)
+
+# grid_meta.csv 에서 가져온 실제 격자 (위경도는 격자 중심)
+SAMPLE_CELLS = [
+    ('다마847996', 127.3303794, 36.19386884),
+    ('다마848992', 127.3314994, 36.19026416),
+]
+
+
+def make_cell(grid_100, longitude, latitude, **extra):
+    fields = dict(
+        grid_100=grid_100, cell_id=cell_id_from_key(grid_100),
+        h_area='가수원동', b_area='가수원동', g_area='35001', city='서구',
+        h_a_area='대전광역시 서구 가수원동', x=latitude, y=longitude,
+    )
+    fields.update(extra)
+    return fixbug_db.objects.create(**fields)
+
+
+def write_prediction_csv(path, rows):
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write('격자순번,격자100m,위도,경도,실제값,예측값,시계열예측값\n')
+        for i, (key, longitude, latitude, actual, predicted) in enumerate(rows, start=1):
+            f.write(f'{i},{key},{latitude},{longitude},{actual},{predicted},0.5\n')
+
+
+class GridKeyTests(SimpleTestCase):
+    def test_lonlat_to_key(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            self.assertEqual(key_from_lonlat(longitude, latitude), key)
+
+    def test_key_round_trip(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            cell_id = cell_id_from_key(key)
+            self.assertEqual(cell_id, cell_id_from_lonlat(longitude, latitude))
+            self.assertEqual(key_from_cell_id(cell_id), key)
+
+    def test_inverse_projection(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            self.assertEqual(cell_id_from_lonlat(*lonlat_from_cell_id(cell_id_from_key(key))), cell_id_from_key(key))
+            lon, lat = from_utmk(*to_utmk(longitude, latitude))
+            self.assertAlmostEqual(lon, longitude, places=8)
+            self.assertAlmostEqual(lat, latitude, places=8)
+
+    def test_invalid_key(self):
+        self.assertIsNone(cell_id_from_key('하마847996'))
+        self.assertIsNone(cell_id_from_key('다마84799'))
+        self.assertIsNone(cell_id_from_key(''))
+
+
+class SerializerTests(SimpleTestCase):
+    def test_fallback_matches_orjson(self):
+        data = {'data': [{'grid_100': '다마847996', 'x': 36.19386884, 'kid': None}], 'fields': ('x',)}
+        fast = serializers.dumps(data)
+        orjson, serializers.orjson = serializers.orjson, None
+        try:
+            self.assertEqual(json.loads(serializers.dumps(data)), json.loads(fast))
+        finally:
+            serializers.orjson = orjson
+
+    def test_parse_fields(self):
+        allowed = ('a', 'b', 'c')
+        self.assertEqual(serializers.parse_fields('c, a', allowed, allowed), ('a', 'c'))
+        self.assertEqual(serializers.parse_fields(None, allowed, ('b',)), ('b',))
+        with self.assertRaises(ValueError):
+            serializers.parse_fields(['a', 'z'], allowed, allowed)
+
+
+class GridIndexTests(SimpleTestCase):
+    def setUp(self):
+        rows = [(key, 'a', 'b', 'c', 'd', 'e', latitude, longitude) + (None,) * 15 + (None,)
+                for key, longitude, latitude in SAMPLE_CELLS]
+        self.index = GridIndex(rows)
+
+    def test_nearest_inside_cell(self):
+        i = self.index.nearest(127.3306, 36.1940, 100)
+        self.assertEqual(self.index.row(i)['grid_100'], '다마847996')
+
+    def test_nearest_neighbour_within_cutoff(self):
+        # 다마847996 중심에서 동쪽으로 약 56m (비어 있는 이웃 격자 안) → 거리 제한 안이면 다마847996
+        i = self.index.nearest(127.3310, 36.19386884, 150)
+        self.assertEqual(self.index.row(i)['grid_100'], '다마847996')
+        self.assertIsNone(self.index.nearest(127.3310, 36.19386884, 30))
+
+
+@use_test_connection
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class LookupViewTests(TestCase):
+    def setUp(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=10)
+        invalidate_index()
+
+    def test_index_invalidated_by_version_bump(self):
+        index = get_index()
+        self.assertIs(get_index(), index)
+        make_cell('다마849992', 127.3326, 36.1903)
+        bump_dataset_version()
+        self.assertEqual(len(get_index()), len(index) + 1)
+
+    def post(self, url, payload):
+        return self.client.post(url, json.dumps(payload), content_type='application/json')
+
+    def test_get_xy_inside_cell(self):
+        # 격자 중심에서 30m 정도 떨어진 지점도 같은 격자로 조회된다
+        res = self.post('/api/get_xy/', {'longitude': 127.3306, 'latitude': 36.1940})
+        self.assertEqual(res.status_code, 200)
+        data = res.json()['data']
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['grid_100'], '다마847996')
+        self.assertEqual(data[0]['total_population'], 10)
+
+    def test_dong_data_fields(self):
+        res = self.post('/api/dong_data/', {'longitude': 127.3314994, 'latitude': 36.19026416})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.json()['data'][0]), {'grid_100', 'h_area', 'b_area', 'g_area'})
+
+    def test_missing_cell(self):
+        res = self.post('/api/get_xy/', {'longitude': 127.40, 'latitude': 36.35})
+        self.assertEqual(res.status_code, 404)
+
+    def test_missing_coordinates(self):
+        res = self.post('/api/get_xy/', {'longitude': 127.40})
+        self.assertEqual(res.status_code, 400)
+
+    def test_invalid_coordinates(self):
+        for longitude in ('abc', [127.3306], float('nan'), float('inf')):
+            with self.subTest(longitude=longitude):
+                res = self.post('/api/get_xy/', {'longitude': longitude, 'latitude': 36.1940})
+                self.assertEqual(res.status_code, 400)
+        # 숫자 문자열은 그대로 받는다
+        self.assertEqual(self.post('/api/get_xy/', {'longitude': '127.3306', 'latitude': '36.1940'}).status_code, 200)
+
+    def test_lookup_fields(self):
+        point = {'longitude': 127.3306, 'latitude': 36.1940}
+        res = self.post('/api/lookup/', dict(point, fields=['total_population', 'grid_100']))
+        self.assertEqual(res.json()['data'], [{'grid_100': '다마847996', 'total_population': 10}])
+        res = self.post('/api/lookup/?fields=x,y', point)
+        self.assertEqual(set(res.json()['data'][0]), {'x', 'y'})
+        self.assertEqual(len(self.post('/api/lookup/', point).json()['data'][0]), 23)
+        self.assertEqual(self.post('/api/lookup/', dict(point, fields=['password'])).status_code, 400)
+
+
+@use_test_connection
+class BatchLookupTests(TestCase):
+    def setUp(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=7)
+        invalidate_index()
+
+    def post(self, payload):
+        return self.client.post('/api/batch_lookup/', json.dumps(payload),
+                                content_type='application/json')
+
+    def test_points_columnar_with_misses(self):
+        points = [[127.3314994, 36.19026416], [127.40, 36.35], 'bad', [127.3303794, 36.19386884]]
+        with self.assertNumQueries(1):  # 인덱스 생성
+            res = self.post({'points': points})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post({'points': points}).json(), res.json())
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body['count'], 4)
+        self.assertEqual(body['data']['grid_100'], ['다마848992', None, None, '다마847996'])
+        self.assertEqual(body['data']['total_population'], [7, None, None, 7])
+        self.assertEqual(body['missing'], [1])
+        self.assertEqual(body['invalid'], [2])
+
+    def test_points_match_get_xy(self):
+        # 다마847996 중심에서 동쪽으로 약 56m (비어 있는 이웃 격자 안) — get_xy 와 같은 격자
+        point = {'longitude': 127.3310, 'latitude': 36.19386884}
+        single = self.client.post('/api/get_xy/', json.dumps(point), content_type='application/json')
+        self.assertEqual(single.json()['data'][0]['grid_100'], '다마847996')
+        body = self.post({'points': [[point['longitude'], point['latitude']], [127.3310, 'nan']]}).json()
+        self.assertEqual(body['data']['grid_100'], ['다마847996', None])
+        self.assertEqual(body['invalid'], [1])
+
+    def test_keys(self):
+        res = self.post({'keys': ['다마847996', '다마000000', 3]})
+        body = res.json()
+        self.assertEqual(body['data']['grid_100'], ['다마847996', None, None])
+        self.assertEqual(body['missing'], [1])
+        self.assertEqual(body['invalid'], [2])
+
+    def test_fields_projection(self):
+        res = self.post({'keys': ['다마847996', '다마000000'], 'fields': ['total_population', 'grid_100']})
+        body = res.json()
+        self.assertEqual(body['fields'], ['grid_100', 'total_population'])
+        self.assertEqual(body['data'], {'grid_100': ['다마847996', None], 'total_population': [7, None]})
+
+    def test_requires_exactly_one_input(self):
+        self.assertEqual(self.post({}).status_code, 400)
+        self.assertEqual(self.post({'points': [], 'keys': []}).status_code, 400)
+
+    @override_settings(BATCH_LOOKUP_MAX_ITEMS=2)
+    def test_item_limit(self):
+        self.assertEqual(self.post({'keys': ['a', 'b', 'c']}).status_code, 400)
+
+
+@use_test_connection
+class BboxTests(TestCase):
+    def setUp(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=3)
+        invalidate_index()
+
+    def get(self, **params):
+        query = {'west': 127.3300, 'south': 36.1920, 'east': 127.3310, 'north': 36.1950, 'zoom': 15}
+        query.update(params)
+        return self.client.get('/api/bbox/', query)
+
+    def test_json(self):
+        get_index()
+        with self.assertNumQueries(0):
+            res = self.get()
+        body = res.json()
+        self.assertEqual(body['count'], 1)
+        self.assertEqual(body['data']['grid_100'], ['다마847996'])
+        self.assertEqual(body['data']['cell_id'], [cell_id_from_key('다마847996')])
+
+    def test_binary_matches_json(self):
+        res = self.get(format='bin', east=127.34, south=36.19)
+        self.assertEqual(res['Content-Type'], 'application/octet-stream')
+        data = unpack_bbox(res.content)
+        self.assertEqual(data['cell_id'], self.get(east=127.34, south=36.19).json()['data']['cell_id'])
+        self.assertEqual(data['total_population'], [3, 3])
+        self.assertAlmostEqual(data['y'][0], 127.3303794, places=4)
+
+    def test_edge_cell_partly_inside(self):
+        # 동쪽 경계가 다마847996 을 가로지른다 (중심은 경계에서 동쪽으로 약 25m, 격자 절반은 50m)
+        box = {'west': 127.3290, 'south': 36.1930, 'east': 127.3301, 'north': 36.1945}
+        self.assertEqual(self.get(**box).json()['data']['grid_100'], ['다마847996'])
+        # 경계가 격자 서쪽 가장자리보다 약 30m 서쪽이면 (중심에서 약 80m) 빠진다
+        self.assertEqual(self.get(**dict(box, east=127.3295)).json()['count'], 0)
+
+    def test_low_zoom_returns_nothing(self):
+        self.assertEqual(self.get(zoom=13).json()['count'], 0)
+
+    def test_bad_params(self):
+        self.assertEqual(self.get(west='x').status_code, 400)
+        self.assertEqual(self.get(west=128).status_code, 400)
+        self.assertEqual(self.get(format='xml').status_code, 400)
+
+
+@use_test_connection
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class CellCacheTests(TestCase):
+    def setUp(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=5)
+        bump_dataset_version()
+        cache.clear()
+
+    def test_get_matches_post_shape(self):
+        res = self.client.get('/api/cells/다마847996/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['data'][0]['total_population'], 5)
+        self.assertIn('max-age', res['Cache-Control'])
+        dong = self.client.get('/api/cells/다마847996/dong/').json()['data'][0]
+        self.assertEqual(set(dong), {'grid_100', 'h_area', 'b_area', 'g_area'})
+
+    def test_if_none_match(self):
+        etag = self.client.get('/api/cells/다마847996/')['ETag']
+        res = self.client.get('/api/cells/다마847996/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_version_bump_invalidates(self):
+        etag = self.client.get('/api/cells/다마847996/')['ETag']
+        fixbug_db.objects.filter(grid_100='다마847996').update(total_population=9)
+        bump_dataset_version()
+        res = self.client.get('/api/cells/다마847996/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.json()['data'][0]['total_population'], 9)
+
+    def test_unknown_cell(self):
+        self.assertEqual(self.client.get('/api/cells/다마000000/').status_code, 404)
+
+
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class LoadGridCsvTests(TestCase):
+    def write_csv(self, rows):
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        with f:
+            for row in rows:
+                f.write(','.join(str(v) for v in row) + '\n')
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def csv_row(self, key, longitude, latitude, population):
+        return [key, '가수원동', '가수원동', '', '서구', '대전광역시 서구 가수원동',
+                latitude, longitude, 1, 2, population] + [''] * 12
+
+    def load(self, path):
+        out, err = StringIO(), StringIO()
+        call_command('load_grid_csv', path, '--chunk-size', '1', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_load_validates_and_upserts(self):
+        rows = [self.csv_row(key, lon, lat, 4) for key, lon, lat in SAMPLE_CELLS]
+        rows.append(['하마000000'] + rows[0][1:])
+        rows.append(rows[0][:5])
+        out, err = self.load(self.write_csv(rows))
+        self.assertIn('2행 적재, 2행 건너뜀', out)
+        cell = fixbug_db.objects.get(grid_100='다마847996')
+        self.assertEqual(cell.cell_id, cell_id_from_key('다마847996'))
+        self.assertIsNone(cell.g_area)
+        self.assertIsNone(cell.kid)
+        self.assertEqual(cell.total_population, 4)
+
+        # 다시 실행하면 같은 행을 갱신한다
+        rows = [self.csv_row(key, lon, lat, 9) for key, lon, lat in SAMPLE_CELLS]
+        self.load(self.write_csv(rows))
+        self.assertEqual(fixbug_db.objects.count(), 2)
+        self.assertEqual(fixbug_db.objects.get(grid_100='다마847996').total_population, 9)
+
+
+def square(west, south, east, north):
+    return [[west, south], [east, south], [east, north], [west, north], [west, south]]
+
+
+# 다마847996 은 가 동에, 다마848992 는 나 동(구멍 포함 MultiPolygon)에 들어간다
+DONG_FEATURES = [
+    {'type': 'Feature', 'properties': {'code': '1', 'name': '가동'},
+     'geometry': {'type': 'Polygon', 'coordinates': [square(127.32, 36.192, 127.34, 36.20)]}},
+    {'type': 'Feature', 'properties': {'code': '2', 'name': '나동'},
+     'geometry': {'type': 'MultiPolygon', 'coordinates': [
+         [square(127.32, 36.18, 127.34, 36.192), square(127.325, 36.185, 127.328, 36.188)]]}},
+]
+
+
+class DongLocatorTests(SimpleTestCase):
+    def test_locate(self):
+        locator = DongLocator(DONG_FEATURES)
+        self.assertEqual(locator.locate(127.3303794, 36.19386884), 0)
+        self.assertEqual(locator.locate(127.3314994, 36.19026416), 1)
+        self.assertIsNone(locator.locate(127.326, 36.186))  # 구멍 안
+        self.assertIsNone(locator.locate(127.40, 36.35))
+
+
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class DongStatsTests(TestCase):
+    def setUp(self):
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=10)
+        cache.clear()
+        tmp = tempfile.mkdtemp()
+        self.geojson = os.path.join(tmp, 'dong.geojson')
+        with open(self.geojson, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': DONG_FEATURES}, f)
+        self.csv = os.path.join(tmp, 'ssookssook_06.csv')
+        write_prediction_csv(self.csv, [
+            ('다마847996', 127.3303794, 36.19386884, 0, 1),
+            ('다마848992', 127.3314994, 36.19026416, 1, 1),
+            ('다마849996', 127.3326, 36.1939, 0, 0),
+        ])
+
+    def build(self):
+        call_command('build_dong_stats', '--geojson', self.geojson,
+                     '--month', f'2024-06={self.csv}', stdout=StringIO())
+
+    def test_build_and_serve(self):
+        self.build()
+        self.build()  # 다시 실행해도 중복되지 않는다
+        self.assertEqual(grid_dong.objects.count(), 3)
+        self.assertEqual(dong_stats.objects.count(), 2)
+
+        res = self.client.get('/api/dongs/stats/')
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body['month'], '2024-06')
+        data = body['data']
+        self.assertEqual(data['dong_code'], ['1', '2'])
+        self.assertEqual(data['cells'], [2, 1])
+        self.assertEqual(data['predicted'], [1, 1])
+        self.assertEqual(data['false_positive'], [1, 0])
+        self.assertEqual(data['actual'], [0, 1])
+        self.assertEqual(data['population'], [10, 10])
+        self.assertEqual(data['predicted_ratio'], [0.5, 1.0])
+
+    def test_unknown_month(self):
+        self.build()
+        self.assertEqual(self.client.get('/api/dongs/stats/', {'month': '2024-01'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/dongs/stats/', {'month': 'x'}).status_code, 400)
+
+
+
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class PredictionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.mkdtemp()
+        self.june = os.path.join(tmp, 'ssookssook_06.csv')
+        self.july = os.path.join(tmp, 'ssookssook_07.csv')
+        (a_key, a_lon, a_lat), (b_key, b_lon, b_lat) = SAMPLE_CELLS
+        # 파일의 격자 순서와 무관하게 응답은 cell_id 순서
+        write_prediction_csv(self.june, [(b_key, b_lon, b_lat, 1, 0), (a_key, a_lon, a_lat, 0, 0)])
+        write_prediction_csv(self.july, [(a_key, a_lon, a_lat, 0, 1), (b_key, b_lon, b_lat, 1, 0)])
+        self.load()
+
+    def load(self):
+        call_command('load_predictions', '--month', f'2024-06={self.june}',
+                     '--month', f'2024-07={self.july}', stdout=StringIO())
+
+    def test_cells_in_stable_order(self):
+        self.load()  # 다시 적재해도 행이 늘지 않는다
+        self.assertEqual(prediction.objects.count(), 4)
+        data = self.client.get('/api/predictions/cells/').json()['data']
+        self.assertEqual(data['cell_id'], sorted(data['cell_id']))
+        self.assertEqual(data['grid_100'], ['다마847996', '다마848992'])
+
+    def test_month_vectors(self):
+        body = self.client.get('/api/predictions/', {'month': '2024-06'}).json()
+        self.assertEqual(body['months'], ['2024-06', '2024-07'])
+        self.assertEqual(body['actual'], [0, 1])
+        self.assertEqual(body['predicted'], [0, 0])
+        self.assertEqual(self.client.get('/api/predictions/').json()['month'], '2024-07')
+
+    def test_delta(self):
+        body = self.client.get('/api/predictions/', {'month': '2024-07', 'base': '2024-06'}).json()
+        self.assertEqual(body['index'], [0])
+        self.assertEqual(body['predicted'], [1])
+        self.assertEqual(body['base'], '2024-06')
+
+    def test_bad_months(self):
+        self.assertEqual(self.client.get('/api/predictions/', {'month': '2024-01'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/predictions/', {'base': '06'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/predictions/', {'model': 'v9'}).status_code, 404)
+
+    def test_dong_stats_from_table(self):
+        geojson = os.path.join(tempfile.mkdtemp(), 'dong.geojson')
+        with open(geojson, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': DONG_FEATURES}, f)
+        call_command('build_dong_stats', '--geojson', geojson, stdout=StringIO())
+        self.assertEqual(dong_stats.objects.filter(year_month='2024-07', dong_code='1').get().predicted, 1)
+        self.assertEqual(dong_stats.objects.filter(year_month='2024-06').count(), 2)
+
+
+@use_test_connection
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'))
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_index()
+        for key, longitude, latitude in SAMPLE_CELLS:
+            make_cell(key, longitude, latitude, total_population=3, g_area=None)
+        tmp = tempfile.mkdtemp()
+        csv_path = os.path.join(tmp, 'ssookssook_06.csv')
+        write_prediction_csv(csv_path, [SAMPLE_CELLS[1] + (1, 0)])
+        call_command('load_predictions', '--month', f'2024-06={csv_path}', stdout=StringIO())
+        dong_stats.objects.create(dong_code='1', dong_name='가수원동', year_month='2024-06', cells=2,
+                                  predicted=0, actual=1, false_positive=0, population=6, predicted_ratio=0.0)
+        self.dir = os.path.join(tmp, 'snapshots')
+        call_command('export_snapshot', '--dir', self.dir, stdout=StringIO())
+
+    def responses(self):
+        cache.clear()
+        invalidate_index()
+        bbox = {'west': 127.33, 'south': 36.19, 'east': 127.34, 'north': 36.195, 'zoom': 15}
+        return [
+            self.client.post('/api/get_xy/', json.dumps({'longitude': 127.3303794, 'latitude': 36.19386884}),
+                             content_type='application/json').json(),
+            self.client.get('/api/cells/다마848992/').json(),
+            self.client.get('/api/bbox/', bbox).json(),
+            self.client.get('/api/bbox/', dict(bbox, format='bin')).content,
+            self.client.post('/api/batch_lookup/', json.dumps({'keys': ['다마848992', '다마000000']}),
+                             content_type='application/json').json(),
+            self.client.get('/api/predictions/cells/').json(),
+            self.client.get('/api/predictions/', {'month': '2024-06'}).json(),
+            self.client.get('/api/dongs/stats/').json(),
+        ]
+
+    def test_serves_same_responses_without_db(self):
+        expected = self.responses()
+        with override_settings(GRID_SNAPSHOT_ENABLED=True, GRID_SNAPSHOT_DIR=self.dir):
+            with self.assertNumQueries(0):
+                self.assertEqual(self.responses(), expected)
+        invalidate_index()
+
+    def test_swap(self):
+        first = os.readlink(os.path.join(self.dir, CURRENT))
+        make_cell('다마849996', 127.3326, 36.1939)
+        for _ in range(3):
+            call_command('export_snapshot', '--dir', self.dir, '--keep', '1', stdout=StringIO())
+        current = os.path.join(self.dir, CURRENT)
+        self.assertNotEqual(os.readlink(current), first)
+        self.assertEqual(len([f for f in os.listdir(self.dir) if f.endswith('.snap')]), 2)
+        snapshot = Snapshot(os.path.realpath(current))
+        self.assertEqual(snapshot.tables['grid']['count'], 3)
+        self.assertEqual(snapshot.column('grid', 'g_area').tolist(), [None] * 2 + ['35001'])
+
+
+@use_test_connection
+@override_settings(METRICS_DIR=tempfile.mkdtemp())
+class MetricsTests(TestCase):
+    def setUp(self):
+        make_cell(*SAMPLE_CELLS[0], total_population=1)
+        for path in os.listdir(metrics.metrics_dir()):
+            os.remove(os.path.join(metrics.metrics_dir(), path))
+        metrics.registry._after_fork()  # 이 테스트만의 값으로 다시 센다
+        cache.clear()
+        invalidate_index()  # 첫 조회가 인덱스를 만든다 (쿼리 1)
+
+    def test_server_timing_counts_queries(self):
+        res = self.client.post('/api/batch_lookup/', json.dumps({'keys': ['다마847996']}),
+                               content_type='application/json')
+        self.assertRegex(res['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries"$')
+
+    def test_metrics_aggregate_worker_files(self):
+        self.client.get('/api/cells/다마847996/')
+        # 다른 워커가 남긴 스냅샷
+        other = {'routes': {'api/cells/<str:grid_100>/': [2, 0.5, 4, 0.01, 100, [0] * 11 + [2]]},
+                 'statuses': [['api/cells/<str:grid_100>/', 200, 2]], 'counters': {}}
+        with open(os.path.join(metrics.metrics_dir(), 'worker-1-1.json'), 'w') as f:
+            json.dump(other, f)
+
+        body = self.client.get('/metrics').content.decode()
+        route = 'route="api/cells/<str:grid_100>/"'
+        self.assertIn(f'd3_request_duration_seconds_count{{{route}}} 3', body)
+        self.assertIn(f'd3_request_duration_seconds_bucket{{{route},le="+Inf"}} 3', body)
+        self.assertIn(f'd3_requests_total{{{route},status="200"}} 3', body)
+        self.assertIn(f'd3_db_queries_total{{{route}}} 5', body)  # 인덱스 생성 1 + 다른 워커 4
+
+    def test_dead_worker_files_dropped(self):
+        self.client.get('/api/cells/다마847996/')
+        route = 'route="api/cells/<str:grid_100>/"'
+        # 오래전에 멈춘 워커의 스냅샷은 합산하지 않고 지운다
+        other = {'routes': {'api/cells/<str:grid_100>/': [2, 0.5, 4, 0.01, 100, [0] * 11 + [2]]},
+                 'statuses': [], 'counters': {}}
+        stale = os.path.join(metrics.metrics_dir(), 'worker-1-1.json')
+        with open(stale, 'w') as f:
+            json.dump(other, f)
+        old = time.time() - 2 * settings.METRICS_STALE_AFTER
+        os.utime(stale, (old, old))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn(f'd3_request_duration_seconds_count{{{route}}} 1', body)
+        self.assertFalse(os.path.exists(stale))
+
+        # 정상 종료하는 워커는 자기 파일을 지운다
+        metrics.registry.flush()
+        own = glob.glob(os.path.join(metrics.metrics_dir(), 'worker-*.json'))
+        self.assertEqual(len(own), 1)
+        metrics.registry.remove()
+        self.assertFalse(os.path.exists(own[0]))
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        metrics.registry._after_fork()
+
+    def coalesced(self):
+        return metrics.registry.counters.get(COALESCED_COUNTER, 0)
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(5)
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'rows'
+
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(flight.do('다마847996', fetch))
+
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ['rows'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.coalesced(), 4)
+        # 끝난 키는 다시 실행된다
+        flight.do('다마847996', fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError('db down')
+
+        with self.assertRaises(ValueError):
+            flight.do('k', fail)
+        self.assertEqual(flight.do('k', lambda: 1), 1)
+
+
+@override_settings(DATASET_STAMP_FILE=os.path.join(_stamp_dir, 'dataset.stamp'),
+                   SINGLE_FLIGHT_CROSS_WORKER=True, SINGLE_FLIGHT_POLL_INTERVAL=0.005)
+class CrossWorkerSingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry._after_fork()
+
+    def test_waits_for_other_worker(self):
+        cache_key = f'd3:cell:{dataset_version()}:다마847996'
+        # 다른 워커가 잠금을 잡고 만드는 중
+        cache.add(f'{cache_key}:lock', 1, 5)
+        threading.Timer(0.05, lambda: cache.set(cache_key, (200, b'{"data":[]}'))).start()
+
+        def build():
+            raise AssertionError('다른 워커 결과를 써야 한다')
+
+        res = cached_response('cell', '다마847996', build)
+        self.assertEqual(res.content, b'{"data":[]}')
+        self.assertEqual(metrics.registry.counters[COALESCED_COUNTER], 1)
+
+    @override_settings(SINGLE_FLIGHT_LOCK_TIMEOUT=0.02)
+    def test_builds_after_timeout(self):
+        cache.add(f'd3:cell:{dataset_version()}:다마848992:lock', 1, 5)
+        res = cached_response('cell', '다마848992', lambda: (200, b'built'))
+        self.assertEqual(res.content, b'built')
+
+
+# 추론 테스트용 numpy 모델: 입력 (2, 3) → 합계. 배치 크기를 기록한다
+BATCH_SIZES = []
+
+
+def sum_model(config):
+    def predict(batch):
+        BATCH_SIZES.append(len(batch))
+        time.sleep(config.get('delay', 0))
+        return {'score': batch.sum(axis=(1, 2))}
+    return Model(predict, (2, 3), ('score',))
+
+
+SUM_MODEL = {'kind': 'python', 'factory': 'd3.tests.sum_model'}
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def setUp(self):
+        BATCH_SIZES.clear()
+
+    def test_concurrent_requests_share_batches(self):
+        batcher = MicroBatcher(lambda: sum_model({}), max_batch=16, max_wait=0.05, max_queue=100)
+        futures = [batcher.submit(np.full((1, 2, 3), i, dtype=np.float32)) for i in range(8)]
+        futures.append(batcher.submit(np.ones((3, 2, 3), dtype=np.float32)))
+        results = [f.result(timeout=5)['score'].tolist() for f in futures]
+        self.assertEqual(results[:8], [[6.0 * i] for i in range(8)])
+        self.assertEqual(results[8], [6.0, 6.0, 6.0])
+        self.assertEqual(sum(BATCH_SIZES), 11)
+        self.assertLess(len(BATCH_SIZES), 9)
+
+    def test_max_batch_and_bad_shape(self):
+        batcher = MicroBatcher(lambda: sum_model({}), max_batch=2, max_wait=0.05, max_queue=100)
+        bad = batcher.submit(np.zeros((1, 3, 2), dtype=np.float32))
+        good = [batcher.submit(np.ones((1, 2, 3), dtype=np.float32)) for _ in range(5)]
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        self.assertEqual([f.result(timeout=5)['score'].tolist() for f in good], [[6.0]] * 5)
+        self.assertLessEqual(max(BATCH_SIZES), 2)
+
+    def test_queue_limit(self):
+        batcher = MicroBatcher(lambda: sum_model({'delay': 0.2}), max_batch=1, max_wait=0, max_queue=1)
+        sample = np.ones((1, 2, 3), dtype=np.float32)
+        batcher.submit(sample)
+        time.sleep(0.05)  # 첫 입력은 추론 중
+        batcher.submit(sample)
+        with self.assertRaises(Overloaded):
+            batcher.submit(sample)
+
+
+@override_settings(INFERENCE_MODELS={
+    'sum': SUM_MODEL,
+    'missing': {'kind': 'keras', 'path': '/nonexistent/model.keras'},
+})
+class PredictViewTests(SimpleTestCase):
+    def setUp(self):
+        reset_batchers()
+
+    def post(self, body):
+        return self.client.post('/api/predict/', json.dumps(body), content_type='application/json')
+
+    def test_predict(self):
+        res = self.post({'model': 'sum', 'inputs': [[[1, 2, 3], [4, 5, 6]]]})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'model': 'sum', 'count': 1, 'outputs': {'score': [21.0]}})
+
+    def test_errors(self):
+        self.assertEqual(self.post({'model': 'nope', 'inputs': [[[1]]]}).status_code, 400)
+        self.assertEqual(self.post({'model': 'sum', 'inputs': [[1, 2]]}).status_code, 400)
+        self.assertEqual(self.post({'model': 'sum', 'inputs': 'x'}).status_code, 400)
+        self.assertEqual(self.post({'model': 'missing', 'inputs': [[[1]]]}).status_code, 503)
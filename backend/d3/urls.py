@@ -4,4 +4,13 @@ from . import views
 urlpatterns = [
     path('get_xy/', views.get_xy, name='get_xy'),
     path('dong_data/', views.dong_data, name='dong_data'),
+    path('lookup/', views.lookup, name='lookup'),
+    path('batch_lookup/', views.batch_lookup, name='batch_lookup'),
+    path('bbox/', views.bbox, name='bbox'),
+    path('cells/<str:grid_100>/', views.cell_detail, name='cell_detail'),
+    path('cells/<str:grid_100>/dong/', views.cell_dong, name='cell_dong'),
+    path('predictions/', views.predictions, name='predictions'),
+    path('predictions/cells/', views.prediction_cells, name='prediction_cells'),
+    path('predict/', views.predict, name='predict'),
+    path('dongs/stats/', views.dong_stats_view, name='dong_stats'),
 ]
\ No newline at end of file
@@ -1,147 +1,401 @@
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.views.decorators.http import condition
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+import asyncio
 import json
-from .models import fixbug_db
+import math
+import numpy as np
+from .caching import cached_response, dataset_etag
+from .db import run_db
+from .encoding import BINARY_CONTENT_TYPE, pack_bbox
+from .grid import cell_id_from_key
+from .inference import ModelUnavailable, Overloaded, get_batcher
+from .log import log_error, log_sampled
+from .metrics import collect, render_prometheus
+from .models import DONG_FIELDS, GRID_FIELDS, dong_stats
+from .serializers import dumps, json_response, parse_fields, to_columns
+from .predictions import MONTH_PATTERN, available_months, cell_order, month_delta, month_vectors
+from .snapshot import get_snapshot, snapshot_enabled
+from .spatial import get_index
 
 @csrf_exempt
-def get_xy(request):
+def lookup(request, fields=GRID_FIELDS):
     if request.method == 'POST':
         try:
-            # 요청에서 좌표를 가져옴
+            # 요청에서 좌표를 가져옴 ({"longitude", "latitude", "fields"?} 또는 ?fields=)
             data = json.loads(request.body)
             longitude = data.get('longitude')
             latitude = data.get('latitude')
 
             if longitude is None or latitude is None:
                 return JsonResponse({'error': '좌표값이 누락되었습니다.'}, status=400)
+            coordinates = _coordinates(longitude, latitude)
+            if coordinates is None:
+                return JsonResponse({'error': '좌표값이 올바르지 않습니다.'}, status=400)
 
-            # 로그: 원래 좌표 출력
-            print(f"Received coordinates: longitude={longitude}, latitude={latitude}")
-
-            # 좌표 반올림 (소수점 7자리까지만 유지)
-            rounded_longitude = round(longitude, 7)
-            rounded_latitude = round(latitude, 7)
-
-            # 로그: 반올림된 좌표 출력
-            print(f"Rounded coordinates: longitude={rounded_longitude}, latitude={rounded_latitude}")
+            try:
+                fields = parse_fields(data.get('fields') or request.GET.get('fields'), GRID_FIELDS, fields)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
 
-            # 허용 오차 설정
-            tolerance = 0.00001  # 허용 오차 추가
-
-            # 데이터베이스에서 근사값 검색
-            results = fixbug_db.objects.filter(
-                x__gte=rounded_latitude - tolerance, x__lte=rounded_latitude + tolerance,
-                y__gte=rounded_longitude - tolerance, y__lte=rounded_longitude + tolerance
-            )
+            # 메모리 공간 인덱스에서 가장 가까운 격자 조회 (DB 조회 없음)
+            index = get_index()
+            row = index.nearest(*coordinates, settings.GRID_LOOKUP_MAX_DISTANCE)
 
             # 검색된 데이터가 없을 경우
-            if not results.exists():
+            if row is None:
                 return JsonResponse({'error': '해당 좌표의 데이터를 찾을 수 없습니다.'}, status=404)
 
-            # 데이터 변환 (JSON 형태로 반환)
-            data_list = [
-                {
-                    'grid_100': result.grid_100,
-                    'h_area': result.h_area,
-                    'b_area': result.b_area,
-                    'g_area': result.g_area,
-                    'city': result.city,
-                    'h_a_area': result.h_a_area,
-                    'x': result.x,
-                    'y': result.y,
-                    'male': result.male,
-                    'female': result.female,
-                    'total_population': result.total_population,
-                    'kid': result.kid,
-                    'old': result.old,
-                    'realkid': result.realkid,
-                    'element': result.element,
-                    'middle': result.middle,
-                    'high': result.high,
-                    'twenty': result.twenty,
-                    'thirty': result.thirty,
-                    'fourty': result.fourty,
-                    'fifty': result.fifty,
-                    'sixty': result.sixty,
-                    'seventy': result.seventy,
-                    
-                }
-                for result in results
-            ]
-
-            # 로그: 반환할 데이터 개수 출력
-            print(f"Found {len(data_list)} results for given coordinates.")
-
-            return JsonResponse({'data': data_list}, status=200)
+            # 요청한 필드만 꺼내 반환
+            data_list = [index.row(row, fields)]
+
+            # 로그 (표본 추출)
+            log_sampled('lookup', longitude=longitude, latitude=latitude, grid_100=index.columns['grid_100'][row])
+
+            return json_response({'data': data_list})
 
         except json.JSONDecodeError:
             return JsonResponse({'error': '요청 데이터가 올바른 JSON 형식이 아닙니다.'}, status=400)
 
         except Exception as e:
-            print(f"서버 오류: {str(e)}")  # 예외 로깅
+            log_error('server_error', view=request.path)  # 예외 로깅
             return JsonResponse({'error': f'서버 오류: {str(e)}'}, status=500)
     # 잘못된 요청 처리 (POST 이외의 요청)
     return JsonResponse({'error': 'POST 요청만 허용됩니다.'}, status=405)
 
 
+@csrf_exempt
+def get_xy(request):
+    # 격자 전체 필드 (기존 응답 형태)
+    return lookup(request, GRID_FIELDS)
 
 
 @csrf_exempt
 def dong_data(request):
+    # 행정동 관련 네 필드 (기존 응답 형태)
+    return lookup(request, DONG_FIELDS)
+
+
+@csrf_exempt
+async def batch_lookup(request):
     if request.method == 'POST':
         try:
-            # 요청에서 좌표를 가져옴
+            # 요청: {"points": [[경도, 위도], ...]} 또는 {"keys": ["다마847996", ...]}, "fields" 선택
             data = json.loads(request.body)
-            longitude = data.get('longitude')
-            latitude = data.get('latitude')
+            points = data.get('points')
+            keys = data.get('keys')
+            try:
+                fields = parse_fields(data.get('fields'), GRID_FIELDS, GRID_FIELDS)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
 
-            if longitude is None or latitude is None:
-                return JsonResponse({'error': '좌표값이 누락되었습니다.'}, status=400)
+            if (points is None) == (keys is None):
+                return JsonResponse({'error': 'points 또는 keys 중 하나를 보내야 합니다.'}, status=400)
 
-            # 로그: 원래 좌표 출력
-            print(f"Received coordinates: longitude={longitude}, latitude={latitude}")
+            items = points if points is not None else keys
+            if not isinstance(items, list):
+                return JsonResponse({'error': 'points/keys 는 배열이어야 합니다.'}, status=400)
+            if len(items) > settings.BATCH_LOOKUP_MAX_ITEMS:
+                return JsonResponse(
+                    {'error': f'한 번에 최대 {settings.BATCH_LOOKUP_MAX_ITEMS}개까지 조회할 수 있습니다.'},
+                    status=400)
 
-            # 좌표 반올림 (소수점 7자리까지만 유지)
-            rounded_longitude = round(longitude, 7)
-            rounded_latitude = round(latitude, 7)
+            # get_xy 와 같은 메모리 인덱스로 찾는다 (좌표는 nearest, DB 조회 없음).
+            # 인덱스가 아직 없으면 처음 만들 때만 DB 를 읽으므로 DB 풀 스레드에서 실행
+            rows, values = await run_db(_resolve_rows, points, keys, fields)
 
-            # 로그: 반올림된 좌표 출력
-            print(f"Rounded coordinates: longitude={rounded_longitude}, latitude={rounded_latitude}")
+            # 컬럼형 응답 (입력 순서 유지, 없는 항목은 null)
+            empty = (None,) * len(fields)
+            ordered = []
+            invalid, missing = [], []
+            for i, (row, row_values) in enumerate(zip(rows, values)):
+                if row is _INVALID:
+                    invalid.append(i)
+                elif row is None:
+                    missing.append(i)
+                ordered.append(row_values or empty)
 
-            # 허용 오차 설정
-            tolerance = 0.00001  # 허용 오차 추가
+            return json_response({
+                'count': len(rows),
+                'fields': fields,
+                'data': to_columns(ordered, fields),
+                'missing': missing,
+                'invalid': invalid,
+            })
 
-            # 데이터베이스에서 근사값 검색
-            results = fixbug_db.objects.filter(
-                x__gte=rounded_latitude - tolerance, x__lte=rounded_latitude + tolerance,
-                y__gte=rounded_longitude - tolerance, y__lte=rounded_longitude + tolerance
-            )
+        except json.JSONDecodeError:
+            return JsonResponse({'error': '요청 데이터가 올바른 JSON 형식이 아닙니다.'}, status=400)
 
-            # 검색된 데이터가 없을 경우
-            if not results.exists():
-                return JsonResponse({'error': '해당 좌표의 데이터를 찾을 수 없습니다.'}, status=404)
+        except Exception as e:
+            log_error('server_error', view=request.path)  # 예외 로깅
+            return JsonResponse({'error': f'서버 오류: {str(e)}'}, status=500)
+    # 잘못된 요청 처리 (POST 이외의 요청)
+    return JsonResponse({'error': 'POST 요청만 허용됩니다.'}, status=405)
+
+
+# 형식이 틀린 항목 (없는 격자 None 과 구분)
+_INVALID = object()
+
+
+def _resolve_rows(points, keys, fields=GRID_FIELDS):
+    """입력 순서대로 (인덱스 행 번호 목록, 값 튜플 목록). 찾지 못한 항목은 None, 형식이 틀린 항목은 _INVALID."""
+    index = get_index()
+    if points is not None:
+        rows = [_point_row(index, point) for point in points]
+    else:
+        rows = [_key_row(index, key) for key in keys]
+    columns = [index.columns[field] for field in fields]
+    values = [None if row is None or row is _INVALID else tuple(column[row] for column in columns)
+              for row in rows]
+    return rows, values
+
+
+def _coordinates(longitude, latitude):
+    """(경도, 위도) float 쌍. 숫자가 아니거나 NaN/inf 면 None."""
+    try:
+        longitude, latitude = float(longitude), float(latitude)
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(longitude) and math.isfinite(latitude)):
+        return None
+    return longitude, latitude
+
+
+def _point_row(index, point):
+    # 단건 lookup/get_xy 와 같은 규칙: 격자 중심까지 GRID_LOOKUP_MAX_DISTANCE 안의 가장 가까운 격자
+    try:
+        longitude, latitude = point
+    except (TypeError, ValueError):
+        return _INVALID
+    coordinates = _coordinates(longitude, latitude)
+    if coordinates is None:
+        return _INVALID
+    return index.nearest(*coordinates, settings.GRID_LOOKUP_MAX_DISTANCE)
+
+
+def _key_row(index, key):
+    cell_id = cell_id_from_key(key) if isinstance(key, str) else None
+    if cell_id is None:
+        return _INVALID
+    return index.row_for_cell(cell_id)
+
+
+# bbox JSON 응답 필드 (cell_id 는 별도 컬럼)
+BBOX_FIELDS = ('grid_100', 'x', 'y', 'total_population')
+
+
+@condition(etag_func=dataset_etag)
+def bbox(request):
+    if request.method == 'GET':
+        try:
+            # 요청: ?west=&south=&east=&north=&zoom=&format=json|bin
+            try:
+                west, south, east, north = (float(request.GET[k]) for k in ('west', 'south', 'east', 'north'))
+                zoom = int(request.GET.get('zoom', settings.GRID_BBOX_MIN_ZOOM))
+            except (KeyError, ValueError):
+                return JsonResponse({'error': 'west/south/east/north 좌표값이 올바르지 않습니다.'}, status=400)
+            if west > east or south > north:
+                return JsonResponse({'error': '영역 좌표 순서가 올바르지 않습니다.'}, status=400)
+
+            fmt = request.GET.get('format', 'json')
+            if fmt not in ('json', 'bin'):
+                return JsonResponse({'error': 'format 은 json 또는 bin 이어야 합니다.'}, status=400)
+
+            # 격자는 Z_GRID 이상 줌에서만 그리므로 그 아래에서는 빈 결과
+            index = get_index()
+            rows = index.within_bbox(west, south, east, north) if zoom >= settings.GRID_BBOX_MIN_ZOOM else []
+            if len(rows) > settings.GRID_BBOX_MAX_CELLS:
+                return JsonResponse({'error': '조회 영역이 너무 넓습니다. 지도를 확대하세요.'}, status=400)
 
-            # 데이터 변환 (JSON 형태로 반환)
-            data_list = [
-                {
-                    'grid_100': result.grid_100,
-                    'h_area': result.h_area,
-                    'b_area': result.b_area,
-                    'g_area': result.g_area,
-                }
-                for result in results
-            ]
+            if fmt == 'bin':
+                response = HttpResponse(pack_bbox(index, rows), content_type=BINARY_CONTENT_TYPE)
+            else:
+                columns = {field: index.take(field, rows) for field in ('cell_id',) + BBOX_FIELDS}
+                response = json_response({'count': len(rows), 'data': columns})
+            patch_cache_control(response, public=True, max_age=settings.GRID_HTTP_MAX_AGE)
+            return response
+
+        except Exception as e:
+            log_error('server_error', view=request.path)  # 예외 로깅
+            return JsonResponse({'error': f'서버 오류: {str(e)}'}, status=500)
+    # 잘못된 요청 처리 (GET 이외의 요청)
+    return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+
+
+def _cell_body(grid_100, fields):
+    index = get_index()
+    row = index.row_for_cell(cell_id_from_key(grid_100))
+    if row is None:
+        return 404, dumps({'error': '해당 격자의 데이터를 찾을 수 없습니다.'})
+    return 200, dumps({'data': [index.row(row, fields)]})
+
+
+@condition(etag_func=dataset_etag)
+def cell_detail(request, grid_100):
+    # get_xy 의 GET 버전 (브라우저/프록시 캐시 가능)
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    try:
+        fields = parse_fields(request.GET.get('fields'), GRID_FIELDS, GRID_FIELDS)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return cached_response('cell', f"{grid_100}:{','.join(fields)}", lambda: _cell_body(grid_100, fields))
+
+
+@condition(etag_func=dataset_etag)
+def cell_dong(request, grid_100):
+    # dong_data 의 GET 버전
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    return cached_response('cell_dong', grid_100, lambda: _cell_body(grid_100, DONG_FIELDS))
+
+
+# 행정동 월 집계 응답 필드 (행정동 순서는 코드순)
+DONG_STATS_FIELDS = ('dong_code', 'dong_name', 'cells', 'predicted', 'actual',
+                     'false_positive', 'population', 'predicted_ratio')
+
+
+def _dong_stats_months():
+    if snapshot_enabled():
+        return sorted(set(get_snapshot().column('dong_stats', 'year_month').tolist()))
+    return list(dong_stats.objects.order_by('year_month')
+                .values_list('year_month', flat=True).distinct())
+
+
+def _dong_stats_rows(month):
+    if snapshot_enabled():
+        # 스냅샷은 (월, 행정동 코드) 순
+        return [row[1:] for row in get_snapshot().rows('dong_stats', ('year_month',) + DONG_STATS_FIELDS)
+                if row[0] == month]
+    return dong_stats.objects.filter(year_month=month).order_by('dong_code').values_list(*DONG_STATS_FIELDS)
+
+
+def _dong_stats_body(month):
+    months = _dong_stats_months()
+    if not months:
+        return 404, dumps({'error': '행정동 집계가 없습니다.'})
+    month = month or months[-1]
+    if month not in months:
+        return 404, dumps({'error': f'{month} 집계가 없습니다.', 'months': months})
+
+    rows = _dong_stats_rows(month)
+    return 200, dumps({'month': month, 'months': months, 'fields': DONG_STATS_FIELDS,
+                       'data': to_columns(rows, DONG_STATS_FIELDS)})
+
+
+@condition(etag_func=dataset_etag)
+def dong_stats_view(request):
+    # 행정동별 월 집계 (?month=YYYY-MM, 없으면 최근 월). 클라이언트는 색만 칠하면 된다.
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    month = request.GET.get('month', '')
+    if month and not MONTH_PATTERN.match(month):
+        return JsonResponse({'error': 'month 는 YYYY-MM 형식이어야 합니다.'}, status=400)
+    return cached_response('dong_stats', month, lambda: _dong_stats_body(month))
 
-            # 로그: 반환할 데이터 개수 출력
-            print(f"Found {len(data_list)} results for given coordinates.")
 
-            return JsonResponse({'data': data_list}, status=200)
+# 예측 격자 목록 응답 필드 (월 응답 배열이 이 순서를 따른다)
+PREDICTION_CELL_FIELDS = ('cell_id', 'grid_100', 'latitude', 'longitude')
+
+
+def _prediction_cells_body():
+    columns = to_columns(cell_order(), PREDICTION_CELL_FIELDS)
+    return 200, dumps({'count': len(columns['cell_id']), 'fields': PREDICTION_CELL_FIELDS,
+                       'data': columns})
+
+
+@condition(etag_func=dataset_etag)
+def prediction_cells(request):
+    # 격자 id/코드/좌표는 한 번만 받아 캐시하고, 월을 바꿀 때는 값 배열만 받는다
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    return cached_response('prediction_cells', '', _prediction_cells_body)
+
+
+def _predictions_body(model_version, month, base):
+    months = available_months(model_version)
+    if not months:
+        return 404, dumps({'error': f'{model_version} 모델 예측값이 없습니다.'})
+    month = month or months[-1]
+    for m in (month, base):
+        if m and m not in months:
+            return 404, dumps({'error': f'{m} 예측값이 없습니다.', 'months': months})
+
+    cell_ids = [cell_id for cell_id, *_ in cell_order()]
+    target = month_vectors(model_version, month, cell_ids)
+    body = {'model_version': model_version, 'month': month, 'months': months, 'count': len(cell_ids)}
+    if base:
+        # base 월을 이미 가진 클라이언트용: 값이 바뀐 격자 위치와 새 값만
+        index, actual, predicted = month_delta(month_vectors(model_version, base, cell_ids), target)
+        body.update(base=base, index=index, actual=actual, predicted=predicted)
+    else:
+        body.update(actual=target[0], predicted=target[1])
+    return 200, dumps(body)
+
+
+@condition(etag_func=dataset_etag)
+def predictions(request):
+    # ?month=YYYY-MM[&base=YYYY-MM][&model=] → prediction_cells 순서의 실제값/예측값 배열
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    month = request.GET.get('month', '')
+    base = request.GET.get('base', '')
+    model_version = request.GET.get('model', settings.PREDICTION_MODEL_VERSION)
+    if any(m and not MONTH_PATTERN.match(m) for m in (month, base)):
+        return JsonResponse({'error': 'month/base 는 YYYY-MM 형식이어야 합니다.'}, status=400)
+    if len(model_version) > 50:
+        return JsonResponse({'error': '모델 버전이 올바르지 않습니다.'}, status=400)
+    return cached_response('predictions', f'{model_version}:{month}:{base}',
+                           lambda: _predictions_body(model_version, month, base))
+
+
+def metrics(request):
+    # 모든 워커 합계를 Prometheus 텍스트 형식으로
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'GET 요청만 허용됩니다.'}, status=405)
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@csrf_exempt
+async def predict(request):
+    if request.method == 'POST':
+        try:
+            # 요청: {"model": "transformer", "inputs": [샘플, ...]} (샘플은 모델 입력 모양의 중첩 배열)
+            data = json.loads(request.body)
+            name = data.get('model')
+            if name not in settings.INFERENCE_MODELS:
+                return JsonResponse({'error': f'모델은 {", ".join(settings.INFERENCE_MODELS)} 중 하나여야 합니다.'},
+                                    status=400)
+            batcher = get_batcher(name)
+            try:
+                inputs = np.asarray(data.get('inputs'), dtype=np.float32)
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'inputs 는 숫자 배열이어야 합니다.'}, status=400)
+            if inputs.ndim < 2 or not 0 < len(inputs) <= batcher.max_batch:
+                return JsonResponse({'error': f'inputs 는 샘플 1~{batcher.max_batch}개의 배열이어야 합니다.'},
+                                    status=400)
+
+            # 다른 요청과 함께 마이크로배치로 추론
+            try:
+                future = batcher.submit(inputs)
+                outputs = await asyncio.wait_for(asyncio.wrap_future(future), settings.INFERENCE_TIMEOUT)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            except (ModelUnavailable, Overloaded) as e:
+                return JsonResponse({'error': str(e)}, status=503)
+            except asyncio.TimeoutError:
+                return JsonResponse({'error': '추론 시간이 초과되었습니다.'}, status=503)
+
+            return json_response({'model': name, 'count': len(inputs),
+                                  'outputs': {key: values.tolist() for key, values in outputs.items()}})
 
         except json.JSONDecodeError:
             return JsonResponse({'error': '요청 데이터가 올바른 JSON 형식이 아닙니다.'}, status=400)
 
         except Exception as e:
-            print(f"서버 오류: {str(e)}")  # 예외 로깅
+            log_error('server_error', view=request.path)  # 예외 로깅
             return JsonResponse({'error': f'서버 오류: {str(e)}'}, status=500)
     # 잘못된 요청 처리 (POST 이외의 요청)
-    return JsonResponse({'error': 'POST 요청만 허용됩니다.'}, status=405)
\ No newline at end of file
+    return JsonResponse({'error': 'POST 요청만 허용됩니다.'}, status=405)